@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Adaptive Check Scheduling
+Spreads the daily budget of checks over the hours when new jobs usually appear,
+with jitter, exponential backoff after failures and a lock against overlapping runs
+"""
+
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; fall back to an in-process lock only
+    fcntl = None
+
+# 'adaptive' learns hot hours from first-seen times, 'fixed' keeps the plain hourly schedule
+SCHEDULE_MODE = os.getenv('SCHEDULE_MODE', 'adaptive')
+MIN_CHECK_INTERVAL_MINUTES = float(os.getenv('MIN_CHECK_INTERVAL_MINUTES', '15'))
+MAX_CHECK_INTERVAL_MINUTES = float(os.getenv('MAX_CHECK_INTERVAL_MINUTES', '180'))
+SCHEDULE_JITTER = float(os.getenv('SCHEDULE_JITTER', '0.1'))  # +/- fraction of each interval
+MAX_BACKOFF_MINUTES = float(os.getenv('MAX_BACKOFF_MINUTES', '240'))
+LEARNING_DAYS = 28  # First-seen history used to learn the posting rate
+RELEARN_HOURS = 24
+RUN_LOCK_FILE = "monitor.lock"
+
+def hourly_posting_rates(first_seen_times, days=LEARNING_DAYS, now=None):
+    """Return the average number of new jobs first seen in each hour of the day"""
+    now = now or datetime.now()
+    since = now - timedelta(days=days)
+    counts = [0] * 24
+    for value in first_seen_times:
+        try:
+            seen = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            continue
+        if since <= seen <= now:
+            counts[seen.hour] += 1
+    return [count / days for count in counts]
+
+def allocate_checks(rates, daily_checks, min_per_hour, max_per_hour, smoothing=0.5):
+    """Spread daily_checks over the 24 hours in proportion to rates, within per-hour bounds
+
+    Each hour's weight is its rate plus smoothing times the mean rate, so quiet
+    hours keep some coverage. Hours over the maximum are capped first and what
+    they give up is shared among the others; hours under the minimum are then
+    raised to it, taking the difference from the hours above the minimum. The
+    plan always adds up to daily_checks (spread evenly when the bounds cannot
+    hold that many).
+    """
+    if not 24 * min_per_hour <= daily_checks <= 24 * max_per_hour:
+        return [daily_checks / 24] * 24
+    mean_rate = sum(rates) / 24
+    weights = [rate + smoothing * mean_rate for rate in rates] if mean_rate > 0 else [1.0] * 24
+    allocation = [0.0] * 24
+    free = set(range(24))
+    remaining = daily_checks
+    while free:
+        total = sum(weights[hour] for hour in free) or 1.0
+        shares = {hour: remaining * weights[hour] / total for hour in free}
+        capped = [hour for hour, share in shares.items() if share > max_per_hour]
+        if not capped:
+            for hour, share in shares.items():
+                allocation[hour] = share
+            break
+        for hour in capped:
+            allocation[hour] = max_per_hour
+            remaining -= max_per_hour
+            free.discard(hour)
+    
+    deficit = sum(min_per_hour - checks for checks in allocation if checks < min_per_hour)
+    if deficit > 0:
+        surplus = sum(checks - min_per_hour for checks in allocation if checks > min_per_hour)
+        allocation = [
+            min_per_hour if checks <= min_per_hour
+            else checks - deficit * (checks - min_per_hour) / surplus
+            for checks in allocation
+        ]
+    assert abs(sum(allocation) - daily_checks) < 1e-6 * max(1.0, daily_checks)
+    return allocation
+
+class AdaptiveScheduler:
+    """Picks the delay before the next check from the learned checks-per-hour plan"""
+
+    def __init__(self, rates=None, daily_checks=24, min_interval=MIN_CHECK_INTERVAL_MINUTES,
+                 max_interval=MAX_CHECK_INTERVAL_MINUTES, jitter=SCHEDULE_JITTER, max_backoff=MAX_BACKOFF_MINUTES):
+        self.daily_checks = daily_checks
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.learned_at = None
+        self.learn(rates or [0.0] * 24)
+
+    def learn(self, rates):
+        """Rebuild the checks-per-hour plan from hourly posting rates"""
+        self.rates = rates
+        self.checks_per_hour = allocate_checks(rates, self.daily_checks, 60 / self.max_interval, 60 / self.min_interval)
+        self.learned_at = datetime.now()
+
+    def needs_relearn(self, now=None):
+        now = now or datetime.now()
+        return now - self.learned_at >= timedelta(hours=RELEARN_HOURS)
+
+    def interval_minutes(self, when=None):
+        """Planned minutes between checks during the hour of when"""
+        when = when or datetime.now()
+        return 60 / self.checks_per_hour[when.hour]
+
+    def next_delay(self, now=None):
+        """Seconds to wait before the next check (jittered, backed off after failures)"""
+        minutes = self.interval_minutes(now)
+        if self.failures:
+            minutes = min(minutes * 2 ** self.failures, max(self.max_backoff, minutes))
+        minutes *= 1 + random.uniform(-self.jitter, self.jitter)
+        return minutes * 60
+
+    def record(self, success):
+        """Reset the backoff after a successful check, grow it after a failure"""
+        self.failures = 0 if success else self.failures + 1
+
+    def describe(self, top=3):
+        """Summarize the plan, e.g. 'hot hours 09:00 (4.0/h), 10:00 (3.2/h)'"""
+        if not any(self.rates):
+            return "no posting history yet, checking evenly through the day"
+        busiest = sorted(range(24), key=lambda hour: self.checks_per_hour[hour], reverse=True)[:top]
+        hours = ', '.join(f"{hour:02d}:00 ({self.checks_per_hour[hour]:.1f}/h)" for hour in busiest)
+        return f"hot hours {hours}; {sum(self.checks_per_hour):.0f} checks/day"
+
+class RunLock:
+    """Non-blocking lock that keeps two checks from running at once, across processes"""
+
+    def __init__(self, path=RUN_LOCK_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+
+    def acquire(self):
+        """Return True if the lock was taken, False if a check is already running"""
+        if not self.lock.acquire(blocking=False):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.lock.release()
+            return False
+
+    def release(self):
+        if self.file is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+        self.lock.release()
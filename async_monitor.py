@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Concurrent Microsoft Career Monitoring
+Runs several job sources at once on a bounded pool of isolated browser contexts
+"""
+
+import asyncio
+import time
+from datetime import date
+from urllib.parse import parse_qsl, urlsplit
+
+from playwright.async_api import async_playwright
+
+from career_monitor import (
+    TARGET_URLS, CONCURRENT_SOURCES, MAX_PAGES,
+    NAVIGATION_PROFILE, PAGE_READY_TIMEOUT_MS, NETWORK_IDLE_TIMEOUT_MS, JOB_CONTAINER_SELECTOR,
+    should_block_request, record_load_latency,
+    PAGE_FINGERPRINTING, FINGERPRINT_JS, JOB_TITLE_SELECTOR,
+    EXTRACT_CONTAINERS_JS, EXTRACT_CONTAINERS_ARGS,
+    FIND_TODAY_TITLES_JS, FIND_TODAY_TITLES_ARGS,
+    jobs_from_container_records, jobs_from_fallback_result, diff_source, page_url,
+)
+from debug_capture import anomaly_reasons, capture_page_async, save_job_counts, start_trace_async, stop_trace_async
+from job_store import open_job_store
+from rate_limiter import shared_limiter
+import instrumentation
+
+async def apply_navigation_profile_async(context):
+    """Async counterpart of career_monitor.apply_navigation_profile"""
+    if NAVIGATION_PROFILE != 'fast':
+        return
+
+    async def handle_route(route):
+        request = route.request
+        if should_block_request(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle_route)
+
+async def navigate_async(page, url, **kwargs):
+    """Async counterpart of career_monitor.navigate"""
+    limiter = shared_limiter()
+    if limiter is None:
+        return await page.goto(url, **kwargs)
+    delay = limiter.reserve(url)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        response = await page.goto(url, **kwargs)
+    except Exception as e:
+        limiter.record(url, error=e)
+        raise
+    if response is not None:
+        limiter.record(url, response.status, retry_after=response.headers.get('retry-after'))
+    return response
+
+async def wait_for_page_ready_async(page):
+    """Async counterpart of career_monitor.wait_for_page_ready"""
+    if NAVIGATION_PROFILE != 'fast':
+        await page.wait_for_timeout(5000)
+        return 'sleep'
+    try:
+        await page.wait_for_selector(JOB_CONTAINER_SELECTOR, state="attached", timeout=PAGE_READY_TIMEOUT_MS)
+        return 'selector'
+    except Exception:
+        pass
+    try:
+        await page.wait_for_load_state("networkidle", timeout=NETWORK_IDLE_TIMEOUT_MS)
+        return 'networkidle'
+    except Exception:
+        return 'timeout'
+
+async def iter_container_pages_async(page, url, max_pages=None, stats=None):
+    """Async counterpart of career_monitor.iter_container_pages"""
+    max_pages = max_pages or MAX_PAGES
+    if stats is None:
+        stats = {}
+    query = dict(parse_qsl(urlsplit(url).query))
+    page_size = int(query.get('pgSz', '20'))
+    first_page = int(query.get('pg', '1'))
+
+    spare_tabs = []
+    current = page
+    try:
+        for crawled in range(max_pages):
+            if crawled > 0:
+                try:
+                    await current.wait_for_selector(JOB_CONTAINER_SELECTOR, state="attached", timeout=PAGE_READY_TIMEOUT_MS)
+                except Exception:
+                    print(f"No job containers on result page {first_page + crawled}, stopping crawl")
+                    return
+            records = await current.evaluate(EXTRACT_CONTAINERS_JS, EXTRACT_CONTAINERS_ARGS)
+            stats['pages_crawled'] = stats.get('pages_crawled', 0) + 1
+
+            more_pages = (
+                crawled + 1 < max_pages
+                and len(records) >= page_size
+                and records[-1]['hasToday']
+            )
+            if more_pages:
+                if len(spare_tabs) < 2:
+                    spare_tabs.append(await page.context.new_page())
+                current = spare_tabs[crawled % 2]
+                await navigate_async(current, page_url(url, first_page + crawled + 1), timeout=60000, wait_until="commit")
+
+            yield records
+
+            if not more_pages:
+                return
+    finally:
+        for tab in spare_tabs:
+            await tab.close()
+
+async def extract_todays_jobs_async(page, stats=None, url=None):
+    """Async counterpart of career_monitor.extract_todays_jobs (evaluate engine only)"""
+    if stats is None:
+        stats = {}
+    stats['mode'] = 'evaluate'
+    print("Extracting jobs updated today...")
+
+    try:
+        await page.wait_for_load_state("domcontentloaded")
+        print(f"Looking for jobs updated today: {date.today().strftime('%Y-%m-%d')}")
+
+        seen_jobs = set()
+        if url and MAX_PAGES > 1:
+            todays_jobs = []
+            async for records in iter_container_pages_async(page, url, stats=stats):
+                todays_jobs.extend(jobs_from_container_records(records, seen_jobs, stats))
+            print(f"Crawled {stats.get('pages_crawled', 0)} result page(s)")
+        else:
+            records = await page.evaluate(EXTRACT_CONTAINERS_JS, EXTRACT_CONTAINERS_ARGS)
+            todays_jobs = jobs_from_container_records(records, seen_jobs, stats)
+
+        stats['fallback_used'] = not todays_jobs
+        if not todays_jobs:
+            print("Specific structure not found, trying broader search...")
+            result = await page.evaluate(FIND_TODAY_TITLES_JS, FIND_TODAY_TITLES_ARGS)
+            todays_jobs = jobs_from_fallback_result(result, seen_jobs, stats)
+
+        print(f"Found {len(todays_jobs)} jobs updated today")
+        return todays_jobs
+
+    except Exception as e:
+        print(f"Error extracting today's jobs: {str(e)}")
+        stats['error'] = str(e)
+        return []
+
+async def page_fingerprint_async(page):
+    """Async counterpart of career_monitor.page_fingerprint (DOM only)"""
+    try:
+        dom_fingerprint = await page.evaluate(FINGERPRINT_JS, [JOB_CONTAINER_SELECTOR, JOB_TITLE_SELECTOR])
+    except Exception as e:
+        print(f"Error fingerprinting job list: {str(e)}")
+        return None
+    if dom_fingerprint.startswith('0:'):
+        return None
+    return f"{date.today().isoformat()}:{dom_fingerprint}"
+
+async def monitor_source_async(context, source_key, config, store):
+    """Visit one job source in its own page and return its current and new jobs"""
+    await start_trace_async(context)
+    page = await context.new_page()
+    try:
+        print(f"\n--- Monitoring {config['name']} ---")
+        print(f"URL: {config['url']}")
+
+        started = time.monotonic()
+        with instrumentation.span('navigation', source=source_key):
+            await navigate_async(page, config['url'], timeout=60000, wait_until="domcontentloaded")
+        navigated = time.monotonic()
+        with instrumentation.span('wait', source=source_key):
+            ready_by = await wait_for_page_ready_async(page)
+        ready = time.monotonic()
+        record_load_latency(source_key, {
+            'goto_ms': round((navigated - started) * 1000),
+            'ready_ms': round((ready - navigated) * 1000),
+            'total_ms': round((ready - started) * 1000),
+            'ready_by': ready_by
+        })
+
+        fingerprint = await page_fingerprint_async(page) if PAGE_FINGERPRINTING else None
+        if fingerprint and fingerprint == store.get_fingerprint(source_key):
+            print(f"⚡ {config['name']} unchanged since last run ({fingerprint}), skipping extraction")
+            instrumentation.incr('sources_unchanged')
+            store.keep(source_key)
+            return store.previous_jobs(source_key), []
+
+        stats = {}
+        with instrumentation.span('extraction', source=source_key):
+            current_jobs = await extract_todays_jobs_async(page, stats, url=config['url'])
+        print(f"Found {len(current_jobs)} jobs updated today in {config['name']}")
+        await capture_page_async(page, source_key, anomaly_reasons(source_key, stats, current_jobs), config['url'], stats)
+        return current_jobs, diff_source(store, source_key, current_jobs, stats, fingerprint)
+    except Exception as e:
+        await capture_page_async(page, source_key, anomaly_reasons(source_key, {}, [], error=e), config['url'])
+        raise
+    finally:
+        await page.close()
+        await stop_trace_async(context)  # Discards the trace unless an anomaly saved it
+
+async def monitor_sources_async(sources, store, max_concurrency=CONCURRENT_SOURCES):
+    """Monitor every source concurrently with at most max_concurrency browser contexts
+
+    Returns the same (current_todays_jobs, all_new_jobs) pair as
+    career_monitor.monitor_sources. A failing source is logged and left out
+    of the results without affecting the others. Only the evaluate
+    extraction engine is ported; career_monitor.main runs the other
+    EXTRACTION_MODEs sequentially.
+    """
+    pool_size = max(1, min(max_concurrency, len(sources)))
+    current_todays_jobs = {}
+    all_new_jobs = []
+
+    async with async_playwright() as p:
+        print(f"\nLaunching browser with {pool_size} concurrent contexts...")
+        with instrumentation.span('browser_launch'):
+            browser = await p.chromium.launch(headless=True)
+
+        # Each worker borrows an isolated context from the pool for one source
+        contexts = asyncio.Queue()
+        for _ in range(pool_size):
+            context = await browser.new_context()
+            await apply_navigation_profile_async(context)
+            contexts.put_nowait(context)
+
+        async def run_source(source_key, config):
+            context = await contexts.get()
+            started = time.monotonic()
+            try:
+                return await monitor_source_async(context, source_key, config, store)
+            finally:
+                print(f"⏱️ {config['name']} finished in {time.monotonic() - started:.1f}s")
+                contexts.put_nowait(context)
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(run_source(source_key, config) for source_key, config in sources.items()),
+            return_exceptions=True
+        )
+
+        for (source_key, config), result in zip(sources.items(), results):
+            if isinstance(result, BaseException):
+                print(f"Error monitoring {config['name']}: {str(result)}")
+                continue
+            current_jobs, new_jobs = result
+            current_todays_jobs[source_key] = current_jobs
+            all_new_jobs.extend(new_jobs)
+
+        print(f"\n⏱️ Monitored {len(sources)} sources in {time.monotonic() - started:.1f}s")
+
+        while not contexts.empty():
+            await contexts.get_nowait().close()
+        await browser.close()
+
+    return current_todays_jobs, all_new_jobs
+
+if __name__ == "__main__":
+    current, new = asyncio.run(monitor_sources_async(TARGET_URLS, open_job_store()))
+    save_job_counts()
+    print(f"{sum(len(jobs) for jobs in current.values())} jobs updated today, {len(new)} new")
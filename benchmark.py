@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Offline Extraction Benchmark
+Times every extraction strategy, the diff and the state stores against generated
+careers pages served from local file:// URLs, without touching the live site
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+import career_monitor
+from career_monitor import (
+    JOB_CONTAINER_SELECTOR, JOB_TITLE_SELECTOR,
+    compare_todays_jobs, extract_todays_jobs, find_new_jobs,
+)
+from job_store import JsonJobStore, SqliteJobStore
+from search_api import jobs_from_search_payload
+
+BENCH_SIZES = [20, 200, 2000]
+BENCH_REPEAT = int(os.getenv('BENCH_REPEAT', '3'))
+BENCH_REPORT_FILE = os.getenv('BENCH_REPORT_FILE', 'benchmark_report.json')
+BENCH_BASELINE_FILE = os.getenv('BENCH_BASELINE_FILE', 'benchmark_baseline.json')
+# Fail when an extraction case gets this much slower than the baseline...
+BENCH_REGRESSION_THRESHOLD = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '0.25'))
+# ...and slower by at least this many milliseconds (ignores timer noise on tiny cases)
+BENCH_NOISE_FLOOR_MS = float(os.getenv('BENCH_NOISE_FLOOR_MS', '5'))
+
+# Layouts: 'primary' renders the css-490 job cards, 'fallback' renders cards
+# without them so extraction drops to the broader "Today" search
+LAYOUTS = ['primary', 'fallback']
+DOM_STRATEGIES = ['evaluate', 'legacy']
+
+JOB_ROLES = ['Data Engineer', 'Data Scientist', 'Data Analyst', 'Business Analyst', 'Applied Scientist']
+JOB_LEVELS = ['', 'Senior ', 'Principal ', 'Lead ']
+JOB_LOCATIONS = ['Redmond, Washington, United States', 'Seattle, Washington, United States',
+                 'Multiple Locations, United States', 'Atlanta, Georgia, United States']
+JOB_ARRANGEMENTS = ['Up to 50% work from home', '3 days / week in-office', 'Fully remote', 'Hybrid']
+HIDDEN_SEPARATOR_COUNT = 8  # Extra non-job elements per card, as on the real page
+
+def synthetic_job(index):
+    """Return the fields of the index-th generated job (the first half is from today)"""
+    return {
+        'job_id': str(1700000 + index),
+        'title': f"{JOB_LEVELS[index % len(JOB_LEVELS)]}{JOB_ROLES[index % len(JOB_ROLES)]} {index:04d}",
+        'location': JOB_LOCATIONS[index % len(JOB_LOCATIONS)],
+        'work_arrangement': JOB_ARRANGEMENTS[index % len(JOB_ARRANGEMENTS)],
+    }
+
+def is_today(index, job_count):
+    return index < job_count // 2
+
+def careers_page_html(job_count, layout='primary'):
+    """Generate a careers search page with job_count jobs, sorted by Recent"""
+    cards = []
+    for i in range(job_count):
+        job = synthetic_job(i)
+        updated = 'Today' if is_today(i, job_count) else f"{2 + i % 20} days ago"
+        link = f"https://jobs.careers.microsoft.com/global/en/jobs/{job['job_id']}"
+        filler = ''.join('<div class="ms-Stack-inner"><i></i></div>' for _ in range(HIDDEN_SEPARATOR_COUNT))
+        if layout == 'primary':
+            cards.append(
+                f'<div class="ms-Stack css-490">'
+                f'<h2 class="{JOB_TITLE_SELECTOR.split(".", 1)[1]}">{job["title"]}</h2>'
+                f'<div class="ms-Stack css-491"><span>{job["location"]}</span>'
+                f'<span>{job["work_arrangement"]}</span><span>{updated}</span></div>'
+                f'{filler}<a href="{link}">See details</a></div>'
+            )
+        else:
+            cards.append(
+                f'<li class="job-card"><div class="job-header"><h3>{job["title"]}</h3></div>'
+                f'<div class="job-meta"><p>{job["location"]}</p><p>{job["work_arrangement"]}</p>'
+                f'<p>{updated}</p></div>{filler}<a href="{link}">See details</a></li>'
+            )
+    container = ''.join(cards) if layout == 'primary' else f"<ul>{''.join(cards)}</ul>"
+    return (
+        "<!DOCTYPE html><html><head><title>Search Jobs | Microsoft Careers</title></head><body>"
+        "<header><h1>Search jobs</h1><a href=\"/global/en/search\">Browse all careers</a></header>"
+        f"<main><div class=\"ms-List\">{container}</div></main></body></html>"
+    )
+
+def search_payload(job_count, today=None):
+    """Generate a careers search API payload matching careers_page_html"""
+    today = today or date.today()
+    jobs = []
+    for i in range(job_count):
+        job = synthetic_job(i)
+        posted = today if is_today(i, job_count) else today - timedelta(days=2 + i % 20)
+        jobs.append({
+            'jobId': job['job_id'],
+            'title': job['title'],
+            'postingDate': f"{posted.isoformat()}T12:00:00",
+            'properties': {
+                'primaryLocation': job['location'],
+                'locations': [job['location']],
+                'workSiteFlexibility': job['work_arrangement'],
+                'profession': 'Data Engineering',
+                'roleType': 'Individual Contributor',
+                'employmentType': 'Full-Time',
+            },
+        })
+    return {'operationResult': {'result': {'jobs': jobs, 'totalJobs': job_count}}}
+
+def expected_jobs(job_count):
+    return sum(1 for i in range(job_count) if is_today(i, job_count))
+
+def write_fixtures(directory, sizes):
+    """Write every fixture page to directory and return {(layout, size): file:// URL}"""
+    urls = {}
+    for layout in LAYOUTS:
+        for size in sizes:
+            path = Path(directory) / f"careers_{layout}_{size}.html"
+            path.write_text(careers_page_html(size, layout), encoding='utf-8')
+            urls[(layout, size)] = path.resolve().as_uri()
+    return urls
+
+def time_case(function, repeat):
+    """Run function repeat times with its output silenced; return (timings_ms, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, result
+
+def case_result(name, timings, jobs=None, expected=None, **details):
+    entry = {
+        'case': name,
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'runs': len(timings),
+        **details
+    }
+    if jobs is not None:
+        entry['jobs'] = jobs
+        if expected is not None and jobs != expected:
+            entry['mismatch'] = f"expected {expected} jobs"
+    print(f"  {name:<40} {entry['median_ms']:>10.2f} ms  (min {entry['min_ms']:.2f}){'  ⚠️ ' + entry['mismatch'] if 'mismatch' in entry else ''}")
+    return entry
+
+def bench_extraction(page, urls, sizes, repeat):
+    """Time the DOM engines (and their fallbacks) and the search payload parser"""
+    results = []
+    for layout in LAYOUTS:
+        for size in sizes:
+            page.goto(urls[(layout, size)], wait_until="domcontentloaded")
+            page.wait_for_selector(JOB_CONTAINER_SELECTOR if layout == 'primary' else 'li.job-card', state="attached")
+            for strategy in DOM_STRATEGIES:
+                stats = {}
+
+                def run():
+                    stats.clear()
+                    return extract_todays_jobs(page, mode=strategy, stats=stats)
+
+                timings, jobs = time_case(run, repeat)
+                results.append(case_result(
+                    f"extract/{strategy}/{layout}/{size}", timings, len(jobs), expected_jobs(size),
+                    fallback_used=stats.get('fallback_used', False),
+                    fallback_timed_out=stats.get('fallback_timed_out', False),
+                ))
+
+    for size in sizes:
+        payload = search_payload(size)
+        timings, result = time_case(lambda: jobs_from_search_payload(payload, set()), repeat)
+        results.append(case_result(f"extract/network/payload/{size}", timings, len(result[0]), expected_jobs(size)))
+    return results
+
+def bench_diff_and_state(sizes, repeat):
+    """Time compare_todays_jobs and both state stores on a run where a tenth of the jobs are new"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            jobs = [dict(synthetic_job(i), updated_date='Today') for i in range(size)]
+            previous = jobs[size // 10:]
+
+            timings, new_jobs = time_case(lambda: compare_todays_jobs(jobs, previous, 'bench'), repeat)
+            results.append(case_result(f"diff/compare_todays_jobs/{size}", timings, len(new_jobs)))
+
+            for backend in ('json', 'sqlite'):
+                def open_store():
+                    if backend == 'json':
+                        return JsonJobStore(path=os.path.join(directory, f"known_{size}.json"),
+                                            fingerprints_path=os.path.join(directory, f"fingerprints_{size}.json"))
+                    return SqliteJobStore(path=os.path.join(directory, f"store_{size}.db"), import_from=None)
+
+                seed = open_store()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seed.record('bench', previous)
+                    seed.commit()
+                seed.close()
+
+                store = open_store()
+                timings, new_jobs = time_case(lambda: find_new_jobs(store, 'bench', jobs), repeat)
+                results.append(case_result(f"diff/{backend}_store/{size}", timings, len(new_jobs)))
+
+                def write_state():
+                    store.record('bench', jobs)
+                    store.commit()
+
+                timings, _ = time_case(write_state, repeat)
+                results.append(case_result(f"state_write/{backend}/{size}", timings))
+                store.close()
+    return results
+
+def run_benchmarks(sizes=None, repeat=None, fixtures_dir=None):
+    """Run the whole suite and return the report dict"""
+    sizes = sizes or BENCH_SIZES
+    repeat = repeat or BENCH_REPEAT
+    started = time.perf_counter()
+    print(f"Benchmarking extraction on {', '.join(map(str, sizes))}-job fixtures ({repeat} run(s) each)")
+
+    with contextlib.ExitStack() as stack:
+        if fixtures_dir is None:
+            fixtures_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        else:
+            os.makedirs(fixtures_dir, exist_ok=True)
+        urls = write_fixtures(fixtures_dir, sizes)
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            try:
+                results = bench_extraction(page, urls, sizes, repeat)
+            finally:
+                browser.close()
+
+    print("Benchmarking diff and state layers")
+    results += bench_diff_and_state(sizes, repeat)
+
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': sizes,
+        'repeat': repeat,
+        'fallback_time_budget_ms': career_monitor.FALLBACK_TIME_BUDGET_MS,
+        'total_seconds': round(time.perf_counter() - started, 2),
+        'results': results,
+    }
+
+def find_regressions(report, baseline, threshold=None, noise_floor_ms=None):
+    """Return a message for every extraction case that got slower than the baseline allows"""
+    threshold = BENCH_REGRESSION_THRESHOLD if threshold is None else threshold
+    noise_floor_ms = BENCH_NOISE_FLOOR_MS if noise_floor_ms is None else noise_floor_ms
+    baseline_cases = {entry['case']: entry for entry in baseline.get('results', [])}
+    regressions = []
+    for entry in report['results']:
+        before = baseline_cases.get(entry['case'])
+        if not before or not entry['case'].startswith('extract/'):
+            continue
+        slower_ms = entry['median_ms'] - before['median_ms']
+        if slower_ms > noise_floor_ms and entry['median_ms'] > before['median_ms'] * (1 + threshold):
+            regressions.append(
+                f"{entry['case']}: {before['median_ms']:.2f}ms -> {entry['median_ms']:.2f}ms "
+                f"(+{slower_ms / before['median_ms']:.0%})"
+            )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for job extraction, diffing and state writes")
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')], default=None,
+                        help="Comma-separated fixture sizes (default: 20,200,2000)")
+    parser.add_argument('--repeat', type=int, default=None, help="Timed runs per case")
+    parser.add_argument('--fixtures-dir', default=None, help="Keep the generated fixture pages in this directory")
+    parser.add_argument('--report', default=BENCH_REPORT_FILE, help="Where to write the JSON report")
+    parser.add_argument('--baseline', default=BENCH_BASELINE_FILE, help="Report to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this report as the new baseline")
+    parser.add_argument('--threshold', type=float, default=None, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.repeat, args.fixtures_dir)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Report written to {args.report} ({report['total_seconds']}s)")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = find_regressions(report, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} extraction case(s) regressed past the threshold:")
+        for regression in regressions:
+            print(f"  • {regression}")
+        return 1
+    print("✅ No extraction regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,35 +4,595 @@ Automated Microsoft Career Page Notification System
 Monitors Microsoft Careers for jobs updated today and sends email alerts
 """
 
-from playwright.sync_api import sync_playwright
 import os
-import smtplib
 import json
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, date
 import re
+import time
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
 
-# Configuration variables - Microsoft URLs to monitor
-TARGET_URLS = {
+from debug_capture import anomaly_reasons, capture_page, record_job_count, save_job_counts, start_trace, stop_trace
+import instrumentation
+from instrumentation import trace
+from job_details import ENRICH_DETAILS, enrich_new_jobs
+from job_store import KNOWN_TODAYS_JOBS_FILE, link_job_id, load_json_state, save_json_state, open_job_store
+from keyword_matcher import KeywordMatcher, RelevanceFilter
+from near_duplicates import NEAR_DUPLICATES, DedupIndex, suppress_near_duplicates
+# Email configuration lives with the notifier (set via environment variables in GitHub Actions)
+from notifier import Notifier
+from query_planner import resolve_sources, source_filters, base_signature, plan_queries, search_url, job_matches
+from rate_limiter import shared_limiter, save_shared_limiter
+from search_api import (
+    is_search_api_url, search_api_url, payload_jobs, jobs_from_search_payload, fingerprint_search_payload
+)
+
+# Configuration variables - Microsoft searches to monitor, as filter sets
+# (lc = location, d = discipline, rt = role type, et = employment type);
+# a source can also give a raw search "url" instead of "filters"
+TARGET_SOURCES = {
     "microsoft_data_jobs": {
-        "url": "https://jobs.careers.microsoft.com/global/en/search?lc=United%20States&d=Data%20Engineering&d=Data%20Science&d=Data%20Analytics&d=Business%20Analytics&rt=Individual%20Contributor&et=Full-Time&et=Full-time&l=en_us&pg=1&pgSz=20&o=Recent&flt=true",
+        "filters": {
+            "lc": ["United States"],
+            "d": ["Data Engineering", "Data Science", "Data Analytics", "Business Analytics"],
+            "rt": ["Individual Contributor"],
+            "et": ["Full-Time", "Full-time"]
+        },
         "name": "Microsoft Data Jobs (Engineering, Science, Analytics)"
     }
 }
+TARGET_URLS = resolve_sources(TARGET_SOURCES)  # Each source with its search "url" filled in
+
+# Number of sources to monitor at once; above 1 switches to the asyncio
+# monitor with a pool of isolated browser contexts (see async_monitor.py)
+CONCURRENT_SOURCES = int(os.getenv('CONCURRENT_SOURCES', '1'))
+
+# Extraction engine: 'evaluate' pulls every job container in one page.evaluate
+# roundtrip, 'legacy' walks the DOM one Playwright IPC call at a time and
+# 'network' reads the careers search API payload, falling back to 'evaluate'
+EXTRACTION_MODE = os.getenv('EXTRACTION_MODE', 'evaluate')
+
+# Navigation profile: 'fast' blocks non-essential resources and waits for the job
+# list to appear (with a ceiling), 'legacy' loads everything and sleeps 5s
+NAVIGATION_PROFILE = os.getenv('NAVIGATION_PROFILE', 'fast')
+PAGE_READY_TIMEOUT_MS = int(os.getenv('PAGE_READY_TIMEOUT_MS', '15000'))
+NETWORK_IDLE_TIMEOUT_MS = 3000
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet'}
+BLOCKED_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'clarity.ms',
+    'bat.bing.com', 'facebook.net', 'linkedin.com', 'licdn.com', 'adsrvr.org',
+    'demdex.net', 'omtrdc.net', 'js.monitor.azure.com', 'events.data.microsoft.com',
+    'mktoresp.com', 'hotjar.com', 'qualtrics.com'
+)
+LOAD_LATENCY_FILE = "load_latency.jsonl"  # Per-source page load timings
+
+# Skip extraction, diffing and the state write for a source
+# whose job list fingerprint matches the previous run
+PAGE_FINGERPRINTING = os.getenv('PAGE_FINGERPRINTING', '1') == '1'
+
+# Try each source's search API over plain keep-alive HTTP first and only
+# launch Chromium for the sources that did not return a usable payload
+HTTP_FAST_PATH = os.getenv('HTTP_FAST_PATH', '1') == '1'
+
+# Worker processes (each with its own browser) for large source lists; 0 or 1 disables sharding
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', '0'))
+
+# Append every run's jobs to the columnar history in ARCHIVE_DIR (see posting_archive.py)
+POSTING_ARCHIVE = os.getenv('POSTING_ARCHIVE', '1') == '1'
+
+# Result pages to crawl per source; the crawl stops early once "Today" entries run out
+MAX_PAGES = int(os.getenv('MAX_PAGES', '10'))
+
+# Selectors and keywords shared by every extraction path
+JOB_CONTAINER_SELECTOR = 'div.ms-Stack.css-490'
+JOB_TITLE_SELECTOR = 'h2.MZGzlrn8gfgSs8TZHhv2'
+ALT_TITLE_SELECTORS = [
+    'h2[class*="MZGzlrn8gfgSs8TZHhv2"]',
+    'h2',
+    'h1',
+    'h3',
+    '[class*="title"]',
+    'a[href*="/jobs/"]'
+]
+LOCATION_KEYWORDS = ['Redmond', 'Seattle', 'Washington', 'United States', 'Remote', 'Hybrid']
+ARRANGEMENT_KEYWORDS = ['days / week', 'in-office', 'remote', 'hybrid']
+SKIP_TITLE_KEYWORDS = ['search', 'filter', 'sort', 'apply', 'browse', 'view all', 'microsoft', 'careers']
+FALLBACK_TITLE_SELECTORS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a[href*="/jobs/"]']
+FALLBACK_SKIP_KEYWORDS = SKIP_TITLE_KEYWORDS + ['today', 'yesterday']
+FALLBACK_MAX_LEVELS = 10
+# Each keyword list compiled once; the skip lists match the lowercased title
+LOCATION_MATCHER = KeywordMatcher(LOCATION_KEYWORDS)
+ARRANGEMENT_MATCHER = KeywordMatcher(ARRANGEMENT_KEYWORDS)
+SKIP_TITLE_MATCHER = KeywordMatcher(SKIP_TITLE_KEYWORDS, lowercase=True)
+FALLBACK_SKIP_MATCHER = KeywordMatcher(FALLBACK_SKIP_KEYWORDS, lowercase=True)
+
+# Hard ceiling for the broader-search fallback so it can never stall a run
+FALLBACK_TIME_BUDGET_MS = int(os.getenv('FALLBACK_TIME_BUDGET_MS', '10000'))
+
+# Pulls title, spans, "Today" flag and job link for every container in one call
+EXTRACT_CONTAINERS_JS = """
+([containerSelector, titleSelector, altSelectors, previewLength]) => {
+    const text = el => (el.innerText || '').trim();
+    return Array.from(document.querySelectorAll(containerSelector), (container, index) => {
+        const containerText = container.innerText || '';
+        const record = {
+            index: index,
+            hasToday: containerText.includes('Today'),
+            preview: containerText.slice(0, previewLength),
+            title: null,
+            altTitles: [],
+            spans: [],
+            link: null
+        };
+        if (!record.hasToday) {
+            return record;
+        }
+        const titleElement = container.querySelector(titleSelector);
+        if (titleElement) {
+            record.title = text(titleElement);
+        } else {
+            for (const selector of altSelectors) {
+                const element = container.querySelector(selector);
+                if (element) {
+                    record.altTitles.push([selector, text(element)]);
+                }
+            }
+        }
+        record.spans = Array.from(container.querySelectorAll('span'), text);
+        const link = container.querySelector('a[href*="/jobs/"]');
+        record.link = link ? link.href : null;
+        return record;
+    });
+}
+"""
+
+# Finds "Today" text nodes and resolves the nearest title ancestor in one pass
+FIND_TODAY_TITLES_JS = """
+([titleSelectors, skipKeywords, maxLevels, budgetMs]) => {
+    const started = performance.now();
+    const clean = value => (value || '').replace(/&nbsp;/g, ' ').replace(/\\s+/g, ' ').trim();
+    const isTitle = title => title.length > 5 && title.length < 200
+        && !skipKeywords.some(skip => title.toLowerCase().includes(skip));
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT, {
+        acceptNode: node => node.nodeValue.includes('Today') ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_SKIP
+    });
+    const resolved = new Map();  // start element -> candidate (or null), shared across text nodes
+    const candidates = [];
+    let scanned = 0;
+    let timedOut = false;
+    let node;
+    while ((node = walker.nextNode())) {
+        if (performance.now() - started > budgetMs) {
+            timedOut = true;
+            break;
+        }
+        scanned++;
+        const start = node.parentElement;
+        if (!start || resolved.has(start) || (start.textContent || '').length >= 1000) {
+            continue;
+        }
+        let candidate = null;
+        let element = start;
+        for (let level = 0; element && level < maxLevels && !candidate; level++) {
+            for (const selector of titleSelectors) {
+                const titleElement = element.querySelector(selector);
+                if (!titleElement) {
+                    continue;
+                }
+                const title = clean(titleElement.innerText);
+                if (isTitle(title)) {
+                    candidate = {title: title, level: level, selector: selector};
+                    break;
+                }
+            }
+            element = element.parentElement;
+        }
+        resolved.set(start, candidate);
+        if (candidate) {
+            candidates.push(candidate);
+        }
+    }
+    return {candidates: candidates, scanned: scanned, timedOut: timedOut,
+            elapsedMs: Math.round(performance.now() - started)};
+}
+"""
+
+# Cheap fingerprint of the rendered job list: FNV-1a over each container's title and "Today" flag
+FINGERPRINT_JS = """
+([containerSelector, titleSelector]) => {
+    let hash = 0x811c9dc5;
+    const containers = document.querySelectorAll(containerSelector);
+    for (const container of containers) {
+        const titleElement = container.querySelector(titleSelector);
+        const text = (titleElement || container).textContent || '';
+        const entry = text.trim() + (container.textContent.includes('Today') ? '|T' : '|') + '\\n';
+        for (let i = 0; i < entry.length; i++) {
+            hash ^= entry.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193) >>> 0;
+        }
+    }
+    return containers.length + ':' + hash.toString(16);
+}
+"""
+
+# Container text previews are only pulled across for verbose tracing
+EXTRACT_CONTAINERS_ARGS = [JOB_CONTAINER_SELECTOR, JOB_TITLE_SELECTOR, ALT_TITLE_SELECTORS, 200 if instrumentation.VERBOSE else 0]
+FIND_TODAY_TITLES_ARGS = [FALLBACK_TITLE_SELECTORS, FALLBACK_SKIP_KEYWORDS, FALLBACK_MAX_LEVELS, FALLBACK_TIME_BUDGET_MS]
+
+def clean_job_title(raw_title):
+    """Clean up a job title (remove &nbsp; and extra whitespace)"""
+    job_title = re.sub(r'&nbsp;', ' ', raw_title.strip())
+    return re.sub(r'\s+', ' ', job_title).strip()
+
+def _legacy_roundtrip_estimate(record):
+    """Estimate the IPC calls the legacy engine spends on one container record"""
+    calls = 1  # container.inner_text()
+    if not record['hasToday']:
+        return calls
+    calls += 1  # query_selector(JOB_TITLE_SELECTOR)
+    if record['title'] is not None:
+        calls += 1  # title inner_text()
+        calls += 1  # query_selector_all('span')
+        spans = record['spans']
+        for matcher in (LOCATION_MATCHER, ARRANGEMENT_MATCHER):
+            index = matcher.first_index(spans)
+            calls += index + 1 if index is not None else len(spans)
+    else:
+        # One query per alt selector until a usable title is found
+        calls += len(ALT_TITLE_SELECTORS) + 2 * len(record['altTitles'])
+    return calls
+
+def _jobs_from_container_records(records, seen_jobs):
+    """Apply title filtering and dedup to container records pulled in-page"""
+    todays_jobs = []
+    for record in records:
+        i = record['index']
+        trace(f"Container {i} text: {record['preview']}...")
+        if not record['hasToday']:
+            continue
+        trace(f"Found job container {i} with 'Today'")
+
+        if record['title'] is not None:
+            job_title = clean_job_title(record['title'])
+            if not (job_title and len(job_title) > 5):
+                trace(f"Job title too short or empty in container {i}")
+                continue
+            if job_title in seen_jobs:
+                trace(f"Duplicate job found, skipping: {job_title}")
+                continue
+            seen_jobs.add(job_title)
+
+            job_info = {
+                'title': job_title,
+                'updated_date': 'Today',
+                'location': LOCATION_MATCHER.first_matching(record['spans']),
+                'work_arrangement': ARRANGEMENT_MATCHER.first_matching(record['spans']),
+                'element_text': f"Found in container {i}"
+            }
+            if record['link']:
+                job_info['link'] = record['link']
+                job_id = link_job_id(record['link'])
+                if job_id:
+                    job_info['job_id'] = job_id
+            todays_jobs.append(job_info)
+            print(f"Found job updated today: {job_title} - {job_info['location']} - {job_info['work_arrangement']}")
+            continue
+
+        trace(f"Could not find {JOB_TITLE_SELECTOR} element in container {i}")
+        for selector, raw_title in record['altTitles']:
+            job_title = clean_job_title(raw_title)
+            if not (job_title and len(job_title) > 5 and len(job_title) < 200):
+                continue
+            if SKIP_TITLE_MATCHER.search(job_title):
+                continue
+            if job_title in seen_jobs:
+                trace(f"Duplicate job found (alt selector), skipping: {job_title}")
+                break
+            seen_jobs.add(job_title)
+
+            job_info = {
+                'title': job_title,
+                'updated_date': 'Today',
+                'location': 'Unknown',
+                'work_arrangement': 'Unknown',
+                'element_text': f"Found in container {i} with selector {selector}"
+            }
+            if record['link']:
+                job_info['link'] = record['link']
+                job_id = link_job_id(record['link'])
+                if job_id:
+                    job_info['job_id'] = job_id
+            todays_jobs.append(job_info)
+            print(f"Found job updated today (alt selector): {job_title}")
+            break
+    return todays_jobs
+
+def jobs_from_container_records(records, seen_jobs, stats):
+    """Turn the result of EXTRACT_CONTAINERS_JS into job dicts and update stats"""
+    print(f"Found {len(records)} job containers with ms-Stack css-490")
+
+    legacy_estimate = 1 + sum(_legacy_roundtrip_estimate(record) for record in records)
+    stats['containers'] = stats.get('containers', 0) + len(records)
+    stats['roundtrips'] = stats.get('roundtrips', 0) + 1
+    stats['roundtrips_saved'] = stats.get('roundtrips_saved', 0) + legacy_estimate - 1
+    print(f"⚡ Single-roundtrip extraction: 1 call instead of ~{legacy_estimate} (saved {legacy_estimate - 1})")
+
+    return _jobs_from_container_records(records, seen_jobs)
+
+def _extract_containers_evaluate(page, seen_jobs, stats):
+    """Extract today's jobs from all containers with a single page.evaluate call"""
+    records = page.evaluate(EXTRACT_CONTAINERS_JS, EXTRACT_CONTAINERS_ARGS)
+    return jobs_from_container_records(records, seen_jobs, stats)
+
+def page_url(url, page_number):
+    """Return the search URL pointing at the given result page"""
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if 'pg' not in dict(params):
+        params.append(('pg', '1'))
+    params = [(key, str(page_number) if key == 'pg' else value) for key, value in params]
+    return urlunsplit(parts._replace(query=urlencode(params, quote_via=quote)))
+
+def iter_container_pages(page, url, max_pages=None, stats=None):
+    """Yield the container records of each result page, starting with the loaded one
+
+    Results are sorted by Recent, so the crawl stops at the first page whose
+    last entry is not from "Today". While a page is being parsed the next one
+    is already loading in a spare tab.
+    """
+    max_pages = max_pages or MAX_PAGES
+    if stats is None:
+        stats = {}
+    query = dict(parse_qsl(urlsplit(url).query))
+    page_size = int(query.get('pgSz', '20'))
+    first_page = int(query.get('pg', '1'))
+    
+    spare_tabs = []
+    current = page
+    try:
+        for crawled in range(max_pages):
+            if crawled > 0:
+                try:
+                    current.wait_for_selector(JOB_CONTAINER_SELECTOR, state="attached", timeout=PAGE_READY_TIMEOUT_MS)
+                except Exception:
+                    print(f"No job containers on result page {first_page + crawled}, stopping crawl")
+                    return
+            records = current.evaluate(EXTRACT_CONTAINERS_JS, EXTRACT_CONTAINERS_ARGS)
+            stats['pages_crawled'] = stats.get('pages_crawled', 0) + 1
+            
+            more_pages = (
+                crawled + 1 < max_pages
+                and len(records) >= page_size
+                and records[-1]['hasToday']
+            )
+            if more_pages:
+                # Prefetch the next page in a spare tab; "commit" returns as soon as navigation starts
+                if len(spare_tabs) < 2:
+                    spare_tabs.append(page.context.new_page())
+                current = spare_tabs[crawled % 2]
+                navigate(current, page_url(url, first_page + crawled + 1), timeout=60000, wait_until="commit")
+            
+            yield records
+            
+            if not more_pages:
+                return
+    finally:
+        for tab in spare_tabs:
+            tab.close()
+
+def _extract_containers_paginated(page, url, seen_jobs, stats):
+    """Extract today's jobs from every result page that can still contain them"""
+    todays_jobs = []
+    for records in iter_container_pages(page, url, stats=stats):
+        todays_jobs.extend(jobs_from_container_records(records, seen_jobs, stats))
+    print(f"Crawled {stats.get('pages_crawled', 0)} result page(s)")
+    return todays_jobs
+
+def _extract_containers_legacy(page, seen_jobs, stats):
+    """Extract today's jobs by querying each container element individually"""
+    # Find all job elements using the specific structure provided
+    # Looking for the ms-Stack css-490 div that contains job information
+    job_containers = page.query_selector_all(JOB_CONTAINER_SELECTOR)
+    print(f"Found {len(job_containers)} job containers with ms-Stack css-490")
+    stats['containers'] = len(job_containers)
+    
+    todays_jobs = []
+    
+    for i, container in enumerate(job_containers):
+        try:
+            container_text = container.inner_text()
+            trace(f"Container {i} text: {container_text[:200]}...")
+            
+            # Check if this container has "Today" in it
+            if "Today" in container_text:
+                trace(f"Found job container {i} with 'Today'")
+                
+                # Look for job title in h2 element with class MZGzlrn8gfgSs8TZHhv2
+                title_element = container.query_selector(JOB_TITLE_SELECTOR)
+                if title_element:
+                    job_title = title_element.inner_text().strip()
+                    # Clean up the title (remove &nbsp; and extra whitespace)
+                    job_title = re.sub(r'&nbsp;', ' ', job_title)
+                    job_title = re.sub(r'\s+', ' ', job_title).strip()
+                    
+                    if job_title and len(job_title) > 5:
+                        # Check for duplicates
+                        if job_title in seen_jobs:
+                            trace(f"Duplicate job found, skipping: {job_title}")
+                            continue
+                        
+                        seen_jobs.add(job_title)
+                        
+                        # Extract location and work arrangement info
+                        location = "Unknown"
+                        work_arrangement = "Unknown"
+                        
+                        # Look for location info
+                        location_elements = container.query_selector_all('span')
+                        for span in location_elements:
+                            span_text = span.inner_text().strip()
+                            if LOCATION_MATCHER.search(span_text):
+                                location = span_text
+                                break
+                        
+                        # Look for work arrangement info
+                        for span in location_elements:
+                            span_text = span.inner_text().strip()
+                            if ARRANGEMENT_MATCHER.search(span_text):
+                                work_arrangement = span_text
+                                break
+                        
+                        job_info = {
+                            'title': job_title,
+                            'updated_date': 'Today',
+                            'location': location,
+                            'work_arrangement': work_arrangement,
+                            'element_text': f"Found in container {i}"
+                        }
+                        todays_jobs.append(job_info)
+                        print(f"Found job updated today: {job_title} - {location} - {work_arrangement}")
+                    else:
+                        trace(f"Job title too short or empty in container {i}")
+                else:
+                    trace(f"Could not find {JOB_TITLE_SELECTOR} element in container {i}")
+                    
+                    # Try alternative selectors for job title
+                    for selector in ALT_TITLE_SELECTORS:
+                        title_element = container.query_selector(selector)
+                        if title_element:
+                            job_title = title_element.inner_text().strip()
+                            job_title = re.sub(r'&nbsp;', ' ', job_title)
+                            job_title = re.sub(r'\s+', ' ', job_title).strip()
+                            
+                            if job_title and len(job_title) > 5 and len(job_title) < 200:
+                                # Filter out common non-job elements
+                                if not SKIP_TITLE_MATCHER.search(job_title):
+                                    # Check for duplicates
+                                    if job_title in seen_jobs:
+                                        trace(f"Duplicate job found (alt selector), skipping: {job_title}")
+                                        break
+                                    
+                                    seen_jobs.add(job_title)
+                                    
+                                    job_info = {
+                                        'title': job_title,
+                                        'updated_date': 'Today',
+                                        'location': 'Unknown',
+                                        'work_arrangement': 'Unknown',
+                                        'element_text': f"Found in container {i} with selector {selector}"
+                                    }
+                                    todays_jobs.append(job_info)
+                                    print(f"Found job updated today (alt selector): {job_title}")
+                                    break
+                    
+        except Exception as e:
+            print(f"Error processing container {i}: {str(e)}")
+            continue
+    
+    return todays_jobs
+
+def _broader_search_legacy(page, seen_jobs, stats):
+    """Scan every element on the page for "Today" and walk up to a job title"""
+    todays_jobs = []
+    deadline = time.monotonic() + FALLBACK_TIME_BUDGET_MS / 1000
+    # Look for any elements containing "Today"
+    today_elements = page.query_selector_all('*')
+    for element in today_elements:
+        if time.monotonic() > deadline:
+            print(f"⏱️ Broader search stopped after {FALLBACK_TIME_BUDGET_MS}ms budget")
+            stats['fallback_timed_out'] = True
+            break
+        try:
+            text = element.inner_text().strip()
+            if "Today" in text and len(text) < 1000:  # Avoid very large text blocks
+                # Look for job title in nearby elements
+                parent = element
+                for level in range(10):
+                    if parent is None:
+                        break
+                    
+                    # Look for job title in current element and descendants
+                    title_selectors = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a[href*="/jobs/"]']
+                    
+                    for selector in title_selectors:
+                        title_element = parent.query_selector(selector)
+                        if title_element:
+                            job_title = title_element.inner_text().strip()
+                            job_title = re.sub(r'&nbsp;', ' ', job_title)
+                            job_title = re.sub(r'\s+', ' ', job_title).strip()
+                            
+                            if job_title and len(job_title) > 5 and len(job_title) < 200:
+                                if not FALLBACK_SKIP_MATCHER.search(job_title):
+                                    # Check for duplicates
+                                    if job_title in seen_jobs:
+                                        trace(f"Duplicate job found (broader search), skipping: {job_title}")
+                                        break
+                                    
+                                    seen_jobs.add(job_title)
+                                    
+                                    job_info = {
+                                        'title': job_title,
+                                        'updated_date': 'Today',
+                                        'location': 'Unknown',
+                                        'work_arrangement': 'Unknown',
+                                        'element_text': f"Found via broader search at level {level}"
+                                    }
+                                    todays_jobs.append(job_info)
+                                    print(f"Found job via broader search: {job_title}")
+                                    break
+                    
+                    if job_title:
+                        break
+                        
+                    parent = parent.evaluate('el => el.parentElement')
+                    
+        except Exception as e:
+            continue
+    
+    return todays_jobs
 
-SCREENSHOT_PATH = "career_page_screenshot.png"
-KNOWN_TODAYS_JOBS_FILE = "known_todays_jobs.json"  # Track jobs updated today
+def jobs_from_fallback_result(result, seen_jobs, stats):
+    """Turn the result of FIND_TODAY_TITLES_JS into deduplicated job dicts"""
+    stats['roundtrips'] = stats.get('roundtrips', 0) + 1
+    stats['fallback_timed_out'] = result['timedOut']
+    print(f"Broader search scanned {result['scanned']} 'Today' text nodes in {result['elapsedMs']}ms")
+    if result['timedOut']:
+        print(f"⏱️ Broader search stopped after {FALLBACK_TIME_BUDGET_MS}ms budget")
+    
+    todays_jobs = []
+    for candidate in result['candidates']:
+        job_title = clean_job_title(candidate['title'])
+        if job_title in seen_jobs:
+            trace(f"Duplicate job found (broader search), skipping: {job_title}")
+            continue
+        seen_jobs.add(job_title)
+        
+        todays_jobs.append({
+            'title': job_title,
+            'updated_date': 'Today',
+            'location': 'Unknown',
+            'work_arrangement': 'Unknown',
+            'element_text': f"Found via broader search at level {candidate['level']}"
+        })
+        print(f"Found job via broader search: {job_title}")
+    return todays_jobs
+
+def _broader_search_indexed(page, seen_jobs, stats):
+    """Resolve "Today" entries to job titles in-page and dedup the candidates"""
+    result = page.evaluate(FIND_TODAY_TITLES_JS, FIND_TODAY_TITLES_ARGS)
+    return jobs_from_fallback_result(result, seen_jobs, stats)
 
-# Email configuration (will be set via environment variables in GitHub Actions)
-SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
-SENDER_EMAIL = os.getenv('SENDER_EMAIL', '')
-SENDER_PASSWORD = os.getenv('SENDER_PASSWORD', '')
-RECIPIENT_EMAILS = os.getenv('RECIPIENT_EMAILS', '')  # Comma-separated list of emails
+def extract_todays_jobs(page, mode=None, stats=None, url=None):
+    """Extract jobs that were updated today from the Microsoft career page
 
-def extract_todays_jobs(page):
-    """Extract jobs that were updated today from the Microsoft career page"""
+    mode selects the container engine ('evaluate' or 'legacy', defaults to
+    EXTRACTION_MODE). Pass a dict as stats to collect container and roundtrip
+    counts for the run. When the search url is given, the evaluate engine
+    also crawls the following result pages while they still list "Today" jobs.
+    """
+    mode = mode or EXTRACTION_MODE
+    if stats is None:
+        stats = {}
+    stats['mode'] = mode
     print("Extracting jobs updated today...")
     
     try:
@@ -43,383 +603,725 @@ def extract_todays_jobs(page):
         today = date.today()
         print(f"Looking for jobs updated today: {today.strftime('%Y-%m-%d')}")
         
-        # Find all job elements using the specific structure provided
-        # Looking for the ms-Stack css-490 div that contains job information
-        job_containers = page.query_selector_all('div.ms-Stack.css-490')
-        print(f"Found {len(job_containers)} job containers with ms-Stack css-490")
-        
-        todays_jobs = []
         seen_jobs = set()  # Track unique jobs to avoid duplicates
         
-        for i, container in enumerate(job_containers):
-            try:
-                container_text = container.inner_text()
-                print(f"Container {i} text: {container_text[:200]}...")
-                
-                # Check if this container has "Today" in it
-                if "Today" in container_text:
-                    print(f"Found job container {i} with 'Today'")
-                    
-                    # Look for job title in h2 element with class MZGzlrn8gfgSs8TZHhv2
-                    title_element = container.query_selector('h2.MZGzlrn8gfgSs8TZHhv2')
-                    if title_element:
-                        job_title = title_element.inner_text().strip()
-                        # Clean up the title (remove &nbsp; and extra whitespace)
-                        job_title = re.sub(r'&nbsp;', ' ', job_title)
-                        job_title = re.sub(r'\s+', ' ', job_title).strip()
-                        
-                        if job_title and len(job_title) > 5:
-                            # Check for duplicates
-                            if job_title in seen_jobs:
-                                print(f"Duplicate job found, skipping: {job_title}")
-                                continue
-                            
-                            seen_jobs.add(job_title)
-                            
-                            # Extract location and work arrangement info
-                            location = "Unknown"
-                            work_arrangement = "Unknown"
-                            
-                            # Look for location info
-                            location_elements = container.query_selector_all('span')
-                            for span in location_elements:
-                                span_text = span.inner_text().strip()
-                                if any(city in span_text for city in ['Redmond', 'Seattle', 'Washington', 'United States', 'Remote', 'Hybrid']):
-                                    location = span_text
-                                    break
-                            
-                            # Look for work arrangement info
-                            for span in location_elements:
-                                span_text = span.inner_text().strip()
-                                if any(arrangement in span_text for arrangement in ['days / week', 'in-office', 'remote', 'hybrid']):
-                                    work_arrangement = span_text
-                                    break
-                            
-                            job_info = {
-                                'title': job_title,
-                                'updated_date': 'Today',
-                                'location': location,
-                                'work_arrangement': work_arrangement,
-                                'element_text': f"Found in container {i}"
-                            }
-                            todays_jobs.append(job_info)
-                            print(f"Found job updated today: {job_title} - {location} - {work_arrangement}")
-                        else:
-                            print(f"Job title too short or empty in container {i}")
-                    else:
-                        print(f"Could not find h2.MZGzlrn8gfgSs8TZHhv2 element in container {i}")
-                        
-                        # Try alternative selectors for job title
-                        alt_title_selectors = [
-                            'h2[class*="MZGzlrn8gfgSs8TZHhv2"]',
-                            'h2',
-                            'h1',
-                            'h3',
-                            '[class*="title"]',
-                            'a[href*="/jobs/"]'
-                        ]
-                        
-                        for selector in alt_title_selectors:
-                            title_element = container.query_selector(selector)
-                            if title_element:
-                                job_title = title_element.inner_text().strip()
-                                job_title = re.sub(r'&nbsp;', ' ', job_title)
-                                job_title = re.sub(r'\s+', ' ', job_title).strip()
-                                
-                                if job_title and len(job_title) > 5 and len(job_title) < 200:
-                                    # Filter out common non-job elements
-                                    if not any(skip in job_title.lower() for skip in ['search', 'filter', 'sort', 'apply', 'browse', 'view all', 'microsoft', 'careers']):
-                                        # Check for duplicates
-                                        if job_title in seen_jobs:
-                                            print(f"Duplicate job found (alt selector), skipping: {job_title}")
-                                            break
-                                        
-                                        seen_jobs.add(job_title)
-                                        
-                                        job_info = {
-                                            'title': job_title,
-                                            'updated_date': 'Today',
-                                            'location': 'Unknown',
-                                            'work_arrangement': 'Unknown',
-                                            'element_text': f"Found in container {i} with selector {selector}"
-                                        }
-                                        todays_jobs.append(job_info)
-                                        print(f"Found job updated today (alt selector): {job_title}")
-                                        break
-                        
-            except Exception as e:
-                print(f"Error processing container {i}: {str(e)}")
-                continue
+        if mode == 'legacy':
+            todays_jobs = _extract_containers_legacy(page, seen_jobs, stats)
+        elif url and MAX_PAGES > 1:
+            todays_jobs = _extract_containers_paginated(page, url, seen_jobs, stats)
+        else:
+            todays_jobs = _extract_containers_evaluate(page, seen_jobs, stats)
         
         # If we didn't find any jobs with the specific structure, try a broader search
+        stats['fallback_used'] = not todays_jobs
         if not todays_jobs:
             print("Specific structure not found, trying broader search...")
-            
-            # Look for any elements containing "Today"
-            today_elements = page.query_selector_all('*')
-            for element in today_elements:
-                try:
-                    text = element.inner_text().strip()
-                    if "Today" in text and len(text) < 1000:  # Avoid very large text blocks
-                        # Look for job title in nearby elements
-                        parent = element
-                        for level in range(10):
-                            if parent is None:
-                                break
-                            
-                            # Look for job title in current element and descendants
-                            title_selectors = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a[href*="/jobs/"]']
-                            
-                            for selector in title_selectors:
-                                title_element = parent.query_selector(selector)
-                                if title_element:
-                                    job_title = title_element.inner_text().strip()
-                                    job_title = re.sub(r'&nbsp;', ' ', job_title)
-                                    job_title = re.sub(r'\s+', ' ', job_title).strip()
-                                    
-                                    if job_title and len(job_title) > 5 and len(job_title) < 200:
-                                        if not any(skip in job_title.lower() for skip in ['search', 'filter', 'sort', 'apply', 'browse', 'view all', 'microsoft', 'careers', 'today', 'yesterday']):
-                                            # Check for duplicates
-                                            if job_title in seen_jobs:
-                                                print(f"Duplicate job found (broader search), skipping: {job_title}")
-                                                break
-                                            
-                                            seen_jobs.add(job_title)
-                                            
-                                            job_info = {
-                                                'title': job_title,
-                                                'updated_date': 'Today',
-                                                'location': 'Unknown',
-                                                'work_arrangement': 'Unknown',
-                                                'element_text': f"Found via broader search at level {level}"
-                                            }
-                                            todays_jobs.append(job_info)
-                                            print(f"Found job via broader search: {job_title}")
-                                            break
-                            
-                            if job_title:
-                                break
-                                
-                            parent = parent.evaluate('el => el.parentElement')
-                            
-                except Exception as e:
-                    continue
+            if mode == 'legacy':
+                todays_jobs = _broader_search_legacy(page, seen_jobs, stats)
+            else:
+                todays_jobs = _broader_search_indexed(page, seen_jobs, stats)
         
         print(f"Found {len(todays_jobs)} jobs updated today")
         return todays_jobs
         
     except Exception as e:
         print(f"Error extracting today's jobs: {str(e)}")
+        stats['error'] = str(e)
         return []
 
-def load_known_todays_jobs():
-    """Load previously known today's jobs from JSON file"""
+def page_fingerprint(page, capture):
+    """Fingerprint the current job list (search payload in network mode, DOM otherwise)"""
+    if capture.responses:
+        try:
+            return fingerprint_search_payload(capture.responses[-1].json(), date.today())
+        except Exception as e:
+            print(f"Error fingerprinting search API payload: {str(e)}")
+    try:
+        dom_fingerprint = page.evaluate(FINGERPRINT_JS, [JOB_CONTAINER_SELECTOR, JOB_TITLE_SELECTOR])
+    except Exception as e:
+        print(f"Error fingerprinting job list: {str(e)}")
+        return None
+    # An empty list (e.g. the fallback layout) is not a reliable fingerprint
+    if dom_fingerprint.startswith('0:'):
+        return None
+    return f"{date.today().isoformat()}:{dom_fingerprint}"
+
+def should_block_request(resource_type, url):
+    """Return True for resources the job list does not need to render"""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(url).hostname or ''
+    return any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_HOSTS)
+
+def apply_navigation_profile(target):
+    """Route away non-essential requests on a page or browser context"""
+    if NAVIGATION_PROFILE != 'fast':
+        return
+    
+    def handle_route(route):
+        request = route.request
+        if should_block_request(request.resource_type, request.url):
+            route.abort()
+        else:
+            route.continue_()
+    
+    target.route("**/*", handle_route)
+
+def navigate(page, url, **kwargs):
+    """page.goto through the shared per-host rate limiter
+
+    The response status (429, 5xx) or a navigation timeout feeds the
+    limiter's backoff for the host.
+    """
+    limiter = shared_limiter()
+    if limiter is None:
+        return page.goto(url, **kwargs)
+    limiter.wait(url)
     try:
-        if os.path.exists(KNOWN_TODAYS_JOBS_FILE):
-            with open(KNOWN_TODAYS_JOBS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
+        response = page.goto(url, **kwargs)
     except Exception as e:
-        print(f"Error loading known today's jobs: {str(e)}")
-        return {}
+        limiter.record(url, error=e)
+        raise
+    if response is not None:
+        limiter.record(url, response.status, retry_after=response.headers.get('retry-after'))
+    return response
+
+def wait_for_page_ready(page):
+    """Wait for the job list (or network idle) instead of a fixed sleep
+
+    Returns what ended the wait: 'selector', 'networkidle', 'timeout' or 'sleep'.
+    """
+    if NAVIGATION_PROFILE != 'fast':
+        page.wait_for_timeout(5000)
+        return 'sleep'
+    try:
+        page.wait_for_selector(JOB_CONTAINER_SELECTOR, state="attached", timeout=PAGE_READY_TIMEOUT_MS)
+        return 'selector'
+    except Exception:
+        pass
+    try:
+        page.wait_for_load_state("networkidle", timeout=NETWORK_IDLE_TIMEOUT_MS)
+        return 'networkidle'
+    except Exception:
+        return 'timeout'
+
+def record_load_latency(source_key, timings):
+    """Append one source's page load timings to LOAD_LATENCY_FILE"""
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'source': source_key,
+        'profile': NAVIGATION_PROFILE,
+        **timings
+    }
+    print(f"⏱️ Load latency: goto {timings['goto_ms']}ms, ready {timings['ready_ms']}ms ({timings['ready_by']})")
+    try:
+        with open(LOAD_LATENCY_FILE, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        print(f"Error recording load latency: {str(e)}")
+
+class SearchPayloadCapture:
+    """Collect the careers search API responses a page receives while active"""
+    
+    def __init__(self, page, enabled=True):
+        self.page = page
+        self.enabled = enabled
+        self.responses = []
+    
+    def _on_response(self, response):
+        if is_search_api_url(response.url) and response.ok:
+            self.responses.append(response)
+    
+    def __enter__(self):
+        if self.enabled:
+            self.page.on("response", self._on_response)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            self.page.remove_listener("response", self._on_response)
+    
+    def wait(self, timeout_ms):
+        """Wait until a search payload has arrived or the timeout expires"""
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not self.responses and time.monotonic() < deadline:
+            self.page.wait_for_timeout(100)
+        return bool(self.responses)
+
+def extract_todays_jobs_from_api(page, capture, stats=None):
+    """Build today's jobs from captured search API payloads
+
+    Returns None when no payload was seen so the caller can fall back to DOM
+    extraction. Further result pages are requested from the API directly
+    while the Recent-sorted results are still from today.
+    """
+    if stats is None:
+        stats = {}
+    stats['mode'] = 'network'
+    if not capture.responses:
+        return None
+    
+    # The last search response is the one the page ended up rendering
+    response = capture.responses[-1]
+    try:
+        payload = response.json()
+    except Exception as e:
+        print(f"Error reading search API payload: {str(e)}")
+        return None
+    
+    def fetch_json(url):
+        next_response = page.request.get(url, timeout=PAGE_READY_TIMEOUT_MS)
+        if not next_response.ok:
+            print(f"Search API returned {next_response.status}, stopping crawl")
+            return None
+        return next_response.json()
+    
+    return jobs_from_search_pages(payload, response.url, fetch_json, stats)
+
+def jobs_from_search_pages(payload, url, fetch_json, stats):
+    """Collect today's jobs from a search payload and the result pages after it
+
+    fetch_json(url) returns the payload of a further result page (None stops
+    the crawl); pages are requested while the Recent-sorted results are still
+    from today.
+    """
+    query = dict(parse_qsl(urlsplit(url).query))
+    first_page = int(query.get('pg', '1'))
+    page_size = int(query.get('pgSz', '20'))
+    
+    seen_jobs = set()
+    todays_jobs = []
+    for crawled in range(MAX_PAGES):
+        if crawled > 0:
+            payload = fetch_json(page_url(url, first_page + crawled))
+            if payload is None:
+                break
+        page_jobs, entry_count, last_is_today = jobs_from_search_payload(payload, seen_jobs)
+        todays_jobs.extend(page_jobs)
+        stats['pages_crawled'] = stats.get('pages_crawled', 0) + 1
+        stats['containers'] = stats.get('containers', 0) + entry_count
+        stats['roundtrips'] = stats.get('roundtrips', 0) + 1
+        if not (last_is_today and entry_count >= page_size):
+            break
+    else:
+        print(f"⚠️ Still finding today's jobs after {MAX_PAGES} pages; raise MAX_PAGES to see the rest")
+    
+    print(f"Found {len(todays_jobs)} jobs updated today in {stats['pages_crawled']} search API payload(s)")
+    return todays_jobs
+
+def load_known_todays_jobs():
+    """Load previously known today's jobs from JSON file"""
+    return load_json_state(KNOWN_TODAYS_JOBS_FILE)
 
 def save_todays_jobs(todays_jobs):
     """Save today's jobs to JSON file"""
     try:
-        with open(KNOWN_TODAYS_JOBS_FILE, 'w') as f:
-            json.dump(todays_jobs, f, indent=2)
+        save_json_state(KNOWN_TODAYS_JOBS_FILE, todays_jobs)
         print(f"Saved today's jobs to {KNOWN_TODAYS_JOBS_FILE}")
     except Exception as e:
         print(f"Error saving today's jobs: {str(e)}")
 
+def new_job_entry(job):
+    """Build the alert entry for a job that was not seen before"""
+    entry = {
+        'action': 'new',
+        'job_title': job['title'],
+        'updated_date': job['updated_date'],
+        'location': job.get('location', 'Unknown'),
+        'work_arrangement': job.get('work_arrangement', 'Unknown')
+    }
+    for optional in ('job_id', 'link'):
+        if job.get(optional):
+            entry[optional] = job[optional]
+    return entry
+
 def compare_todays_jobs(current_jobs, previous_jobs, source_name):
     """Compare current and previous today's jobs and return new jobs"""
-    new_jobs = []
-    
-    if not previous_jobs:
-        # First run - all jobs are new
-        for job in current_jobs:
-            new_jobs.append({
-                'action': 'new',
-                'job_title': job['title'],
-                'updated_date': job['updated_date'],
-                'location': job.get('location', 'Unknown'),
-                'work_arrangement': job.get('work_arrangement', 'Unknown')
-            })
-        return new_jobs
-    
-    # Get previous job titles for comparison
-    previous_titles = [job['title'] for job in previous_jobs]
-    
-    # Check for new jobs
-    for job in current_jobs:
-        if job['title'] not in previous_titles:
-            new_jobs.append({
-                'action': 'new',
-                'job_title': job['title'],
-                'updated_date': job['updated_date'],
-                'location': job.get('location', 'Unknown'),
-                'work_arrangement': job.get('work_arrangement', 'Unknown')
-            })
+    # First run (no previous jobs) - all jobs are new
+    previous_titles = {job['title'] for job in previous_jobs}
+    return [new_job_entry(job) for job in current_jobs if job['title'] not in previous_titles]
+
+# Relevance filters per source key, compiled on first use
+_relevance_filters = {}
+
+def relevance_filter(source_key):
+    """Return the compiled relevance filter for a source (see keyword_matcher.py)"""
+    if source_key not in _relevance_filters:
+        _relevance_filters[source_key] = RelevanceFilter.from_config(TARGET_URLS.get(source_key))
+    return _relevance_filters[source_key]
+
+def find_new_jobs(store, source_key, current_jobs):
+    """Return alert entries for the jobs the state store has not seen for a source
+
+    Unseen jobs that the source's relevance filter rejects are still stored
+    with the rest of the run, just never alerted on.
+    """
+    unseen = store.unseen_jobs(source_key, current_jobs)
+    relevance = relevance_filter(source_key)
+    if relevance.active:
+        scored, dropped = relevance.filter(unseen)
+        if relevance.include.keywords:
+            scored.sort(key=lambda pair: pair[1], reverse=True)  # Most relevant first in the alert
+        if dropped:
+            print(f"🎯 Relevance filter kept {len(scored)} of {len(unseen)} new job(s)")
+            for job in dropped:
+                trace(f"Not relevant, not alerting: {job['title']}")
+            instrumentation.incr('jobs_not_relevant', len(dropped))
+    else:
+        scored = [(job, None) for job in unseen]
     
+    new_jobs = []
+    for job, score in scored:
+        entry = new_job_entry(job)
+        entry['source'] = source_key
+        if score is not None and relevance.include.keywords:
+            entry['relevance'] = score
+        new_jobs.append(entry)
     return new_jobs
 
 def send_email_alert(new_jobs, source_name, source_url):
     """Send email alert when new jobs updated today are found"""
-    if not all([SENDER_EMAIL, SENDER_PASSWORD, RECIPIENT_EMAILS]):
+    notifier = Notifier()
+    if not notifier.is_configured():
         print("Email configuration incomplete. Skipping email alert.")
         return False
     
-    # Parse recipient emails (comma-separated)
-    recipient_list = [email.strip() for email in RECIPIENT_EMAILS.split(',') if email.strip()]
-    if not recipient_list:
-        print("No valid recipient emails found. Skipping email alert.")
-        return False
-    
     if not new_jobs:
         print("No new jobs found. Skipping email alert.")
         return False
     
     try:
-        # Create personalized subject
-        job_count = len(new_jobs)
-        if job_count == 1:
-            subject = f"🚨 Microsoft: 1 new job updated today!"
-        else:
-            subject = f"🚨 Microsoft: {job_count} new jobs updated today!"
+        return notifier.send_now([{'source_name': source_name, 'source_url': source_url, 'jobs': new_jobs}])
+    finally:
+        notifier.close()
+
+def monitor_source(page, source_key, config, store):
+    """Visit one job source and return its current and new jobs updated today"""
+    print(f"\n--- Monitoring {config['name']} ---")
+    print(f"URL: {config['url']}")
+    
+    with SearchPayloadCapture(page, enabled=EXTRACTION_MODE == 'network') as capture:
+        # Navigate to the URL with longer timeout and different wait strategy
+        print("Navigating to Microsoft careers page...")
+        started = time.monotonic()
+        with instrumentation.span('navigation', source=source_key):
+            navigate(page, config['url'], timeout=60000, wait_until="domcontentloaded")
+        navigated = time.monotonic()
         
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = ', '.join(recipient_list)
-        msg['Subject'] = subject
+        # Wait for dynamic content (or just for the search payload)
+        with instrumentation.span('wait', source=source_key):
+            if EXTRACTION_MODE == 'network' and capture.wait(PAGE_READY_TIMEOUT_MS):
+                ready_by = 'payload'
+            else:
+                ready_by = wait_for_page_ready(page)
+        ready = time.monotonic()
+    
+    record_load_latency(source_key, {
+        'goto_ms': round((navigated - started) * 1000),
+        'ready_ms': round((ready - navigated) * 1000),
+        'total_ms': round((ready - started) * 1000),
+        'ready_by': ready_by
+    })
+    
+    # Short-circuit when the job list is the same as last run
+    with instrumentation.span('fingerprint', source=source_key):
+        fingerprint = page_fingerprint(page, capture) if PAGE_FINGERPRINTING else None
+    if fingerprint and fingerprint == store.get_fingerprint(source_key):
+        print(f"⚡ Job list unchanged since last run ({fingerprint}), skipping extraction")
+        instrumentation.incr('sources_unchanged')
+        store.keep(source_key)
+        return store.previous_jobs(source_key), []
+    
+    # Extract jobs updated today, preferring the search payload in network mode
+    stats = {}
+    current_jobs = None
+    with instrumentation.span('extraction', source=source_key):
+        if EXTRACTION_MODE == 'network':
+            current_jobs = extract_todays_jobs_from_api(page, capture, stats)
+            if current_jobs is None:
+                print("No search API payload seen, falling back to DOM extraction")
+        if current_jobs is None:
+            dom_mode = 'evaluate' if EXTRACTION_MODE == 'network' else EXTRACTION_MODE
+            current_jobs = extract_todays_jobs(page, mode=dom_mode, stats=stats, url=config['url'])
+    print(f"Found {len(current_jobs)} jobs updated today")
+    
+    # Screenshot, DOM and trace only when the visit looks wrong
+    capture_page(page, source_key, anomaly_reasons(source_key, stats, current_jobs), config['url'], stats)
+    return current_jobs, diff_source(store, source_key, current_jobs, stats, fingerprint)
+
+def diff_source(store, source_key, current_jobs, stats, fingerprint):
+    """Record a source's extraction stats, job count and fingerprint, and return its new jobs"""
+    record_extraction_stats(stats, current_jobs)
+    
+    if 'error' not in stats:
+        record_job_count(source_key, current_jobs)
+        if fingerprint:
+            store.set_fingerprint(source_key, fingerprint)
+    
+    # Compare with previously seen jobs
+    with instrumentation.span('diff', source=source_key):
+        new_jobs = find_new_jobs(store, source_key, current_jobs)
+    instrumentation.incr('new_jobs', len(new_jobs))
+    report_new_jobs(new_jobs)
+    return new_jobs
+
+def monitor_source_http(client, source_key, config, store):
+    """Read one source from its search API over plain HTTP
+
+    Returns (current jobs, new jobs), or None when the source has to go
+    through the browser.
+    """
+    results = monitor_query_http(client, config['url'], {source_key: (config, None)}, store)
+    return results.get(source_key) if results else None
+
+def monitor_query_http(client, url, members, store):
+    """Fetch one search query over HTTP and fan its jobs out to the sources it serves
+
+    members maps each source key to (config, filters); filters=None means the
+    query is exactly the source's own search, otherwise the fetched jobs are
+    filtered down to the source locally. Returns {source_key: (current jobs,
+    new jobs)}, or None when the API did not give a usable payload. Sources
+    whose answer looks wrong (see anomaly_reasons) are left out so the
+    browser re-checks them and can capture debug artifacts.
+    """
+    names = ', '.join(config['name'] for config, _ in members.values())
+    print(f"\n--- Monitoring {names} (HTTP) ---")
+    api_url = search_api_url(url)
+    instrumentation.incr('tier_http_attempts', len(members))
+    try:
+        with instrumentation.span('http_fetch'):
+            payload = client.get_json(api_url)
+    except Exception as e:
+        print(f"HTTP fast path failed: {str(e)}")
+        payload = None
+    if not payload_jobs(payload)[0]:
+        print("No usable search API payload over HTTP, escalating to the browser")
+        instrumentation.incr('tier_http_misses', len(members))
+        return None
+    instrumentation.incr('tier_http_hits', len(members))
+    
+    results = {}
+    fingerprint = fingerprint_search_payload(payload, date.today()) if PAGE_FINGERPRINTING else None
+    for source_key in members:
+        if fingerprint and fingerprint == store.get_fingerprint(source_key):
+            print(f"⚡ Job list unchanged since last run ({fingerprint}), skipping extraction")
+            instrumentation.incr('sources_unchanged')
+            store.keep(source_key)
+            results[source_key] = (store.previous_jobs(source_key), [])
+    pending = [source_key for source_key in members if source_key not in results]
+    if not pending:
+        return results
+    
+    def fetch_json(url):
+        try:
+            with instrumentation.span('http_fetch'):
+                return client.get_json(url)
+        except Exception as e:
+            print(f"Search API request failed, stopping crawl: {str(e)}")
+            return None
+    
+    stats = {'mode': 'http'}
+    with instrumentation.span('extraction'):
+        query_jobs = jobs_from_search_pages(payload, api_url, fetch_json, stats)
+    for source_key in pending:
+        config, filters = members[source_key]
+        current_jobs = query_jobs
+        if filters is not None:
+            current_jobs = [job for job in query_jobs if job_matches(job, filters)]
+            print(f"{config['name']}: {len(current_jobs)} of {len(query_jobs)} fetched jobs match its filters")
+        # The fetch counters belong to the query, so only the first source reports them
+        source_stats = stats if source_key == pending[0] else {'mode': 'http'}
+        reasons = anomaly_reasons(source_key, source_stats, current_jobs)
+        if reasons:
+            print(f"⚠️ {config['name']} over HTTP: {', '.join(reasons)}, re-checking in the browser")
+            instrumentation.incr('tier_http_anomalies')
+            continue
+        results[source_key] = (current_jobs, diff_source(store, source_key, current_jobs, source_stats, fingerprint))
+    return results
+
+def plan_source_queries(sources):
+    """Collapse overlapping sources into [(search url, members)] for monitor_query_http"""
+    filters = {source_key: source_filters(config) for source_key, config in sources.items()}
+    by_base = {}
+    for source_key, config in sources.items():
+        by_base.setdefault(base_signature(config['url']), {})[source_key] = filters[source_key]
+    plan = []
+    for query, source_keys in (group for base_filters in by_base.values() for group in plan_queries(base_filters)):
+        if len(source_keys) == 1:
+            plan.append((sources[source_keys[0]]['url'], {source_keys[0]: (sources[source_keys[0]], None)}))
+        else:
+            plan.append((
+                search_url(query, base_url=sources[source_keys[0]]['url']),
+                {source_key: (sources[source_key], filters[source_key]) for source_key in source_keys}
+            ))
+    saved = len(sources) - len(plan)
+    instrumentation.incr('fetches_planned', len(plan))
+    instrumentation.incr('fetches_saved', saved)
+    if saved:
+        print(f"🧭 Query plan: {len(plan)} fetch(es) cover {len(sources)} source(s), saving {saved}")
+    return plan
+
+def monitor_sources_http(sources, store):
+    """Fetch every source over HTTP with as few queries as possible
+
+    Overlapping sources are collapsed by the query planner. Returns the
+    results of the sources that answered; the rest need the browser.
+    """
+    from http_client import HttpClient
+    
+    current_todays_jobs = {}
+    all_new_jobs = []
+    with HttpClient() as client:
+        for url, members in plan_source_queries(sources):
+            try:
+                results = monitor_query_http(client, url, members, store)
+            except Exception as e:
+                print(f"Error monitoring {', '.join(members)} over HTTP: {str(e)}")
+                instrumentation.incr('tier_http_misses', len(members))
+                results = None
+            for source_key, (current_jobs, new_jobs) in (results or {}).items():
+                current_todays_jobs[source_key] = current_jobs
+                all_new_jobs.extend(new_jobs)
+    return current_todays_jobs, all_new_jobs
+
+def report_fetch_tiers(metrics):
+    """Print how many sources each fetch tier served and how long it took"""
+    counters = metrics.counters
+    attempts = counters.get('tier_http_attempts', 0)
+    browser_sources = counters.get('tier_browser_sources', 0)
+    if not attempts and not browser_sources:
+        return
+    parts = []
+    if attempts:
+        hits = counters.get('tier_http_hits', 0)
+        parts.append(f"http {hits}/{attempts} hit ({hits / attempts:.0%}, {metrics.phase_seconds.get('http_fetch', 0.0):.2f}s)")
+    parts.append(f"browser {browser_sources} source(s) ({metrics.phase_seconds.get('browser_tier', 0.0):.2f}s)")
+    print(f"📶 Fetch tiers: {', '.join(parts)}")
+
+def record_extraction_stats(stats, jobs):
+    """Add one source's extraction stats to the run counters"""
+    instrumentation.incr('jobs_found', len(jobs))
+    instrumentation.incr('containers_scanned', stats.get('containers', 0))
+    instrumentation.incr('ipc_calls', stats.get('roundtrips', 0))
+    instrumentation.incr('ipc_calls_saved', stats.get('roundtrips_saved', 0))
+    instrumentation.incr('pages_crawled', stats.get('pages_crawled', 0))
+    if stats.get('fallback_used'):
+        instrumentation.incr('fallback_used')
+
+def report_new_jobs(new_jobs):
+    """Print the new jobs detected for a source"""
+    if new_jobs:
+        print(f"New jobs detected: {len(new_jobs)} new jobs")
+        for job in new_jobs:
+            print(f"  🆕 New: {job['job_title']}")
+    else:
+        print("No new jobs updated today")
+
+def monitor_sources_in_context(context, sources, store):
+    """Visit every source in turn on a single page of the given browser context"""
+    current_todays_jobs = {}
+    all_new_jobs = []
+    page = context.new_page()
+    
+    try:
+        # Monitor each URL
+        for source_key, config in sources.items():
+            start_trace(context)
+            try:
+                current_jobs, new_jobs = monitor_source(page, source_key, config, store)
+                current_todays_jobs[source_key] = current_jobs
+                all_new_jobs.extend(new_jobs)
+            except Exception as e:
+                print(f"Error monitoring {config['name']}: {str(e)}")
+                capture_page(page, source_key, anomaly_reasons(source_key, {}, [], error=e), config['url'])
+                continue
+            finally:
+                stop_trace(context)  # Discards the trace unless an anomaly saved it
+    finally:
+        page.close()
+    
+    return current_todays_jobs, all_new_jobs
+
+def monitor_sources(sources, store):
+    """Launch a browser and visit every source in turn on a single page"""
+    from playwright.sync_api import sync_playwright  # Only runs that need Chromium pay for this import
+    
+    with sync_playwright() as p:
+        # Launch browser
+        print("\nLaunching browser...")
+        started = time.monotonic()
+        with instrumentation.span('browser_launch'):
+            browser = p.chromium.launch(headless=True)  # Headless for GitHub Actions
+            context = browser.new_context()
+            apply_navigation_profile(context)
+        print(f"🌡️ Browser ready in {time.monotonic() - started:.2f}s (cold start)")
         
-        # Build personalized email body
-        body = "🎯 Microsoft Careers - Jobs Updated Today Alert\n"
-        body += "=" * 50 + "\n\n"
-        body += f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        body += f"📋 {source_name}\n"
-        body += f"📅 Updated: {date.today().strftime('%B %d, %Y')}\n\n"
+        results = monitor_sources_in_context(context, sources, store)
         
-        body += f"🎉 {job_count} new job(s) updated today!\n\n"
+        # Close browser
+        browser.close()
+    
+    return results
+
+# Summary of the most recent main() run, read by hourly_monitor
+last_run_stats = {}
+
+def main(context=None, notifier=None, sources=None, dry_run=False):
+    """Main function to monitor Microsoft job sources and send alerts
+
+    Pass an already running browser context (see warm_browser.WarmBrowser) to
+    skip launching a fresh Chromium for this run, and a long-lived Notifier to
+    send the alert in the background over its pooled SMTP session. sources
+    limits the run to some of TARGET_URLS; dry_run only reports the new jobs,
+    without sending an alert or updating the stored state.
+    """
+    sources = sources or TARGET_URLS
+    print("Starting Microsoft career monitoring system...")
+    print(f"Monitoring {len(sources)} job sources:")
+    for key, config in sources.items():
+        print(f"  • {config['name']}")
+    
+    metrics = instrumentation.start_run()
+    try:
+        # Open the store of previously seen jobs
+        store = open_job_store()
         
-        # List the new jobs
-        for i, job in enumerate(new_jobs, 1):
-            body += f"   {i}. {job['job_title']}\n"
-            body += f"      📅 Updated: {job['updated_date']}\n"
-            if job.get('location') != 'Unknown':
-                body += f"      📍 Location: {job['location']}\n"
-            if job.get('work_arrangement') != 'Unknown':
-                body += f"      🏢 Work: {job['work_arrangement']}\n"
-            body += "\n"
+        # Cheap tier first: sources whose search API answers over HTTP never need Chromium
+        # (shard workers try HTTP themselves)
+        sharded = SHARD_WORKERS > 1 and context is None and len(sources) > 1
+        if HTTP_FAST_PATH and not sharded:
+            current_todays_jobs, all_new_jobs = monitor_sources_http(sources, store)
+        else:
+            current_todays_jobs, all_new_jobs = {}, []
+        browser_sources = {key: config for key, config in sources.items() if key not in current_todays_jobs}
         
-        body += f"🔗 View all jobs: {source_url}\n\n"
-        body += "🤖 This is an automated alert from your Microsoft career monitoring system.\n"
-        body += "💡 Set up job alerts on Microsoft Careers for instant notifications!"
+        if not sharded:
+            instrumentation.incr('tier_browser_sources', len(browser_sources))
+        with instrumentation.span('browser_tier'):
+            if not browser_sources:
+                print("⚡ Every source answered over HTTP, skipping the browser")
+                browser_results = ({}, [])
+            elif sharded:
+                from sharded_monitor import monitor_sources_sharded
+                browser_results = monitor_sources_sharded(browser_sources, store, SHARD_WORKERS)
+            elif context is not None:
+                browser_results = monitor_sources_in_context(context, browser_sources, store)
+            elif CONCURRENT_SOURCES > 1 and len(browser_sources) > 1 and EXTRACTION_MODE == 'evaluate':
+                import asyncio
+                from async_monitor import monitor_sources_async
+                browser_results = asyncio.run(
+                    monitor_sources_async(browser_sources, store, CONCURRENT_SOURCES)
+                )
+            else:
+                if CONCURRENT_SOURCES > 1 and len(browser_sources) > 1:
+                    print(f"⚠️ EXTRACTION_MODE={EXTRACTION_MODE} is not supported by the concurrent monitor, "
+                          f"monitoring sources one at a time")
+                browser_results = monitor_sources(browser_sources, store)
+        current_todays_jobs.update(browser_results[0])
+        all_new_jobs.extend(browser_results[1])
+        report_fetch_tiers(metrics)
         
-        msg.attach(MIMEText(body, 'plain'))
+        # Hold back reposts and the same role listed by several sources
+        # (the index is saved only once the alert is queued and the state written)
+        dedup_index = None
+        if NEAR_DUPLICATES and current_todays_jobs:
+            try:
+                with instrumentation.span('dedup'):
+                    dedup_index = DedupIndex().load()
+                    all_new_jobs, _ = suppress_near_duplicates(all_new_jobs, current_todays_jobs, index=dedup_index, save=False)
+            except Exception as e:
+                print(f"Near-duplicate check failed, alerting on every new job: {str(e)}")
+                dedup_index = None
+        last_run_stats.update({
+            'current_jobs': sum(len(jobs) for jobs in current_todays_jobs.values()),
+            'new_jobs': len(all_new_jobs)
+        })
         
-        # Send email to all recipients
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SENDER_EMAIL, recipient_list, text)
-        server.quit()
+        if dry_run:
+            store.close()
+            print(f"\n🔎 Dry run: {len(all_new_jobs)} new job(s) found; no alert sent and no state saved")
+            metrics.finish()
+            return True
         
-        print(f"📧 Email alert sent to {len(recipient_list)} recipient(s)! {job_count} new job(s) found.")
-        return True
+        # Fill in links, descriptions and qualifications for the new jobs only
+        if ENRICH_DETAILS and all_new_jobs:
+            try:
+                enrich_new_jobs(all_new_jobs)
+            except Exception as e:
+                print(f"Job detail enrichment failed, alerting without details: {str(e)}")
         
-    except Exception as e:
-        print(f"Error sending email: {str(e)}")
-        return False
-
-def main():
-    """Main function to monitor Microsoft job sources and send alerts"""
-    print("Starting Microsoft career monitoring system...")
-    print(f"Monitoring {len(TARGET_URLS)} job sources:")
-    for key, config in TARGET_URLS.items():
-        print(f"  • {config['name']}")
-    
-    try:
-        with sync_playwright() as p:
-            # Launch browser
-            print("\nLaunching browser...")
-            browser = p.chromium.launch(headless=True)  # Headless for GitHub Actions
-            page = browser.new_page()
-            
-            # Load previous today's jobs
-            known_todays_jobs = load_known_todays_jobs()
-            current_todays_jobs = {}
-            all_new_jobs = []
+        # Queue one email digest covering every source with new jobs
+        own_notifier = notifier is None
+        if own_notifier:
+            notifier = Notifier()
+        if all_new_jobs:
+            print(f"\n📧 Sending email alert...")
+            print(f"  • {len(all_new_jobs)} new job(s) found")
             
-            # Monitor each URL
-            for source_key, config in TARGET_URLS.items():
-                print(f"\n--- Monitoring {config['name']} ---")
-                print(f"URL: {config['url']}")
-                
-                try:
-                    # Navigate to the URL with longer timeout and different wait strategy
-                    print("Navigating to Microsoft careers page...")
-                    page.goto(config['url'], timeout=60000, wait_until="domcontentloaded")
-                    
-                    # Wait a bit more for dynamic content
-                    page.wait_for_timeout(5000)
-                    
-                    # Take a screenshot for debugging
-                    page.screenshot(path=SCREENSHOT_PATH)
-                    print(f"Screenshot saved as {SCREENSHOT_PATH}")
-                    
-                    # Extract jobs updated today
-                    current_jobs = extract_todays_jobs(page)
-                    current_todays_jobs[source_key] = current_jobs
-                    
-                    print(f"Found {len(current_jobs)} jobs updated today")
-                    
-                    # Compare with previous today's jobs
-                    previous_jobs = known_todays_jobs.get(source_key, [])
-                    new_jobs = compare_todays_jobs(current_jobs, previous_jobs, config['name'])
-                    
-                    if new_jobs:
-                        all_new_jobs.extend(new_jobs)
-                        print(f"New jobs detected: {len(new_jobs)} new jobs")
-                        for job in new_jobs:
-                            print(f"  🆕 New: {job['job_title']}")
-                    else:
-                        print("No new jobs updated today")
-                
-                except Exception as e:
-                    print(f"Error monitoring {config['name']}: {str(e)}")
-                    continue
-            
-            # Close browser
-            browser.close()
-            
-            # Send email if there were new jobs
-            if all_new_jobs:
-                print(f"\n📧 Sending email alert...")
-                print(f"  • {len(all_new_jobs)} new job(s) found")
-                
-                # Send alert for the first source (assuming single source for now)
-                source_key = list(TARGET_URLS.keys())[0]
-                source_config = TARGET_URLS[source_key]
-                
-                if send_email_alert(all_new_jobs, source_config['name'], source_config['url']):
-                    print("Email alert sent successfully!")
-                else:
-                    print("Failed to send email alert.")
+            for source_key, config in sources.items():
+                notifier.add(config['name'], config['url'], [job for job in all_new_jobs if job.get('source') == source_key])
+            notifier.flush()
+        else:
+            print("\n✅ No new jobs updated today.")
+        
+        # Update stored today's jobs (unchanged sources keep their previous state)
+        state_saved = False
+        try:
+            if store.unchanged and len(store.unchanged) == len(current_todays_jobs):
+                print("⚡ All job lists unchanged, skipping state write")
             else:
-                print("\n✅ No new jobs updated today.")
-            
-            # Update stored today's jobs
-            save_todays_jobs(current_todays_jobs)
-            
-            print("\n🎯 Microsoft career monitoring completed successfully!")
-            
+                with instrumentation.span('state_write'):
+                    for source_key, jobs in current_todays_jobs.items():
+                        if source_key not in store.unchanged:
+                            store.record(source_key, jobs)
+                    # A run limited to some sources carries the others forward
+                    for source_key in TARGET_URLS:
+                        if source_key not in sources:
+                            store.keep(source_key)
+                    store.commit()
+            state_saved = True
+        except Exception as e:
+            print(f"Error saving today's jobs: {str(e)}")
+        finally:
+            store.close()
+        
+        # A run that dies before this point alerts on its jobs again next time instead of
+        # finding them in the index as near-duplicates of themselves
+        if dedup_index is not None and state_saved:
+            try:
+                dedup_index.save()
+            except Exception as e:
+                print(f"Error saving near-duplicate index: {str(e)}")
+        
+        # Keep every observation for trend queries (numpy is only loaded here)
+        if POSTING_ARCHIVE:
+            try:
+                with instrumentation.span('archive'):
+                    from posting_archive import append_observations, compact
+                    rows = append_observations(current_todays_jobs)
+                    compact()
+                print(f"🗃️ Archived {rows} observation(s)")
+            except Exception as e:
+                print(f"Error archiving observations: {str(e)}")
+        
+        # A one-shot run has to wait for the background sender before exiting
+        if own_notifier:
+            notifier.close()
+            if all_new_jobs:
+                print("Email alert sent successfully!" if notifier.sent else "Failed to send email alert.")
+        
+        print("\n🎯 Microsoft career monitoring completed successfully!")
+        
     except Exception as e:
         print(f"Error occurred: {str(e)}")
+        metrics.finish(success=False)
         return False
+    finally:
+        # Slowed-down hosts stay slow for the next run
+        save_shared_limiter()
+        save_job_counts()
     
+    metrics.finish()
     return True
 
 if __name__ == "__main__":
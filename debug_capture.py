@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Anomaly-triggered Debug Capture
+Saves a screenshot, the DOM and (optionally) a Playwright trace of a source only
+when its visit looks wrong, into a size-bounded ring buffer of per-run folders
+"""
+
+import json
+import os
+import shutil
+from datetime import date
+
+import instrumentation
+from job_store import load_json_state, save_json_state
+
+DEBUG_CAPTURE = os.getenv('DEBUG_CAPTURE', '1') == '1'
+DEBUG_CAPTURE_DIR = os.getenv('DEBUG_CAPTURE_DIR', 'debug_artifacts')  # One folder per run id
+DEBUG_CAPTURE_MAX_MB = float(os.getenv('DEBUG_CAPTURE_MAX_MB', '50'))  # Oldest runs are removed past this
+# Record a Playwright trace of every browser visit and keep it for anomalous ones
+DEBUG_TRACE = os.getenv('DEBUG_TRACE', '0') == '1'
+JOB_DROP_RATIO = float(os.getenv('DEBUG_JOB_DROP_RATIO', '0.5'))  # Capture when today's jobs fall below this share
+JOB_DROP_MIN_PREVIOUS = 4  # Too few jobs to call a drop below this
+JOB_COUNTS_FILE = os.getenv('DEBUG_JOB_COUNTS_FILE', 'job_counts.json')  # Each source's last job count today
+
+_tracing_contexts = set()
+_job_counts = {}  # counts_path -> saved counts, read once per run
+_recorded_counts = {}  # counts_path -> {source: count} of this run, written by save_job_counts()
+
+def run_directory(directory=DEBUG_CAPTURE_DIR):
+    return os.path.join(directory, instrumentation.current_run().run_id)
+
+def anomaly_reasons(source_key, stats, jobs, error=None, counts_path=JOB_COUNTS_FILE):
+    """Return what looks wrong with a source visit (empty when nothing does)
+
+    The sudden-drop check compares against the counts of record_job_count().
+    """
+    if not DEBUG_CAPTURE:
+        return []
+    reasons = []
+    if error is not None:
+        reasons.append(f"exception: {type(error).__name__}")
+    if stats.get('error'):
+        reasons.append("extraction error")
+    if stats.get('containers') == 0:
+        reasons.append("zero containers")
+    if stats.get('fallback_used'):
+        reasons.append("fallback search used")
+
+    previous = _load_job_counts(counts_path).get(source_key) or {}
+    if previous.get('date') == date.today().isoformat() and previous.get('count', 0) >= JOB_DROP_MIN_PREVIOUS \
+            and len(jobs) < previous['count'] * JOB_DROP_RATIO:
+        reasons.append(f"job count dropped from {previous['count']} to {len(jobs)}")
+    return reasons
+
+def _load_job_counts(counts_path):
+    if counts_path not in _job_counts:
+        _job_counts[counts_path] = load_json_state(counts_path)
+    return _job_counts[counts_path]
+
+def record_job_count(source_key, jobs, counts_path=JOB_COUNTS_FILE):
+    """Remember today's job count for the next sudden-drop check; save_job_counts() writes it"""
+    if not DEBUG_CAPTURE:
+        return
+    entry = {'date': date.today().isoformat(), 'count': len(jobs)}
+    _load_job_counts(counts_path)[source_key] = entry
+    _recorded_counts.setdefault(counts_path, {})[source_key] = entry
+
+def take_job_counts(counts_path=JOB_COUNTS_FILE):
+    """Return and forget the job counts recorded so far (shard workers hand them to the parent)"""
+    return _recorded_counts.pop(counts_path, {})
+
+def merge_job_counts(recorded, counts_path=JOB_COUNTS_FILE):
+    """Add job counts recorded by another process to this run's"""
+    _recorded_counts.setdefault(counts_path, {}).update(recorded)
+
+def save_job_counts(counts_path=JOB_COUNTS_FILE):
+    """Write the job counts recorded this run over the saved ones (once per run)"""
+    recorded = _recorded_counts.pop(counts_path, {})
+    _job_counts.pop(counts_path, None)  # The next run reads the file again
+    if not recorded:
+        return
+    counts = load_json_state(counts_path)
+    counts.update(recorded)
+    try:
+        save_json_state(counts_path, counts)
+    except Exception as e:
+        print(f"Error saving job counts: {str(e)}")
+
+def start_trace(context):
+    """Start tracing a browser context for one source visit (DEBUG_TRACE=1 only)"""
+    if not (DEBUG_CAPTURE and DEBUG_TRACE) or context in _tracing_contexts:
+        return
+    try:
+        context.tracing.start(snapshots=True, screenshots=True)
+        _tracing_contexts.add(context)
+    except Exception as e:
+        print(f"Error starting trace: {str(e)}")
+
+def stop_trace(context, path=None):
+    """Stop tracing a context, saving the trace to path or discarding it"""
+    if context not in _tracing_contexts:
+        return
+    _tracing_contexts.discard(context)
+    try:
+        context.tracing.stop(path=path)
+    except Exception as e:
+        print(f"Error stopping trace: {str(e)}")
+
+async def start_trace_async(context):
+    """Async counterpart of start_trace"""
+    if not (DEBUG_CAPTURE and DEBUG_TRACE) or context in _tracing_contexts:
+        return
+    try:
+        await context.tracing.start(snapshots=True, screenshots=True)
+        _tracing_contexts.add(context)
+    except Exception as e:
+        print(f"Error starting trace: {str(e)}")
+
+async def stop_trace_async(context, path=None):
+    """Async counterpart of stop_trace"""
+    if context not in _tracing_contexts:
+        return
+    _tracing_contexts.discard(context)
+    try:
+        await context.tracing.stop(path=path)
+    except Exception as e:
+        print(f"Error stopping trace: {str(e)}")
+
+def _artifact_paths(source_key, directory):
+    folder = run_directory(directory)
+    os.makedirs(folder, exist_ok=True)
+    prefix = os.path.join(folder, source_key)
+    return folder, prefix
+
+def _write_report(prefix, source_key, reasons, url, stats):
+    with open(f"{prefix}-anomaly.json", 'w') as f:
+        json.dump({'source': source_key, 'url': url, 'reasons': reasons, 'stats': stats or {}}, f, indent=2, default=str)
+
+def capture_page(page, source_key, reasons, url=None, stats=None, directory=DEBUG_CAPTURE_DIR):
+    """Save the page's screenshot, DOM and trace for an anomalous visit; returns the run folder"""
+    if not (DEBUG_CAPTURE and reasons):
+        return None
+    folder, prefix = _artifact_paths(source_key, directory)
+    print(f"📸 {source_key}: {', '.join(reasons)}, saving debug artifacts to {folder}")
+    with instrumentation.span('debug_capture', source=source_key):
+        _write_report(prefix, source_key, reasons, url or page.url, stats)
+        try:
+            page.screenshot(path=f"{prefix}-screenshot.png", full_page=True)
+        except Exception as e:
+            print(f"Error saving screenshot: {str(e)}")
+        try:
+            with open(f"{prefix}-dom.html", 'w', encoding='utf-8') as f:
+                f.write(page.content())
+        except Exception as e:
+            print(f"Error saving DOM snapshot: {str(e)}")
+        stop_trace(page.context, f"{prefix}-trace.zip")
+    instrumentation.incr('debug_captures')
+    prune_artifacts(directory)
+    return folder
+
+async def capture_page_async(page, source_key, reasons, url=None, stats=None, directory=DEBUG_CAPTURE_DIR):
+    """Async counterpart of capture_page"""
+    if not (DEBUG_CAPTURE and reasons):
+        return None
+    folder, prefix = _artifact_paths(source_key, directory)
+    print(f"📸 {source_key}: {', '.join(reasons)}, saving debug artifacts to {folder}")
+    with instrumentation.span('debug_capture', source=source_key):
+        _write_report(prefix, source_key, reasons, url or page.url, stats)
+        try:
+            await page.screenshot(path=f"{prefix}-screenshot.png", full_page=True)
+        except Exception as e:
+            print(f"Error saving screenshot: {str(e)}")
+        try:
+            content = await page.content()
+            with open(f"{prefix}-dom.html", 'w', encoding='utf-8') as f:
+                f.write(content)
+        except Exception as e:
+            print(f"Error saving DOM snapshot: {str(e)}")
+        await stop_trace_async(page.context, f"{prefix}-trace.zip")
+    instrumentation.incr('debug_captures')
+    prune_artifacts(directory)
+    return folder
+
+def _folder_bytes(folder):
+    total = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+def prune_artifacts(directory=DEBUG_CAPTURE_DIR, max_mb=DEBUG_CAPTURE_MAX_MB):
+    """Remove the oldest run folders until the ring buffer fits in max_mb
+
+    The current run's folder is always kept. Returns the run ids removed.
+    """
+    current = instrumentation.current_run().run_id
+    runs = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+    sizes = {name: _folder_bytes(os.path.join(directory, name)) for name in runs}
+    total = sum(sizes.values())
+    removed = []
+    for name in runs:
+        if total <= max_mb * 1024 * 1024:
+            break
+        if name == current:
+            continue
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        total -= sizes[name]
+        removed.append(name)
+    return removed
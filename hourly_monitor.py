@@ -4,20 +4,27 @@ Hourly Microsoft Career Monitoring System
 Checks every hour for new job postings and sends email notifications
 """
 
-import schedule
 import time
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
-from career_monitor import main as run_job_monitor, load_known_todays_jobs, save_todays_jobs
+from adaptive_schedule import SCHEDULE_MODE, LEARNING_DAYS, AdaptiveScheduler, RunLock, hourly_posting_rates
 
 # Configuration
 LOG_FILE = "monitor.log"
 CHECK_INTERVAL_HOURS = 1  # Check every hour
+WARM_BROWSER = os.getenv('WARM_BROWSER', '1') == '1'  # Keep Chromium running between checks
+
+warm_browser = None
+notifier = None
+watchdog = None
+run_lock = RunLock()
+log_file = None  # Kept open (line-buffered) instead of reopened for every message
 
 def log_message(message):
     """Log message with timestamp to both console and file"""
+    global log_file
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {message}"
     
@@ -25,45 +32,121 @@ def log_message(message):
     
     # Write to log file
     try:
-        with open(LOG_FILE, "a") as f:
-            f.write(log_entry + "\n")
+        if log_file is None:
+            log_file = open(LOG_FILE, "a", buffering=1)
+        log_file.write(log_entry + "\n")
     except Exception as e:
         print(f"Error writing to log file: {e}")
 
 def check_for_new_jobs():
-    """Check for new jobs and send notifications if found"""
+    """Check for new jobs and send notifications if found
+
+    Returns True/False for a successful/failed check, or None when it was
+    skipped because another check is still running.
+    """
+    if not run_lock.acquire():
+        log_message("⏭️ Previous job check still running, skipping this one")
+        return None
+    try:
+        if watchdog is None:
+            return run_check()
+        # A cold run leaves no browser behind, so any child process still alive afterwards leaked
+        return watchdog.supervise(run_check, reap_children=warm_browser is None)
+    finally:
+        run_lock.release()
+
+def run_check():
+    """Run one job check (callers hold run_lock)"""
     log_message("🔄 Starting hourly job check...")
     
     try:
-        # Load previous jobs
-        previous_jobs = load_known_todays_jobs()
-        previous_count = sum(len(jobs) for jobs in previous_jobs.values())
+        # Imported on first use so starting the monitor (or a config check) stays fast
+        import career_monitor
+        from career_monitor import main as run_job_monitor
         
-        log_message(f"📊 Previous jobs count: {previous_count}")
+        def monitor_in_context(context):
+            # Not again on the crash-restart after the watchdog killed the browser
+            if watchdog is not None:
+                watchdog.check_budget()
+            return run_job_monitor(context=context, notifier=notifier)
         
         # Run the job monitor
         log_message("🔍 Running job extraction...")
-        success = run_job_monitor()
+        if warm_browser is not None:
+            success, startup, state = warm_browser.run(monitor_in_context)
+            log_message(f"🌡️ Browser ready in {startup:.2f}s ({state})")
+        else:
+            started = time.monotonic()
+            success = run_job_monitor(notifier=notifier)
+            log_message(f"🌡️ Cold run finished in {time.monotonic() - started:.1f}s")
         
         if not success:
             log_message("❌ Job extraction failed")
-            return
+            return False
         
-        # Load current jobs after extraction
-        current_jobs = load_known_todays_jobs()
-        current_count = sum(len(jobs) for jobs in current_jobs.values())
+        # Read the run summary instead of reloading the stored jobs
+        current_count = career_monitor.last_run_stats.get('current_jobs', 0)
+        new_jobs_count = career_monitor.last_run_stats.get('new_jobs', 0)
         
         log_message(f"📊 Current jobs count: {current_count}")
         
         # Check if there are new jobs
-        if current_count > previous_count:
-            new_jobs_count = current_count - previous_count
-            log_message(f"🎉 Found {new_jobs_count} new job(s)! Email notification sent.")
+        if new_jobs_count:
+            log_message(f"🎉 Found {new_jobs_count} new job(s)! Email notification queued.")
         else:
             log_message("✅ No new jobs found this hour")
+        return True
             
     except Exception as e:
         log_message(f"❌ Error during job check: {str(e)}")
+        return False
+
+def learn_posting_rates():
+    """Return the hourly posting rates learned from the job store's first-seen times
+
+    The JSON store keeps no history, so the posting archive's arrival
+    histogram is used when the store has none.
+    """
+    from job_store import open_job_store
+    store = open_job_store()
+    try:
+        since = datetime.now() - timedelta(days=LEARNING_DAYS)
+        first_seen = store.first_seen_times(since.isoformat(timespec='seconds'))
+    finally:
+        store.close()
+    if first_seen:
+        return hourly_posting_rates(first_seen)
+    
+    try:
+        from posting_archive import load_archive, arrival_hour_histogram
+        histogram = arrival_hour_histogram(load_archive(), since)
+        return [float(count) / LEARNING_DAYS for count in histogram]
+    except Exception:
+        return hourly_posting_rates([])
+
+def run_adaptive_schedule():
+    """Check more often in the hours new jobs usually appear, for the same daily number of checks"""
+    scheduler = AdaptiveScheduler(daily_checks=24 / CHECK_INTERVAL_HOURS)
+    learned = False
+    while True:
+        if not learned or scheduler.needs_relearn():
+            learned = True
+            try:
+                scheduler.learn(learn_posting_rates())
+            except Exception as e:
+                log_message(f"⚠️ Could not learn posting times: {str(e)}")
+            log_message(f"📈 Schedule: {scheduler.describe()}")
+        
+        result = check_for_new_jobs()
+        if result is not None:
+            scheduler.record(result)
+        
+        delay = scheduler.next_delay()
+        if scheduler.failures:
+            log_message(f"⏳ {scheduler.failures} failed check(s) in a row, backing off {delay / 60:.0f} min")
+        else:
+            log_message(f"⏳ Next check in {delay / 60:.0f} min")
+        time.sleep(delay)
 
 def setup_email_config():
     """Check and display email configuration status"""
@@ -91,26 +174,52 @@ def setup_email_config():
 
 def main():
     """Main function to run the hourly monitoring system"""
+    global warm_browser, notifier, watchdog
+    
     log_message("🚀 Starting Microsoft Career Hourly Monitor")
-    log_message(f"⏰ Will check every {CHECK_INTERVAL_HOURS} hour(s)")
+    if SCHEDULE_MODE == 'adaptive':
+        log_message(f"⏰ Will run {24 / CHECK_INTERVAL_HOURS:.0f} checks a day, more often when jobs are usually posted")
+    else:
+        log_message(f"⏰ Will check every {CHECK_INTERVAL_HOURS} hour(s)")
+    
+    if WARM_BROWSER:
+        from warm_browser import WarmBrowser
+        warm_browser = WarmBrowser()
+        log_message(f"🌡️ Keeping a warm browser (recycled every {warm_browser.max_runs} runs or {warm_browser.max_rss_mb}MB)")
+    
+    from run_watchdog import RUN_WATCHDOG, RunWatchdog
+    if RUN_WATCHDOG:
+        watchdog = RunWatchdog(log=log_message)
+        log_message(f"🐕 Watchdog: {watchdog.total_budget:.0f}s per check, "
+                    f"phase budgets {', '.join(f'{phase} {seconds:.0f}s' for phase, seconds in watchdog.phase_budgets.items())}")
     
     # Check email configuration
     email_configured = setup_email_config()
     
+    # One notifier for the whole session keeps its SMTP connection and sends in the background
+    from notifier import Notifier
+    notifier = Notifier()
+    notifier.send_pending()
+    
     if not email_configured:
         log_message("⚠️  Running without email notifications (jobs will still be tracked)")
     
-    # Schedule the job check
-    schedule.every(CHECK_INTERVAL_HOURS).hours.do(check_for_new_jobs)
-    
-    # Run initial check
-    log_message("🔍 Running initial job check...")
-    check_for_new_jobs()
-    
-    # Keep the script running
-    log_message("⏳ Monitoring started. Press Ctrl+C to stop.")
-    
     try:
+        if SCHEDULE_MODE == 'adaptive':
+            log_message("⏳ Monitoring started. Press Ctrl+C to stop.")
+            run_adaptive_schedule()
+        
+        # Schedule the job check
+        import schedule
+        schedule.every(CHECK_INTERVAL_HOURS).hours.do(check_for_new_jobs)
+        
+        # Run initial check
+        log_message("🔍 Running initial job check...")
+        check_for_new_jobs()
+        
+        # Keep the script running
+        log_message("⏳ Monitoring started. Press Ctrl+C to stop.")
+        
         while True:
             schedule.run_pending()
             time.sleep(60)  # Check every minute for scheduled tasks
@@ -118,6 +227,12 @@ def main():
         log_message("🛑 Monitoring stopped by user")
     except Exception as e:
         log_message(f"❌ Unexpected error: {str(e)}")
+    finally:
+        if warm_browser is not None:
+            warm_browser.stop()
+        notifier.close()
+        if log_file is not None:
+            log_file.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Keep-alive HTTP client
+Fetches careers search API pages over persistent connections, without a browser
+"""
+
+import gzip
+import http.client
+import json
+import os
+import zlib
+from urllib.parse import urlsplit
+
+from rate_limiter import shared_limiter
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv('HTTP_TIMEOUT_SECONDS', '15'))
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0 Safari/537.36'),
+    'Accept': 'application/json, text/html;q=0.9, */*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+# Errors that mean a reused keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected, http.client.CannotSendRequest,
+    http.client.BadStatusLine, BrokenPipeError, ConnectionResetError,
+)
+
+class HttpError(Exception):
+    """Raised for non-2xx responses"""
+
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+class HttpClient:
+    """Minimal HTTP/1.1 client keeping one persistent connection per host
+
+    Requests are paced by the shared per-host rate limiter unless another
+    limiter (or limiter=False for none) is given.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT_SECONDS, headers=None, limiter=None):
+        self.timeout = timeout
+        self.limiter = shared_limiter() if limiter is None else limiter
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.connections = {}
+        self.requests = 0
+        self.reused = 0
+
+    def _connection(self, scheme, host):
+        key = (scheme, host)
+        connection = self.connections.get(key)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(host, timeout=self.timeout)
+            self.connections[key] = connection
+            return connection, False
+        return connection, True
+
+    def _drop(self, scheme, host):
+        connection = self.connections.pop((scheme, host), None)
+        if connection is not None:
+            connection.close()
+
+    def get(self, url, headers=None):
+        """GET a URL and return (status, decoded body bytes), reusing the host's connection"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = dict(self.headers, **(headers or {}))
+        if self.limiter:
+            self.limiter.wait(url)
+
+        for attempt in range(2):
+            connection, reused = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers=request_headers)
+                response = connection.getresponse()
+                body = response.read()
+            except STALE_CONNECTION_ERRORS as e:
+                self._drop(parts.scheme, parts.netloc)
+                if reused and attempt == 0:
+                    continue  # The server closed an idle connection; retry once on a fresh one
+                self._record(url, error=e)
+                raise
+            except Exception as e:
+                self._drop(parts.scheme, parts.netloc)
+                self._record(url, error=e)
+                raise
+            self.requests += 1
+            self.reused += reused
+            self._record(url, response.status, retry_after=response.getheader('Retry-After'))
+            if response.getheader('Connection', '').lower() == 'close':
+                self._drop(parts.scheme, parts.netloc)
+            return response.status, self._decode(body, response.getheader('Content-Encoding', ''))
+
+    def _record(self, url, status=None, error=None, retry_after=None):
+        if self.limiter:
+            self.limiter.record(url, status, error, retry_after)
+
+    @staticmethod
+    def _decode(body, encoding):
+        encoding = encoding.lower()
+        if encoding == 'gzip':
+            return gzip.decompress(body)
+        if encoding == 'deflate':
+            return zlib.decompress(body)
+        return body
+
+    def get_json(self, url):
+        """GET a URL and parse its JSON body (raises HttpError for non-2xx responses)"""
+        status, body = self.get(url, {'Accept': 'application/json'})
+        if not 200 <= status < 300:
+            raise HttpError(status, url)
+        return json.loads(body)
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
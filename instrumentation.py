@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Run Instrumentation
+Timing spans and counters for each monitoring run, exported as JSON lines and
+a Prometheus text file
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.jsonl')  # One JSON record per run
+PROMETHEUS_FILE = os.getenv('PROMETHEUS_FILE', 'monitor_metrics.prom')  # node_exporter textfile format
+VERBOSE = os.getenv('MONITOR_VERBOSE', '0') == '1'  # Per-container tracing
+
+def trace(message):
+    """Print verbose per-element tracing only when MONITOR_VERBOSE=1"""
+    if VERBOSE:
+        print(message)
+
+class RunMetrics:
+    """Timing spans and counters collected during one monitoring run"""
+
+    def __init__(self):
+        self.run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.phase_seconds = {}
+        self.counters = {}
+        self.listeners = []
+        self.finished = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, phase, **labels):
+        """Time a phase of the run (phases can repeat, e.g. once per source)"""
+        self._notify('start', phase)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            entry = {'phase': phase, 'seconds': round(duration, 4), **labels}
+            if error:
+                entry['error'] = error
+            with self.lock:
+                self.spans.append(entry)
+                self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + duration
+            self._notify('end', phase)
+
+    def incr(self, counter, amount=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def absorb(self, counters, phase_seconds):
+        """Add counters and phase times collected by another process (e.g. a shard worker)"""
+        with self.lock:
+            for counter, value in counters.items():
+                self.counters[counter] = self.counters.get(counter, 0) + value
+            for phase, seconds in phase_seconds.items():
+                self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def add_listener(self, listener):
+        """Call listener(event, phase) whenever a span starts or ends"""
+        self.listeners.append(listener)
+
+    def _notify(self, event, phase):
+        for listener in self.listeners:
+            try:
+                listener(event, phase)
+            except Exception:
+                pass
+
+    def summary(self):
+        return {
+            'run_id': self.run_id,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - self.started, 3),
+            'phase_seconds': {phase: round(seconds, 4) for phase, seconds in self.phase_seconds.items()},
+            'counters': dict(self.counters),
+            'spans': list(self.spans),
+        }
+
+    def finish(self, success=True):
+        """Write the run's metrics once: append to METRICS_FILE and replace PROMETHEUS_FILE"""
+        if self.finished:
+            return
+        self.finished = True
+        summary = self.summary()
+        summary['success'] = success
+        try:
+            with open(METRICS_FILE, 'a') as f:
+                f.write(json.dumps(summary) + "\n")
+            write_prometheus(summary)
+        except Exception as e:
+            print(f"Error writing metrics: {str(e)}")
+        phases = ', '.join(f"{phase} {seconds:.2f}s" for phase, seconds in summary['phase_seconds'].items())
+        print(f"⏱️ Run {self.run_id} took {summary['total_seconds']:.2f}s ({phases})")
+
+def write_prometheus(summary, path=None):
+    """Atomically write the latest run summary in Prometheus text exposition format"""
+    path = path or PROMETHEUS_FILE
+    lines = [
+        "# HELP career_monitor_run_seconds Wall-clock duration of the last monitoring run",
+        "# TYPE career_monitor_run_seconds gauge",
+        f"career_monitor_run_seconds {summary['total_seconds']}",
+        "# HELP career_monitor_run_success Whether the last monitoring run succeeded",
+        "# TYPE career_monitor_run_success gauge",
+        f"career_monitor_run_success {1 if summary.get('success', True) else 0}",
+        "# HELP career_monitor_last_run_timestamp_seconds Start time of the last monitoring run",
+        "# TYPE career_monitor_last_run_timestamp_seconds gauge",
+        f"career_monitor_last_run_timestamp_seconds {int(datetime.fromisoformat(summary['started_at']).timestamp())}",
+        "# HELP career_monitor_phase_seconds Time spent per phase in the last monitoring run",
+        "# TYPE career_monitor_phase_seconds gauge",
+    ]
+    for phase, seconds in sorted(summary['phase_seconds'].items()):
+        lines.append(f'career_monitor_phase_seconds{{phase="{phase}"}} {seconds}')
+    lines += [
+        "# HELP career_monitor_events Counters from the last monitoring run",
+        "# TYPE career_monitor_events gauge",
+    ]
+    for counter, value in sorted(summary['counters'].items()):
+        lines.append(f'career_monitor_events{{counter="{counter}"}} {value}')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.prom')
+    with os.fdopen(fd, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, path)
+
+_current_run = RunMetrics()
+_run_listeners = []
+
+def start_run():
+    """Begin collecting metrics for a new run and return its RunMetrics"""
+    global _current_run
+    _current_run = RunMetrics()
+    for listener in _run_listeners:
+        _current_run.add_listener(listener)
+    return _current_run
+
+def add_run_listener(listener):
+    """Call listener(event, phase) for the spans of the current run and every later one"""
+    _run_listeners.append(listener)
+    _current_run.add_listener(listener)
+
+def remove_run_listener(listener):
+    for listeners in (_run_listeners, _current_run.listeners):
+        if listener in listeners:
+            listeners.remove(listener)
+
+def current_run():
+    return _current_run
+
+def span(phase, **labels):
+    """Time a phase of the current run"""
+    return _current_run.span(phase, **labels)
+
+def incr(counter, amount=1):
+    """Increment a counter of the current run"""
+    _current_run.incr(counter, amount)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Job Detail Enrichment
+Fetches the detail page data (description, qualifications, link) for new jobs
+only, a few at a time, through an on-disk cache so no job is fetched twice
+"""
+
+import html
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import instrumentation
+from job_store import link_job_id, load_json_state, save_json_state
+from search_api import JOB_DETAIL_URL
+
+ENRICH_DETAILS = os.getenv('ENRICH_DETAILS', '1') == '1'
+ENRICH_CONCURRENCY = int(os.getenv('ENRICH_CONCURRENCY', '4'))  # Detail fetches in flight at once
+DETAIL_CACHE_FILE = os.getenv('DETAIL_CACHE_FILE', 'job_details_cache.json')
+DETAIL_CACHE_TTL_HOURS = float(os.getenv('DETAIL_CACHE_TTL_HOURS', '720'))
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv('DETAIL_CACHE_MAX_ENTRIES', '2000'))
+DETAIL_TEXT_CHARS = 600  # Description/qualifications kept per job (bounds the cache size too)
+JOB_DETAIL_API_URL = "https://gcsservices.careers.microsoft.com/search/api/v1/job/{job_id}?lang=en_us"
+
+def detail_key(job):
+    """Return the job ID a new-job entry can be fetched by (None if it has none)"""
+    if job.get('job_id'):
+        return str(job['job_id'])
+    return link_job_id(job.get('link'))
+
+def html_to_text(value, limit=DETAIL_TEXT_CHARS):
+    """Strip tags from a detail field and shorten it to limit characters"""
+    if not value:
+        return ''
+    if isinstance(value, list):
+        value = ' '.join(str(item) for item in value)
+    text = re.sub(r'<(br|/p|/li|/div)\s*/?>', '\n', str(value), flags=re.IGNORECASE)
+    text = html.unescape(re.sub(r'<[^>]+>', ' ', text))
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+    text = re.sub(r'\s*\n\s*', '\n', text).strip()
+    if len(text) > limit:
+        text = text[:limit].rsplit(' ', 1)[0] + '…'
+    return text
+
+def details_from_payload(payload, job_id):
+    """Pick the fields worth alerting on out of a job detail API payload"""
+    result = (payload or {}).get('operationResult', {}).get('result', {}) or {}
+    properties = result.get('properties') or {}
+    details = {
+        'link': JOB_DETAIL_URL.format(job_id=job_id),
+        'description': html_to_text(result.get('description')),
+        'qualifications': html_to_text(result.get('qualifications')),
+        'responsibilities': html_to_text(result.get('responsibilities')),
+        'work_arrangement': properties.get('workSiteFlexibility'),
+        'location': properties.get('primaryLocation'),
+    }
+    return {key: value for key, value in details.items() if value}
+
+class DetailCache:
+    """JSON cache of fetched job details with a TTL and a least-recently-used size bound"""
+
+    def __init__(self, path=DETAIL_CACHE_FILE, ttl_hours=DETAIL_CACHE_TTL_HOURS, max_entries=DETAIL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+        self.entries = load_json_state(path)
+        self.changed = False
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, entry, now):
+        try:
+            return now - datetime.fromisoformat(entry['fetched_at']) > self.ttl
+        except (KeyError, TypeError, ValueError):
+            return True
+
+    def get(self, key, now=None):
+        """Return the cached details for a job, or None if missing or expired"""
+        now = now or datetime.now()
+        entry = self.entries.get(key)
+        if entry is None or self._expired(entry, now):
+            self.misses += 1
+            return None
+        entry['used_at'] = now.isoformat()
+        self.changed = True
+        self.hits += 1
+        return entry['details']
+
+    def put(self, key, details, now=None):
+        now = (now or datetime.now()).isoformat()
+        self.entries[key] = {'fetched_at': now, 'used_at': now, 'details': details}
+        self.changed = True
+
+    def evict(self, now=None):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        now = now or datetime.now()
+        expired = [key for key, entry in self.entries.items() if self._expired(entry, now)]
+        for key in expired:
+            del self.entries[key]
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self.entries, key=lambda key: self.entries[key].get('used_at', ''))[:overflow]
+            for key in oldest:
+                del self.entries[key]
+        evicted = len(expired) + max(overflow, 0)
+        self.changed = self.changed or evicted > 0
+        return evicted
+
+    def save(self):
+        if not self.changed:
+            return
+        self.evict()
+        save_json_state(self.path, self.entries)
+        self.changed = False
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+def fetch_details_concurrently(job_ids, concurrency=ENRICH_CONCURRENCY, client_factory=None):
+    """Fetch detail payloads with at most concurrency requests in flight
+
+    Each worker thread keeps its own keep-alive client. Returns
+    {job_id: (details or None, seconds)}.
+    """
+    if client_factory is None:
+        from http_client import HttpClient as client_factory
+    local = threading.local()
+    clients = []
+    clients_lock = threading.Lock()
+
+    def fetch(job_id):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = client_factory()
+            with clients_lock:
+                clients.append(client)
+        started = time.monotonic()
+        try:
+            payload = client.get_json(JOB_DETAIL_API_URL.format(job_id=job_id))
+            details = details_from_payload(payload, job_id)
+        except Exception as e:
+            print(f"Could not fetch details for job {job_id}: {str(e)}")
+            details = None
+        return job_id, details, time.monotonic() - started
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(job_ids))), thread_name_prefix='enrich') as pool:
+            for job_id, details, seconds in pool.map(fetch, job_ids):
+                results[job_id] = (details, seconds)
+    finally:
+        for client in clients:
+            client.close()
+    return results
+
+def enrich_new_jobs(new_jobs, cache=None, concurrency=ENRICH_CONCURRENCY, client_factory=None):
+    """Add detail fields to new-job alert entries in place
+
+    Only the given (new) jobs are looked up; details already in the cache are
+    reused, so a reposted job is never fetched again, and a job listed by
+    several sources is fetched once. Entries without a job ID are left as is.
+    """
+    by_key = {}
+    for job in new_jobs:
+        key = detail_key(job)
+        if key:
+            by_key.setdefault(key, []).append(job)
+    if not by_key:
+        return new_jobs
+
+    own_cache = cache is None
+    cache = cache or DetailCache()
+    started = time.monotonic()
+    with instrumentation.span('enrichment'):
+        found = {}
+        for key in by_key:
+            details = cache.get(key)
+            if details is not None:
+                found[key] = details
+        missing = [key for key in by_key if key not in found]
+        latencies = []
+        failed = 0
+        if missing:
+            for key, (details, seconds) in fetch_details_concurrently(missing, concurrency, client_factory).items():
+                latencies.append(seconds)
+                if details is None:
+                    failed += 1
+                    continue
+                cache.put(key, details)
+                found[key] = details
+        for key, details in found.items():
+            for job in by_key[key]:
+                for field, value in details.items():
+                    # Keep what the listing already knew; fill in the rest
+                    if job.get(field) in (None, '', 'Unknown'):
+                        job[field] = value
+        if own_cache:
+            cache.save()
+
+    hits = len(by_key) - len(missing)
+    instrumentation.incr('enrich_cache_hits', hits)
+    instrumentation.incr('enrich_fetched', len(missing) - failed)
+    instrumentation.incr('enrich_failed', failed)
+    message = f"🔎 Enriched {len(found)}/{len(by_key)} new job(s): {hits} cached ({hits / len(by_key):.0%} hit ratio)"
+    if latencies:
+        latencies.sort()
+        message += (f", {len(missing)} fetched (p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+                    f"max {latencies[-1] * 1000:.0f}ms)")
+    if failed:
+        message += f", {failed} failed"
+    print(f"{message} in {time.monotonic() - started:.2f}s")
+    return new_jobs
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Job State Storage
+Keeps track of the jobs seen per source, either as the original JSON snapshot
+or as an indexed SQLite table with first-seen / last-seen history
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+# Storage backend: 'json' rewrites known_todays_jobs.json, 'sqlite' uses an indexed job table
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'json')
+KNOWN_TODAYS_JOBS_FILE = "known_todays_jobs.json"
+PAGE_FINGERPRINTS_FILE = "page_fingerprints.json"  # Job list fingerprints for the JSON backend
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'job_store.db')
+JOB_ID_PATTERN = re.compile(r'/jobs?/(?:[^/?#]+/)*?(\d{5,})')  # Job ID in a careers job link
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    source TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    location TEXT,
+    work_arrangement TEXT,
+    job_id TEXT,
+    link TEXT,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (source, job_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs (source, last_seen);
+CREATE INDEX IF NOT EXISTS jobs_first_seen ON jobs (first_seen);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    source TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    source TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    job_count INTEGER NOT NULL,
+    PRIMARY KEY (source, run_at)
+) WITHOUT ROWID;
+"""
+
+def link_job_id(link):
+    """Return the job ID in a careers job link (None when it has none)"""
+    match = JOB_ID_PATTERN.search(link or '')
+    return match.group(1) if match else None
+
+def job_key(job):
+    """Return the identity of a job: its job ID (from the API or its link), otherwise its title
+
+    Search API and DOM extraction give the same job the same key as long as
+    the DOM found the job link.
+    """
+    return job.get('job_id') or link_job_id(job.get('link')) or job['title']
+
+def load_json_state(path):
+    """Load the {source: [jobs]} snapshot from a JSON file"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+        return {}
+    except Exception as e:
+        print(f"Error loading known today's jobs: {str(e)}")
+        return {}
+
+def save_json_state(path, state):
+    """Atomically replace the JSON snapshot (write to a temp file, then rename)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class JsonJobStore:
+    """Snapshot store: remembers only the jobs found by the previous run"""
+
+    def __init__(self, path=KNOWN_TODAYS_JOBS_FILE, fingerprints_path=PAGE_FINGERPRINTS_FILE):
+        self.path = path
+        self.fingerprints_path = fingerprints_path
+        self.previous = load_json_state(path)
+        self.current = {}
+        self.fingerprints = load_json_state(fingerprints_path)
+        self.fingerprints_changed = False
+        self.unchanged = set()
+
+    def previous_jobs(self, source_key):
+        return self.previous.get(source_key, [])
+
+    def unseen_jobs(self, source_key, jobs):
+        """Return the jobs whose key was not in the previous snapshot"""
+        known = {job_key(job) for job in self.previous_jobs(source_key)}
+        # Snapshot jobs saved without a job ID or link are known by their title
+        return [job for job in jobs if job_key(job) not in known and job['title'] not in known]
+
+    def record(self, source_key, jobs):
+        self.current[source_key] = jobs
+
+    def keep(self, source_key):
+        """Carry a source's previous jobs forward unchanged"""
+        self.unchanged.add(source_key)
+        self.current[source_key] = self.previous_jobs(source_key)
+
+    def get_fingerprint(self, source_key):
+        return self.fingerprints.get(source_key)
+
+    def set_fingerprint(self, source_key, fingerprint):
+        if self.fingerprints.get(source_key) != fingerprint:
+            self.fingerprints[source_key] = fingerprint
+            self.fingerprints_changed = True
+
+    def commit(self):
+        save_json_state(self.path, self.current)
+        if self.fingerprints_changed:
+            save_json_state(self.fingerprints_path, self.fingerprints)
+        print(f"Saved today's jobs to {self.path}")
+
+    def counts(self):
+        """Return {source: number of jobs in the latest snapshot}"""
+        return {source: len(jobs) for source, jobs in self.previous.items()}
+
+    def first_seen_times(self, since=None):
+        """The snapshot keeps no history, so there are no first-seen times"""
+        return []
+
+    def close(self):
+        pass
+
+class SqliteJobStore:
+    """Indexed job table keyed by (source, job key) with first/last-seen history"""
+
+    def __init__(self, path=JOB_STORE_PATH, import_from=KNOWN_TODAYS_JOBS_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.run_at = datetime.now().isoformat(timespec='seconds')
+        self.unchanged = set()
+        if import_from and self._is_empty() and os.path.exists(import_from):
+            self.import_json(import_from)
+
+    def _is_empty(self):
+        return self.conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+
+    def previous_jobs(self, source_key):
+        """Return the jobs seen by the most recent run of a source"""
+        rows = self.conn.execute(
+            "SELECT data FROM jobs WHERE source = ? AND last_seen = "
+            "(SELECT MAX(run_at) FROM runs WHERE source = ?)",
+            (source_key, source_key)
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def known_keys(self, source_key, keys):
+        """Return the subset of keys already stored for a source (indexed lookup)"""
+        keys = list(keys)
+        known = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT job_key FROM jobs WHERE source = ? AND job_key IN ({placeholders})",
+                [source_key, *chunk]
+            )
+            known.update(row['job_key'] for row in rows)
+        return known
+
+    def unseen_jobs(self, source_key, jobs):
+        """Return the jobs this source has never produced before"""
+        # Jobs the DOM found before it took job IDs from links are stored under their title
+        known = self.known_keys(source_key, {job_key(job) for job in jobs} | {job['title'] for job in jobs})
+        return [job for job in jobs if job_key(job) not in known and job['title'] not in known]
+
+    def record(self, source_key, jobs, seen_at=None):
+        """Upsert the jobs found for a source in this run (committed by commit())"""
+        seen_at = seen_at or self.run_at
+        self.conn.executemany(
+            """
+            INSERT INTO jobs (source, job_key, title, location, work_arrangement, job_id, link, data, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source, job_key) DO UPDATE SET
+                title = excluded.title,
+                location = excluded.location,
+                work_arrangement = excluded.work_arrangement,
+                link = COALESCE(excluded.link, jobs.link),
+                data = excluded.data,
+                last_seen = excluded.last_seen
+            """,
+            [
+                (source_key, job_key(job), job['title'], job.get('location'), job.get('work_arrangement'),
+                 job.get('job_id'), job.get('link'), json.dumps(job), seen_at, seen_at)
+                for job in jobs
+            ]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO runs (source, run_at, job_count) VALUES (?, ?, ?)",
+            (source_key, seen_at, len(jobs))
+        )
+
+    def keep(self, source_key):
+        """Leave a source's stored jobs untouched for this run"""
+        self.unchanged.add(source_key)
+
+    def get_fingerprint(self, source_key):
+        row = self.conn.execute("SELECT fingerprint FROM fingerprints WHERE source = ?", (source_key,)).fetchone()
+        return row['fingerprint'] if row else None
+
+    def set_fingerprint(self, source_key, fingerprint):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (source, fingerprint, updated_at) VALUES (?, ?, ?)",
+            (source_key, fingerprint, self.run_at)
+        )
+
+    def commit(self):
+        """Atomically commit everything recorded since the last commit"""
+        self.conn.commit()
+        print(f"Saved today's jobs to {self.path}")
+
+    def counts(self):
+        """Return {source: number of jobs found by its latest run}"""
+        rows = self.conn.execute(
+            "SELECT source, job_count FROM runs AS r WHERE run_at = "
+            "(SELECT MAX(run_at) FROM runs WHERE source = r.source)"
+        )
+        return {row['source']: row['job_count'] for row in rows}
+
+    def first_seen_times(self, since=None):
+        """Return the first-seen timestamps of every stored job (optionally since an ISO time)"""
+        rows = self.conn.execute(
+            "SELECT first_seen FROM jobs WHERE first_seen >= ?", (since or '',)
+        )
+        return [row['first_seen'] for row in rows]
+
+    def import_json(self, path):
+        """One-time import of an existing known_todays_jobs.json snapshot"""
+        state = load_json_state(path)
+        seen_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+        with self.conn:
+            for source_key, jobs in state.items():
+                self.record(source_key, jobs, seen_at=seen_at)
+        print(f"Imported {sum(len(jobs) for jobs in state.values())} job(s) from {path} into {self.path}")
+
+    def close(self):
+        self.conn.close()
+
+def open_job_store(backend=None):
+    """Open the configured job store backend"""
+    backend = backend or STATE_BACKEND
+    if backend == 'sqlite':
+        return SqliteJobStore()
+    return JsonJobStore()
+
+if __name__ == "__main__":
+    # python job_store.py import [known_todays_jobs.json]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'import':
+        source_file = sys.argv[2] if len(sys.argv) > 2 else KNOWN_TODAYS_JOBS_FILE
+        store = SqliteJobStore(import_from=None)
+        store.import_json(source_file)
+        store.close()
+    else:
+        print("Usage: python job_store.py import [known_todays_jobs.json]")
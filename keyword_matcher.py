@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Keyword Matching and Relevance Filtering
+Keyword lists are compiled once into a single regex, so a span, title or job is
+checked in one pass however many keywords there are
+"""
+
+import os
+import re
+
+# Comma-separated keywords for the relevance filter (empty = alert on every new job)
+RELEVANCE_INCLUDE = os.getenv('RELEVANCE_INCLUDE', '')
+RELEVANCE_EXCLUDE = os.getenv('RELEVANCE_EXCLUDE', '')
+RELEVANCE_MIN_SCORE = int(os.getenv('RELEVANCE_MIN_SCORE', '1'))
+# Job fields searched for include keywords; title matches count TITLE_WEIGHT times
+RELEVANCE_FIELDS = ('title', 'location', 'work_arrangement', 'discipline', 'profession', 'role_type')
+TITLE_WEIGHT = 2
+
+def split_keywords(value):
+    """Parse a comma-separated keyword list"""
+    return [keyword.strip() for keyword in value.split(',') if keyword.strip()]
+
+class KeywordMatcher:
+    """Finds any of a set of keywords in a text with one compiled regex
+
+    Matching is case-sensitive like a plain `keyword in text` check; with
+    lowercase=True the text is lowercased first (and the keywords too), the
+    same as `keyword in text.lower()`.
+    """
+
+    def __init__(self, keywords, lowercase=False):
+        self.lowercase = lowercase
+        self.keywords = [keyword.lower() if lowercase else keyword for keyword in keywords if keyword]
+        # Longest first, so the alternation reports "data engineering" rather than "data"
+        alternatives = sorted({re.escape(keyword) for keyword in self.keywords}, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def _prepare(self, text):
+        return text.lower() if self.lowercase else text
+
+    def search(self, text):
+        """Return True if the text contains any keyword"""
+        if self.pattern is None or not text:
+            return False
+        return self.pattern.search(self._prepare(text)) is not None
+
+    def found(self, text):
+        """Return the set of keywords occurring in the text"""
+        if self.pattern is None or not text:
+            return set()
+        return {match.group(0) for match in self.pattern.finditer(self._prepare(text))}
+
+    def first_index(self, texts):
+        """Index of the first text containing a keyword (None if there is none)"""
+        for index, text in enumerate(texts):
+            if self.search(text):
+                return index
+        return None
+
+    def first_matching(self, texts, default="Unknown"):
+        """Return the first text containing any keyword"""
+        index = self.first_index(texts)
+        return texts[index] if index is not None else default
+
+class RelevanceFilter:
+    """Scores new jobs by include keywords and drops excluded or low-scoring ones
+
+    A job is dropped if its title contains an exclude keyword. With include
+    keywords, its score is TITLE_WEIGHT per distinct keyword in the title
+    plus one per other keyword found in the remaining fields, and it is kept
+    when the score reaches min_score. Matching ignores case.
+    """
+
+    def __init__(self, include=(), exclude=(), min_score=RELEVANCE_MIN_SCORE, fields=RELEVANCE_FIELDS):
+        self.include = KeywordMatcher(include, lowercase=True)
+        self.exclude = KeywordMatcher(exclude, lowercase=True)
+        self.min_score = min_score
+        self.fields = [field for field in fields if field != 'title']
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Build the filter for a source: its 'relevance' settings, else the RELEVANCE_* env vars"""
+        settings = (config or {}).get('relevance') or {}
+        return cls(
+            include=settings.get('include', split_keywords(RELEVANCE_INCLUDE)),
+            exclude=settings.get('exclude', split_keywords(RELEVANCE_EXCLUDE)),
+            min_score=settings.get('min_score', RELEVANCE_MIN_SCORE),
+        )
+
+    @property
+    def active(self):
+        return bool(self.include.keywords or self.exclude.keywords)
+
+    def score(self, job):
+        """Return the job's relevance score, or None if it is excluded"""
+        title = job.get('title') or job.get('job_title') or ''
+        if self.exclude.search(title):
+            return None
+        if not self.include.keywords:
+            return 0
+        title_keywords = self.include.found(title)
+        other_keywords = set()
+        for field in self.fields:
+            value = job.get(field)
+            if isinstance(value, list):
+                value = ' '.join(str(item) for item in value)
+            if value and value != 'Unknown':
+                other_keywords |= self.include.found(str(value))
+        return TITLE_WEIGHT * len(title_keywords) + len(other_keywords - title_keywords)
+
+    def is_relevant(self, score):
+        if score is None:
+            return False
+        return not self.include.keywords or score >= self.min_score
+
+    def filter(self, jobs):
+        """Split jobs into ([(job, score)] to alert on, [dropped jobs])"""
+        relevant = []
+        dropped = []
+        for job in jobs:
+            score = self.score(job)
+            if self.is_relevant(score):
+                relevant.append((job, score))
+            else:
+                dropped.append(job)
+        return relevant, dropped
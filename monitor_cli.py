@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Microsoft Career Monitor command line
+One entry point for checks, status and maintenance; heavy modules (Playwright,
+SMTP, the benchmark) are only imported by the subcommands that use them
+"""
+
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+# Startup (imports + argument parsing) allowed for commands that need no browser
+IMPORT_BUDGET_MS = float(os.getenv('CLI_IMPORT_BUDGET_MS', '150'))
+HEAVY_MODULES = ('playwright', 'smtplib', 'email.mime', 'numpy')
+LIGHT_COMMANDS = {'status', 'notify-pending'}
+LOCK_BUSY_EXIT = 75  # EX_TEMPFAIL: another check holds the run lock, try again later
+
+def startup_ms():
+    return (time.perf_counter() - _started) * 1000
+
+def check_import_budget(command):
+    """Warn when a light command started slower than the budget or pulled in heavy modules"""
+    elapsed = startup_ms()
+    heavy = sorted({name for name in sys.modules for prefix in HEAVY_MODULES if name == prefix or name.startswith(prefix + '.')})
+    if command in LIGHT_COMMANDS and (elapsed > IMPORT_BUDGET_MS or heavy):
+        loaded = f"; loaded {', '.join(heavy)}" if heavy else ""
+        print(f"⚠️ Startup took {elapsed:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms){loaded}")
+    return elapsed
+
+def select_sources(keys):
+    """Return TARGET_URLS limited to the given source keys (all when none are given)"""
+    from career_monitor import TARGET_URLS
+    if not keys:
+        return TARGET_URLS
+    unknown = [key for key in keys if key not in TARGET_URLS]
+    if unknown:
+        raise SystemExit(f"Unknown source(s): {', '.join(unknown)} (known: {', '.join(TARGET_URLS)})")
+    return {key: TARGET_URLS[key] for key in keys}
+
+def run_locked(command, run):
+    """Call run() holding the run lock that hourly_monitor takes for every check"""
+    from adaptive_schedule import RunLock
+    lock = RunLock()
+    if not lock.acquire():
+        print(f"⏭️ A job check is already running, not starting {command}")
+        return LOCK_BUSY_EXIT
+    try:
+        return run()
+    finally:
+        lock.release()
+
+def cmd_check(args):
+    """Run one monitoring pass: fetch, diff, alert and save state"""
+    from career_monitor import main
+    sources = select_sources(args.source)
+    return run_locked('check', lambda: 0 if main(sources=sources) else 1)
+
+def cmd_diff_only(args):
+    """Fetch and diff, but send no alert and leave the stored state untouched"""
+    from career_monitor import main
+    sources = select_sources(args.source)
+    return run_locked('diff-only', lambda: 0 if main(sources=sources, dry_run=True) else 1)
+
+def cmd_notify_pending(args):
+    """Resend the digests that previous runs could not deliver"""
+    return run_locked('notify-pending', _notify_pending)
+
+def _notify_pending():
+    from notifier import Notifier
+    notifier = Notifier()
+    check_import_budget('notify-pending')
+    queued = notifier.send_pending()
+    notifier.close()
+    if queued:
+        print(f"📧 {notifier.sent} sent, {notifier.failed} still pending")
+    else:
+        print("No pending notifications")
+    return 1 if notifier.failed else 0
+
+def _last_json_line(path):
+    """Return the last JSON record of a JSON-lines file (None if missing or empty)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 65536))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+def cmd_status(args):
+    """Show the stored job counts, the last run and pending notifications"""
+    from instrumentation import METRICS_FILE
+    from job_store import STATE_BACKEND, load_json_state, open_job_store
+    from notifier import PENDING_NOTIFICATIONS_FILE
+
+    store = open_job_store()
+    try:
+        counts = store.counts()
+    finally:
+        store.close()
+    print(f"🗄️ State backend: {STATE_BACKEND}")
+    for source_key, count in sorted(counts.items()):
+        print(f"  • {source_key}: {count} job(s) in the latest run")
+    if not counts:
+        print("  (no runs recorded yet)")
+
+    last_run = _last_json_line(METRICS_FILE)
+    if last_run:
+        counters = last_run.get('counters', {})
+        outcome = "✅" if last_run.get('success', True) else "❌"
+        print(f"{outcome} Last run {last_run['started_at']} took {last_run['total_seconds']:.1f}s: "
+              f"{counters.get('jobs_found', 0)} job(s) found, {counters.get('new_jobs', 0)} new")
+
+    # Read the outbox directly; notifier only imports smtplib when it connects
+    pending = (load_json_state(PENDING_NOTIFICATIONS_FILE) or {}).get('digests', [])
+    print(f"📥 Pending notifications: {len(pending)}")
+    print(f"⏱️ Startup {check_import_budget('status'):.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)")
+    return 0
+
+def cmd_replay(args):
+    """Run a saved search API payload or careers page through extraction and the diff"""
+    from job_store import open_job_store
+    from career_monitor import TARGET_URLS, new_job_entry
+    source_key = args.source or next(iter(TARGET_URLS))
+
+    if args.file.endswith('.json'):
+        from query_planner import job_matches, source_filters
+        from search_api import jobs_from_search_payload
+        with open(args.file) as f:
+            payload = json.load(f)
+        jobs, entry_count, _ = jobs_from_search_payload(payload, set())
+        filters = source_filters(TARGET_URLS[source_key]) if source_key in TARGET_URLS else {}
+        jobs = [job for job in jobs if job_matches(job, filters)]
+        print(f"Replayed {entry_count} search API entries from {args.file}")
+    else:
+        from playwright.sync_api import sync_playwright
+        from career_monitor import extract_todays_jobs
+        with open(args.file, encoding='utf-8') as f:
+            html = f.read()
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.set_content(html, wait_until="domcontentloaded")
+            jobs = extract_todays_jobs(page, mode=args.mode)
+            browser.close()
+
+    store = open_job_store()
+    try:
+        unseen = store.unseen_jobs(source_key, jobs)
+    finally:
+        store.close()
+    print(f"\n{len(jobs)} job(s) updated today, {len(unseen)} not seen before for {source_key}:")
+    for job in unseen:
+        entry = new_job_entry(job)
+        print(f"  🆕 {entry['job_title']} - {entry['location']} - {entry['work_arrangement']}")
+    return 0
+
+def cmd_bench(args):
+    """Run the offline extraction benchmark (extra arguments go to benchmark.py)"""
+    import benchmark
+    return benchmark.main(args.bench_args)
+
+def cmd_trends(args):
+    """Print posting trends from the history archive (per department per day, time to removal, arrival hours)"""
+    from posting_archive import summarize
+    summarize(days=args.days)
+    return 0
+
+def cmd_watch(args):
+    """Run the long-lived scheduler (hourly_monitor)"""
+    import hourly_monitor
+    hourly_monitor.main()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="monitor_cli.py", description="Microsoft Careers job monitor")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, handler in (('check', cmd_check), ('diff-only', cmd_diff_only)):
+        command = commands.add_parser(name, help=handler.__doc__)
+        command.add_argument('--source', action='append', help="Only this source key (repeatable)")
+        command.set_defaults(handler=handler)
+
+    commands.add_parser('notify-pending', help=cmd_notify_pending.__doc__).set_defaults(handler=cmd_notify_pending)
+    commands.add_parser('status', help=cmd_status.__doc__).set_defaults(handler=cmd_status)
+
+    replay = commands.add_parser('replay', help=cmd_replay.__doc__)
+    replay.add_argument('file', help="Saved search API payload (.json) or careers page (.html)")
+    replay.add_argument('--source', help="Source key to diff against (default: the first source)")
+    replay.add_argument('--mode', choices=['evaluate', 'legacy'], default='evaluate', help="DOM engine for .html files")
+    replay.set_defaults(handler=cmd_replay)
+
+    bench = commands.add_parser('bench', help=cmd_bench.__doc__)
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER)
+    bench.set_defaults(handler=cmd_bench)
+
+    trends = commands.add_parser('trends', help=cmd_trends.__doc__)
+    trends.add_argument('--days', type=int, default=30, help="How far back to look (default: 30)")
+    trends.set_defaults(handler=cmd_trends)
+
+    commands.add_parser('watch', help=cmd_watch.__doc__).set_defaults(handler=cmd_watch)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate Job Detection
+MinHash signatures of title and location shingles, indexed with LSH bands, so
+reposts and the same role listed by several sources are found without
+comparing against every job seen in the window
+"""
+
+import base64
+import hashlib
+import operator
+import os
+import re
+from array import array
+from datetime import datetime, timedelta
+
+import instrumentation
+from job_store import link_job_id, load_json_state, save_json_state
+
+NEAR_DUPLICATES = os.getenv('NEAR_DUPLICATES', '1') == '1'
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))  # Estimated Jaccard similarity to suppress at
+DEDUP_WINDOW_DAYS = float(os.getenv('DEDUP_WINDOW_DAYS', '30'))  # Jobs not seen for this long are forgotten
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '64'))
+DEDUP_SHINGLE_SIZE = int(os.getenv('DEDUP_SHINGLE_SIZE', '4'))  # Characters per title shingle
+DEDUP_INDEX_FILE = os.getenv('DEDUP_INDEX_FILE', 'near_duplicates.json')
+MIN_CANDIDATE_PROBABILITY = 0.99  # LSH banding must surface pairs at the threshold this often
+
+# Level suffixes spelled either way ("Engineer II" / "Engineer 2") shingle the same
+ROMAN_LEVELS = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4', 'v': '5'}
+
+def normalize_text(value):
+    words = re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).split()
+    return ' '.join(ROMAN_LEVELS.get(word, word) for word in words)
+
+def title_levels(title):
+    """Level and number tokens of a title ("Engineer II" -> {'2'})
+
+    Level variants differ by a shingle or two, so titles whose tokens differ
+    are different roles however similar the rest is.
+    """
+    return frozenset(word for word in normalize_text(title).split() if word.isdigit())
+
+def job_shingles(job, size=DEDUP_SHINGLE_SIZE):
+    """Character shingles of the title plus word shingles of location and discipline
+
+    Accepts both job dicts ('title') and alert entries ('job_title').
+    """
+    title = normalize_text(job.get('title') or job.get('job_title'))
+    padded = f" {title} "
+    shingles = {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+    for field in ('location', 'discipline', 'profession'):
+        value = job.get(field)
+        if value and value != 'Unknown':
+            shingles.update(f"{field}:{word}" for word in normalize_text(value).split())
+    return shingles
+
+def minhash(shingles, num_perm=DEDUP_NUM_PERM):
+    """Return the MinHash signature (num_perm 32-bit values) of a shingle set
+
+    Each shingle's extendable-output hash supplies one 32-bit value per
+    position, standing in for num_perm independent hash functions; the
+    per-position minimum is taken in C by map(min, zip(...)).
+    """
+    width = array('I').itemsize
+    hashes = [array('I', hashlib.shake_128(shingle.encode()).digest(num_perm * width)) for shingle in shingles]
+    return array('I', map(min, zip(*hashes)))
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity: the share of signature positions that agree"""
+    return sum(map(operator.eq, signature_a, signature_b)) / len(signature_a)
+
+def lsh_bands(num_perm, threshold, min_probability=MIN_CANDIDATE_PROBABILITY):
+    """Pick (bands, rows) with the fewest candidates that still finds pairs at threshold
+
+    A pair with similarity s shares at least one band with probability
+    1 - (1 - s**rows)**bands; the most rows per band meeting min_probability
+    at the threshold wins.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= min_probability:
+            best = (bands, rows)
+    return best
+
+def job_key(job):
+    """Identity of a job in the index: its ID (or the one in its link), else its normalized title and location"""
+    job_id = job.get('job_id') or link_job_id(job.get('link'))
+    if job_id:
+        return f"id:{job_id}"
+    title = normalize_text(job.get('title') or job.get('job_title'))
+    return f"title:{title}|{normalize_text(job.get('location'))}"
+
+class DedupIndex:
+    """Rolling window of job signatures with LSH buckets for sub-linear lookups"""
+
+    def __init__(self, path=DEDUP_INDEX_FILE, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM,
+                 window_days=DEDUP_WINDOW_DAYS):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.window = timedelta(days=window_days)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self.entries = {}
+        self.signatures = {}
+        self.buckets = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, key, entry, signature):
+        self.entries[key] = entry
+        self.signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def load(self):
+        """Read the saved index, skipping entries from another num_perm setting"""
+        for key, entry in load_json_state(self.path).items():
+            try:
+                signature = array('I', base64.b64decode(entry['signature']))
+            except (KeyError, ValueError, TypeError):
+                continue
+            if len(signature) == self.num_perm:
+                self._insert(key, entry, signature)
+        return self
+
+    def query(self, job, signature=None):
+        """Return (key, entry, similarity) of the closest indexed job at or above the threshold
+
+    Jobs at another level or number (see title_levels) never match.
+    """
+        key = job_key(job)
+        if key in self.entries:
+            return key, self.entries[key], 1.0
+        signature = signature if signature is not None else minhash(job_shingles(job), self.num_perm)
+        candidates = {candidate for band_key in self._band_keys(signature) for candidate in self.buckets.get(band_key, ())}
+        levels = title_levels(job.get('title') or job.get('job_title'))
+        best = None
+        for candidate in candidates:
+            if title_levels(self.entries[candidate].get('title')) != levels:
+                continue
+            score = similarity(signature, self.signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (candidate, self.entries[candidate], score)
+        return best
+
+    def add(self, job, source=None, seen_at=None, signature=None):
+        """Index a job, or refresh its last-seen time if it is already indexed"""
+        key = job_key(job)
+        seen_at = (seen_at or datetime.now()).isoformat(timespec='seconds')
+        if key in self.entries:
+            self.entries[key]['last_seen'] = seen_at
+            return key
+        signature = signature if signature is not None else minhash(job_shingles(job), self.num_perm)
+        self._insert(key, {
+            'title': job.get('title') or job.get('job_title'),
+            'location': job.get('location', 'Unknown'),
+            'source': source or job.get('source'),
+            'first_seen': seen_at,
+            'last_seen': seen_at,
+            'signature': base64.b64encode(signature.tobytes()).decode(),
+        }, signature)
+        return key
+
+    def prune(self, now=None):
+        """Forget jobs not seen within the window; returns how many were dropped"""
+        cutoff = ((now or datetime.now()) - self.window).isoformat(timespec='seconds')
+        stale = [key for key, entry in self.entries.items() if entry.get('last_seen', '') < cutoff]
+        if not stale:
+            return 0
+        for key in stale:
+            del self.entries[key]
+            del self.signatures[key]
+        stale = set(stale)
+        self.buckets = {
+            band_key: [key for key in keys if key not in stale]
+            for band_key, keys in self.buckets.items()
+        }
+        self.buckets = {band_key: keys for band_key, keys in self.buckets.items() if keys}
+        return len(stale)
+
+    def save(self):
+        save_json_state(self.path, self.entries)
+
+def suppress_near_duplicates(new_jobs, current_todays_jobs, index=None, save=True):
+    """Drop new-job alert entries that repeat a job already seen in the window
+
+    Each entry is checked against the index (and against the entries kept
+    before it in this run), then every job found this run is indexed. Pass
+    save=False to write the index later with index.save().
+    Returns (kept entries, [(suppressed entry, matched index entry, similarity)]).
+    """
+    index = index or DedupIndex().load()
+    now = datetime.now()
+    indexed_before = len(index.entries)
+    kept = []
+    suppressed = []
+    for entry in new_jobs:
+        signature = minhash(job_shingles(entry), index.num_perm)
+        match = index.query(entry, signature)
+        if match is not None:
+            suppressed.append((entry, match[1], match[2]))
+            continue
+        kept.append(entry)
+        index.add(entry, seen_at=now, signature=signature)
+
+    for source_key, jobs in current_todays_jobs.items():
+        for job in jobs:
+            index.add(job, source=source_key, seen_at=now)
+    pruned = index.prune(now)
+    if save:
+        index.save()
+
+    instrumentation.incr('near_duplicates_suppressed', len(suppressed))
+    report_suppressed(suppressed)
+    print(f"🧬 Dedup index: {len(index.entries)} job(s) in the last {index.window.days} days "
+          f"(+{len(index.entries) - indexed_before + pruned}, -{pruned}), "
+          f"{index.bands} bands x {index.rows} rows at similarity {index.threshold}")
+    return kept, suppressed
+
+def report_suppressed(suppressed):
+    """Print every alert that was held back as a near-duplicate"""
+    if not suppressed:
+        return
+    print(f"🧬 Suppressed {len(suppressed)} near-duplicate new job(s):")
+    for entry, match, score in suppressed:
+        print(f"  • {entry['job_title']} ({entry.get('source', '?')}) ≈ {match['title']} "
+              f"({match.get('source') or '?'}, first seen {match['first_seen'][:10]}, similarity {score:.2f})")
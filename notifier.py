@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Email Notification Queue
+Sends per-source job digests from a background thread over a reusable SMTP session
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, date
+
+import instrumentation
+from job_store import load_json_state, save_json_state
+
+# Email configuration (will be set via environment variables in GitHub Actions)
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '1') == '1'
+SENDER_EMAIL = os.getenv('SENDER_EMAIL', '')
+SENDER_PASSWORD = os.getenv('SENDER_PASSWORD', '')
+RECIPIENT_EMAILS = os.getenv('RECIPIENT_EMAILS', '')  # Comma-separated list of emails
+
+SEND_RETRIES = int(os.getenv('SMTP_SEND_RETRIES', '3'))
+RETRY_BACKOFF_SECONDS = float(os.getenv('SMTP_RETRY_BACKOFF_SECONDS', '2'))
+SMTP_IDLE_SECONDS = 240  # Close the pooled session before typical server idle timeouts
+PENDING_NOTIFICATIONS_FILE = "pending_notifications.json"  # Digests that could not be sent
+
+def parse_recipients(recipients=None):
+    """Parse the comma-separated recipient list"""
+    recipients = RECIPIENT_EMAILS if recipients is None else recipients
+    return [email.strip() for email in recipients.split(',') if email.strip()]
+
+def build_digest_message(sections, sender, recipients):
+    """Build one alert email covering every source section
+
+    sections is a list of {'source_name', 'source_url', 'jobs'} dicts where
+    jobs are compare_todays_jobs-style entries.
+    """
+    # The email package is only imported once there is something to send
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    job_count = sum(len(section['jobs']) for section in sections)
+    if job_count == 1:
+        subject = f"🚨 Microsoft: 1 new job updated today!"
+    else:
+        subject = f"🚨 Microsoft: {job_count} new jobs updated today!"
+
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ', '.join(recipients)
+    msg['Subject'] = subject
+
+    body = "🎯 Microsoft Careers - Jobs Updated Today Alert\n"
+    body += "=" * 50 + "\n\n"
+    body += f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    for section in sections:
+        body += f"📋 {section['source_name']}\n"
+        body += f"📅 Updated: {date.today().strftime('%B %d, %Y')}\n\n"
+        body += f"🎉 {len(section['jobs'])} new job(s) updated today!\n\n"
+
+        # List the new jobs
+        for i, job in enumerate(section['jobs'], 1):
+            body += f"   {i}. {job['job_title']}\n"
+            body += f"      📅 Updated: {job['updated_date']}\n"
+            if job.get('location') != 'Unknown':
+                body += f"      📍 Location: {job['location']}\n"
+            if job.get('work_arrangement') != 'Unknown':
+                body += f"      🏢 Work: {job['work_arrangement']}\n"
+            if job.get('link'):
+                body += f"      🔗 {job['link']}\n"
+            # Detail fields are only present for jobs enriched by job_details.py
+            for icon, field in (('📝', 'description'), ('🎓', 'qualifications')):
+                if job.get(field):
+                    text = job[field].replace('\n', '\n         ')
+                    body += f"      {icon} {text}\n"
+            body += "\n"
+
+        body += f"🔗 View all jobs: {section['source_url']}\n\n"
+
+    body += "🤖 This is an automated alert from your Microsoft career monitoring system.\n"
+    body += "💡 Set up job alerts on Microsoft Careers for instant notifications!"
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+class Notifier:
+    """Background email sender with a pooled SMTP session, digests and retries
+
+    Sources add their new jobs with add(); flush() turns everything collected
+    into a single digest and queues it for the sender thread, so callers never
+    block on SMTP. Every queued digest is written to PENDING_NOTIFICATIONS_FILE
+    until it has been sent, so digests that still fail after retries, or were
+    still in flight when the process exited, can be resent with send_pending().
+    """
+
+    def __init__(self, server=SMTP_SERVER, port=SMTP_PORT, sender=SENDER_EMAIL, password=SENDER_PASSWORD,
+                 recipients=None, starttls=SMTP_STARTTLS, retries=SEND_RETRIES, backoff=RETRY_BACKOFF_SECONDS,
+                 pending_file=PENDING_NOTIFICATIONS_FILE):
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.recipients = parse_recipients(recipients)
+        self.starttls = starttls
+        self.retries = retries
+        self.backoff = backoff
+        self.pending_file = pending_file
+        self.sections = {}
+        self.session = None
+        self.sent = 0
+        self.failed = 0
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()  # One SMTP conversation at a time
+        self.pending_lock = threading.Lock()  # One update of the pending file at a time
+
+    def is_configured(self):
+        return bool(self.sender and self.password and self.recipients)
+
+    def add(self, source_name, source_url, new_jobs):
+        """Collect a source's new jobs for the next digest"""
+        if not new_jobs:
+            return
+        section = self.sections.setdefault(source_name, {
+            'source_name': source_name, 'source_url': source_url, 'jobs': []
+        })
+        section['jobs'].extend(new_jobs)
+
+    def flush(self):
+        """Queue one digest with every collected source; returns False if nothing was queued"""
+        sections = list(self.sections.values())
+        self.sections = {}
+        if not sections:
+            print("No new jobs found. Skipping email alert.")
+            return False
+        if not self.is_configured():
+            print("Email configuration incomplete. Skipping email alert.")
+            return False
+        self._start()
+        self.queue.put((sections, self._park(sections)))
+        print(f"📧 Queued email digest for {len(sections)} source(s)")
+        return True
+
+    def send_pending(self):
+        """Queue the digests left over from earlier failed sends
+
+        Each digest stays in the pending file until it has been sent, so a
+        crash or kill while resending loses nothing (at worst a digest is
+        sent twice).
+        """
+        with self.pending_lock:
+            pending = load_json_state(self.pending_file) or {}
+            digests = pending.get('digests', [])
+            if not digests:
+                return 0
+            if not self.is_configured():
+                print("Email configuration incomplete. Leaving pending notifications queued.")
+                return 0
+            if any('id' not in digest for digest in digests):
+                for digest in digests:
+                    digest.setdefault('id', uuid.uuid4().hex)
+                save_json_state(self.pending_file, {'digests': digests})
+        self._start()
+        for digest in digests:
+            self.queue.put((digest['sections'], digest['id']))
+        print(f"📧 Re-queued {len(digests)} pending email digest(s)")
+        return len(digests)
+
+    def send_now(self, sections):
+        """Send one digest synchronously on the pooled session"""
+        return self._deliver(sections)
+
+    def close(self, timeout=60):
+        """Wait for queued digests to be sent, then close the SMTP session
+
+        Digests not sent within timeout are already in the pending file, so
+        a process exiting right after still leaves them for send_pending().
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print(f"⚠️ Email sender still busy, unsent digests stay in {self.pending_file} for notify-pending")
+                return
+            self.thread = None
+        with self.lock:
+            self._disconnect()
+
+    def _start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+            self.thread.start()
+
+    def _worker(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=SMTP_IDLE_SECONDS)
+            except queue.Empty:
+                with self.lock:
+                    self._disconnect()
+                continue
+            if item is None:
+                return
+            sections, pending_id = item
+            self._deliver(sections, pending_id)
+
+    def _connect(self):
+        """Return a logged-in SMTP session, reusing the pooled one while it is alive"""
+        import smtplib
+
+        if self.session is not None:
+            try:
+                if self.session.noop()[0] == 250:
+                    return self.session
+            except OSError:  # Includes smtplib.SMTPException
+                pass
+            self._disconnect()
+        session = smtplib.SMTP(self.server, self.port, timeout=30)
+        if self.starttls:
+            session.starttls()
+        if self.password:
+            session.login(self.sender, self.password)
+        self.session = session
+        return session
+
+    def _disconnect(self):
+        if self.session is not None:
+            try:
+                self.session.quit()
+            except Exception:
+                pass
+            self.session = None
+
+    def _deliver(self, sections, pending_id=None):
+        """Send a digest, retrying with exponential backoff before parking it as pending
+
+        pending_id identifies a digest resent from the pending file: it is
+        removed from the file once sent, and left there if sending fails.
+        """
+        with self.lock, instrumentation.span('email'):
+            return self._deliver_locked(sections, pending_id)
+
+    def _deliver_locked(self, sections, pending_id=None):
+        msg = build_digest_message(sections, self.sender, self.recipients)
+        job_count = sum(len(section['jobs']) for section in sections)
+        for attempt in range(self.retries + 1):
+            try:
+                self._connect().sendmail(self.sender, self.recipients, msg.as_string())
+                self.sent += 1
+                print(f"📧 Email alert sent to {len(self.recipients)} recipient(s)! {job_count} new job(s) found.")
+                if pending_id is not None:
+                    self._unpark(pending_id)
+                return True
+            except Exception as e:
+                self._disconnect()
+                print(f"Error sending email (attempt {attempt + 1}/{self.retries + 1}): {str(e)}")
+                if attempt < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+
+        self.failed += 1
+        if pending_id is None:
+            self._park(sections)
+        print(f"📥 Undelivered digest kept in {self.pending_file}")
+        return False
+
+    def _park(self, sections):
+        """Add a digest to the pending notifications file; returns its id (None if it could not be saved)"""
+        try:
+            with self.pending_lock:
+                pending = load_json_state(self.pending_file) or {}
+                digests = pending.get('digests', [])
+                digest_id = uuid.uuid4().hex
+                digests.append({
+                    'id': digest_id,
+                    'queued_at': datetime.now().isoformat(timespec='seconds'),
+                    'sections': sections,
+                })
+                save_json_state(self.pending_file, {'digests': digests})
+            return digest_id
+        except Exception as e:
+            print(f"Error saving pending notification: {str(e)}")
+            return None
+
+    def _unpark(self, pending_id):
+        """Remove a digest that has now been sent from the pending notifications file"""
+        try:
+            with self.pending_lock:
+                pending = load_json_state(self.pending_file) or {}
+                digests = [digest for digest in pending.get('digests', []) if digest.get('id') != pending_id]
+                save_json_state(self.pending_file, {'digests': digests})
+        except Exception as e:
+            print(f"Error updating pending notifications: {str(e)}")
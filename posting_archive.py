@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Posting History Archive
+Appends every run's observations to columnar NumPy segments and answers trend
+questions (postings per department per day, time to removal, arrival hours)
+with vectorized queries
+"""
+
+import glob
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from job_store import job_key
+
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'posting_archive')
+COMPACT_AFTER_SEGMENTS = int(os.getenv('ARCHIVE_COMPACT_AFTER', '48'))  # Run segments merged into month files
+STRING_COLUMNS = ('source', 'job_key', 'title', 'location', 'work_arrangement', 'department')
+
+def job_department(job):
+    return job.get('discipline') or job.get('profession') or 'Unknown'
+
+def _encode(values):
+    """Dictionary-encode strings: (sorted unique values, int32 codes)"""
+    table, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return table, codes.astype(np.int32)
+
+def _write_segment(path, columns):
+    """Write columns atomically (np.savez appends .npz, so write to a .tmp.npz first)"""
+    tmp_path = path[:-len('.npz')] + '.tmp.npz'
+    arrays = {'observed_at': columns['observed_at']}
+    for name in STRING_COLUMNS:
+        arrays[f'{name}_values'], arrays[f'{name}_codes'] = columns[name]
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def append_observations(current_todays_jobs, observed_at=None, archive_dir=ARCHIVE_DIR):
+    """Append one run's jobs as a new segment; returns the number of rows written"""
+    observed_at = observed_at or datetime.now()
+    rows = [(source_key, job) for source_key, jobs in current_todays_jobs.items() for job in jobs]
+    if not rows:
+        return 0
+    os.makedirs(archive_dir, exist_ok=True)
+    columns = {
+        'observed_at': np.full(len(rows), np.datetime64(observed_at.replace(microsecond=0), 's')),
+        'source': _encode([source_key for source_key, _ in rows]),
+        'job_key': _encode([job_key(job) for _, job in rows]),
+        'title': _encode([job['title'] for _, job in rows]),
+        'location': _encode([job.get('location', 'Unknown') for _, job in rows]),
+        'work_arrangement': _encode([job.get('work_arrangement', 'Unknown') for _, job in rows]),
+        'department': _encode([job_department(job) for _, job in rows]),
+    }
+    name = f"segment-{observed_at.strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}.npz"
+    _write_segment(os.path.join(archive_dir, name), columns)
+    return len(rows)
+
+def _read(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def _concat(parts):
+    """Concatenate segments, re-encoding every string column against one shared table"""
+    if not parts:
+        empty = np.array([], dtype=str)
+        return {'observed_at': np.array([], dtype='datetime64[s]'),
+                **{name: (empty, np.array([], dtype=np.int32)) for name in STRING_COLUMNS}}
+    columns = {'observed_at': np.concatenate([part['observed_at'] for part in parts])}
+    for name in STRING_COLUMNS:
+        tables = [part[f'{name}_values'] for part in parts]
+        offsets = np.cumsum([0] + [len(table) for table in tables[:-1]])
+        codes = np.concatenate([part[f'{name}_codes'] + offset for part, offset in zip(parts, offsets)])
+        table, inverse = np.unique(np.concatenate(tables), return_inverse=True)
+        columns[name] = (table, inverse.astype(np.int32)[codes])
+    return columns
+
+def compact(archive_dir=ARCHIVE_DIR, min_segments=COMPACT_AFTER_SEGMENTS):
+    """Merge run segments into one file per month once there are min_segments of them
+
+    Keeps the number of files a year-long query has to open small. Month files
+    are rewritten with their new rows; the merged segments are removed after.
+    """
+    segments = sorted(glob.glob(os.path.join(archive_dir, 'segment-*.npz')))
+    if len(segments) < min_segments:
+        return 0
+    by_month = {}
+    for path in segments:
+        month = os.path.basename(path)[len('segment-'):][:6]
+        by_month.setdefault(month, []).append(path)
+    for month, paths in by_month.items():
+        month_path = os.path.join(archive_dir, f"month-{month[:4]}-{month[4:]}.npz")
+        parts = [_read(month_path)] if os.path.exists(month_path) else []
+        parts.extend(_read(path) for path in paths)
+        _write_segment(month_path, _concat(parts))
+        for path in paths:
+            os.remove(path)
+    return len(segments)
+
+def load_archive(archive_dir=ARCHIVE_DIR, since=None):
+    """Load every observation (optionally only those at or after since) as one column set"""
+    paths = sorted(glob.glob(os.path.join(archive_dir, 'month-*.npz')))
+    paths += sorted(glob.glob(os.path.join(archive_dir, 'segment-*.npz')))
+    columns = _concat([_read(path) for path in paths])
+    if since is not None:
+        keep = columns['observed_at'].astype(np.int64) >= _epoch(since)
+        columns = {
+            name: (value[0], value[1][keep]) if name in STRING_COLUMNS else value[keep]
+            for name, value in columns.items()
+        }
+    return columns
+
+def _epoch(when):
+    """Naive local datetime as the archive's int64 seconds"""
+    return np.datetime64(when.replace(microsecond=0), 's').astype(np.int64)
+
+def job_lifetimes(columns, since=None):
+    """Per (source, job key): first and last observation and the row of its first sighting
+
+    With since, only jobs first seen at or after it are returned (their
+    first sighting is still taken from the whole archive).
+    """
+    observed = columns['observed_at'].astype(np.int64)
+    if not len(observed):
+        empty = np.array([], dtype=np.int64)
+        return {'first_row': empty, 'first_seen': empty, 'last_seen': empty, 'source': empty}
+    pair = columns['source'][1].astype(np.int64) * len(columns['job_key'][0]) + columns['job_key'][1]
+    order = np.lexsort((observed, pair))
+    pairs, first_index = np.unique(pair[order], return_index=True)
+    last_index = np.r_[first_index[1:], len(order)] - 1
+    lifetimes = {
+        'first_row': order[first_index],
+        'first_seen': observed[order[first_index]],
+        'last_seen': observed[order[last_index]],
+        'source': columns['source'][1][order[first_index]],
+    }
+    if since is not None:
+        recent = lifetimes['first_seen'] >= _epoch(since)
+        lifetimes = {name: values[recent] for name, values in lifetimes.items()}
+    return lifetimes
+
+def postings_per_department_per_day(columns, since=None):
+    """Return (days, departments, counts[day, department]) of new postings by first-seen day"""
+    lifetimes = job_lifetimes(columns, since)
+    if not len(lifetimes['first_seen']):
+        return np.array([], dtype='datetime64[D]'), columns['department'][0], np.zeros((0, 0), dtype=np.int64)
+    first_day = lifetimes['first_seen'] // 86400
+    departments = columns['department'][1][lifetimes['first_row']]
+    days, day_index = np.unique(first_day, return_inverse=True)
+    department_count = len(columns['department'][0])
+    counts = np.bincount(day_index * department_count + departments, minlength=len(days) * department_count)
+    return days.astype('datetime64[D]'), columns['department'][0], counts.reshape(len(days), department_count)
+
+def time_to_removal_hours(columns, since=None):
+    """Hours between first and last sighting for jobs that have since disappeared
+
+    A job counts as removed when its source's latest run no longer saw it
+    (for a search of jobs updated today, at the latest when its day is over).
+    """
+    lifetimes = job_lifetimes(columns, since)
+    observed = columns['observed_at'].astype(np.int64)
+    sources = columns['source'][1]
+    latest_run = np.full(len(columns['source'][0]), np.iinfo(np.int64).min)
+    np.maximum.at(latest_run, sources, observed)
+    removed = lifetimes['last_seen'] < latest_run[lifetimes['source']]
+    return (lifetimes['last_seen'][removed] - lifetimes['first_seen'][removed]) / 3600
+
+def arrival_hour_histogram(columns, since=None):
+    """Number of jobs first seen in each hour of the day (24 bins)"""
+    first_seen = job_lifetimes(columns, since)['first_seen']
+    return np.bincount((first_seen % 86400) // 3600, minlength=24)
+
+def summarize(days=30, archive_dir=ARCHIVE_DIR):
+    """Print the trend queries for jobs first seen in the last days"""
+    started = datetime.now()
+    since = started - timedelta(days=days)
+    columns = load_archive(archive_dir)
+    loaded = datetime.now()
+    rows = len(columns['observed_at'])
+    print(f"🗃️ {rows} observation(s) loaded in {(loaded - started).total_seconds() * 1000:.0f}ms")
+    if not rows:
+        return
+    days_index, departments, counts = postings_per_department_per_day(columns, since)
+    print(f"📈 New postings per department in the last {days} day(s) (latest 7 days shown):")
+    for day, row in zip(days_index[-7:], counts[-7:]):
+        parts = ', '.join(f"{departments[i]} {row[i]}" for i in np.flatnonzero(row))
+        print(f"  {day}: {row.sum()} ({parts})")
+    durations = time_to_removal_hours(columns, since)
+    if len(durations):
+        print(f"⏳ Time to removal: median {np.median(durations):.1f}h, p90 {np.percentile(durations, 90):.1f}h "
+              f"({len(durations)} removed job(s))")
+    histogram = arrival_hour_histogram(columns, since)
+    busiest = np.argsort(histogram)[::-1][:3]
+    print("🕐 Busiest arrival hours: " + ', '.join(f"{hour:02d}:00 ({histogram[hour]})" for hour in busiest if histogram[hour]))
+    print(f"⚡ Queries finished in {(datetime.now() - loaded).total_seconds() * 1000:.0f}ms")
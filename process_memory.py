@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Process memory accounting
+Measures the resident memory of a process and all of its descendants (e.g. Chromium)
+"""
+
+import os
+import signal
+import time
+
+try:
+    import psutil
+except ImportError:  # Fall back to reading /proc directly
+    psutil = None
+
+def _proc_children_map():
+    """Map each parent pid to its child pids by scanning /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name can contain spaces, so split after its closing parenthesis
+        fields = stat.rsplit(')', 1)[1].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+def _proc_rss_bytes(pid):
+    """Return the resident set size of one process from /proc (0 if gone)"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return 0
+
+def _proc_is_running(pid):
+    """Return True if a process exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return False
+
+def is_running(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    if os.path.isdir('/proc'):
+        return _proc_is_running(pid)
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+def descendant_pids(pid=None):
+    """Return the pids of every descendant of a process (default: this one)"""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir('/proc'):
+        return []
+
+    children = _proc_children_map()
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+def running_descendant_pids(pid=None):
+    """Like descendant_pids, without exited children that have not been reaped yet"""
+    return [child_pid for child_pid in descendant_pids(pid) if is_running(child_pid)]
+
+def process_tree_rss_mb(pid=None, include_self=True):
+    """Return the combined RSS in MB of a process and its descendants"""
+    pid = pid or os.getpid()
+    pids = descendant_pids(pid) + ([pid] if include_self else [])
+    if psutil is not None:
+        total = 0
+        for child_pid in pids:
+            try:
+                total += psutil.Process(child_pid).memory_info().rss
+            except psutil.Error:
+                continue
+    else:
+        total = sum(_proc_rss_bytes(child_pid) for child_pid in pids)
+    return total / (1024 * 1024)
+
+def process_rss_mb(pid=None):
+    """Return the RSS in MB of a single process"""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+    return _proc_rss_bytes(pid) / (1024 * 1024)
+
+def terminate_descendants(pid=None, grace=5.0):
+    """Stop every descendant of a process: SIGTERM, then SIGKILL whatever is left after grace
+
+    The pids are collected first, so grandchildren (Chromium's renderers) are
+    still signalled once their parent exits and they are re-parented.
+    Returns the pids that were signalled.
+    """
+    pids = running_descendant_pids(pid)
+    for sig in (signal.SIGTERM, getattr(signal, 'SIGKILL', signal.SIGTERM)):
+        alive = [child_pid for child_pid in pids if is_running(child_pid)]
+        for child_pid in alive:
+            try:
+                os.kill(child_pid, sig)
+            except OSError:
+                continue
+        deadline = time.monotonic() + grace
+        while alive and time.monotonic() < deadline:
+            time.sleep(0.1)
+            alive = [child_pid for child_pid in alive if is_running(child_pid)]
+        if not alive:
+            break
+    return pids
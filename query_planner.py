@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Search Query Planner
+Sources are described as filter sets (lc, d, rt, et); the planner collapses
+overlapping ones into as few search fetches as possible and filters each
+fetched job list back down to every source locally
+"""
+
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+SEARCH_PAGE_URL = "https://jobs.careers.microsoft.com/global/en/search"
+# Non-filter parameters of every search (language, first page, page size, sort order)
+BASE_SEARCH_PARAMS = [('l', 'en_us'), ('pg', '1'), ('pgSz', '20'), ('o', 'Recent'), ('flt', 'true')]
+
+# Filter parameters and the job fields (from the search API) they are matched against
+FILTER_FIELDS = {
+    'lc': ('location', 'locations'),
+    'd': ('discipline', 'profession'),
+    'rt': ('role_type',),
+    'et': ('employment_type',),
+}
+SUBSTRING_PARAMS = {'lc'}  # "United States" matches "Redmond, Washington, United States"
+
+def _unique(values):
+    """Drop repeated values while keeping their order and original spelling"""
+    seen = set()
+    unique = []
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            unique.append(value)
+    return unique
+
+def normalize_filters(filters):
+    """Return {param: [values]} for the known filter params that restrict something"""
+    return {param: _unique(filters[param]) for param in FILTER_FIELDS if filters.get(param)}
+
+def filters_from_url(url):
+    """Read the filter set out of a careers search URL"""
+    filters = {}
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key in FILTER_FIELDS:
+            filters.setdefault(key, []).append(value)
+    return normalize_filters(filters)
+
+def search_url(filters, base_url=None):
+    """Build a careers search URL for a filter set (keeping base_url's other params)"""
+    if base_url:
+        parts = urlsplit(base_url)
+        other_params = [(key, value) for key, value in parse_qsl(parts.query) if key not in FILTER_FIELDS]
+        page = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    else:
+        other_params = BASE_SEARCH_PARAMS
+        page = SEARCH_PAGE_URL
+    params = [(param, value) for param, values in normalize_filters(filters).items() for value in values]
+    return f"{page}?{urlencode(params + list(other_params), quote_via=quote)}"
+
+def base_signature(url):
+    """Everything about a search except its filters; only searches sharing it can be combined"""
+    parts = urlsplit(url)
+    other_params = sorted((key, value) for key, value in parse_qsl(parts.query) if key not in FILTER_FIELDS and key != 'pg')
+    return (parts.netloc, parts.path, tuple(other_params))
+
+def resolve_sources(sources):
+    """Fill in the search URL of every source defined by its filters"""
+    resolved = {}
+    for source_key, config in sources.items():
+        config = dict(config)
+        if 'filters' in config:
+            config['filters'] = normalize_filters(config['filters'])
+            config.setdefault('url', search_url(config['filters']))
+        resolved[source_key] = config
+    return resolved
+
+def source_filters(config):
+    return normalize_filters(config['filters']) if 'filters' in config else filters_from_url(config['url'])
+
+def _value_set(filters, param):
+    """Lower-cased values of a param, or None when the param does not restrict results"""
+    values = filters.get(param)
+    return {value.lower() for value in values} if values else None
+
+def covers(query, filters):
+    """Return True if every job matching filters is also returned by query"""
+    for param in FILTER_FIELDS:
+        query_values = _value_set(query, param)
+        if query_values is None:
+            continue
+        values = _value_set(filters, param)
+        if values is None or not values <= query_values:
+            return False
+    return True
+
+def merge_filters(a, b):
+    """The smallest single query returning the results of both filter sets"""
+    merged = {}
+    for param in FILTER_FIELDS:
+        if a.get(param) and b.get(param):
+            merged[param] = _unique(a[param] + b[param])
+    return merged
+
+def plan_queries(sources):
+    """Return [(query filters, [source keys])] covering every source
+
+    Two queries are combined when one covers the other, or when they differ
+    in a single param (their union is then exact, so nothing extra is
+    fetched). Combining repeats until no pair qualifies.
+    """
+    groups = [(normalize_filters(filters), [source_key]) for source_key, filters in sources.items()]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                a, b = groups[i][0], groups[j][0]
+                differing = [param for param in FILTER_FIELDS if _value_set(a, param) != _value_set(b, param)]
+                if covers(a, b) or covers(b, a) or len(differing) <= 1:
+                    groups[i] = (merge_filters(a, b), groups[i][1] + groups[j][1])
+                    del groups[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return groups
+
+def job_matches(job, filters):
+    """Return True if a job (search API fields) satisfies a source's filters
+
+    A field the job does not carry is not held against it.
+    """
+    for param, values in normalize_filters(filters).items():
+        job_values = []
+        for field in FILTER_FIELDS[param]:
+            value = job.get(field)
+            if isinstance(value, list):
+                job_values.extend(value)
+            elif value:
+                job_values.append(value)
+        if not job_values:
+            continue
+        wanted = [value.lower() for value in values]
+        job_values = [str(value).lower() for value in job_values]
+        if param in SUBSTRING_PARAMS:
+            matched = any(value in job_value for value in wanted for job_value in job_values)
+        else:
+            matched = any(job_value in wanted for job_value in job_values)
+        if not matched:
+            return False
+    return True
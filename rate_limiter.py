@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Per-host Rate Limiting
+A token bucket per host paces every navigation and HTTP request; the rate is
+halved on 429s, 5xx responses and timeouts, creeps back up after successes,
+and is saved between runs
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; saves are then only safe within one process
+    fcntl = None
+
+import instrumentation
+from job_store import load_json_state, save_json_state
+
+RATE_LIMIT = os.getenv('RATE_LIMIT', '1') == '1'
+RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', '2'))  # Ceiling per host
+RATE_LIMIT_MIN_PER_SECOND = float(os.getenv('RATE_LIMIT_MIN_PER_SECOND', '0.05'))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', '4'))
+RATE_LIMIT_BACKOFF = float(os.getenv('RATE_LIMIT_BACKOFF', '0.5'))  # Rate multiplier after a throttled request
+RATE_LIMIT_RECOVERY = float(os.getenv('RATE_LIMIT_RECOVERY', '0.1'))  # Requests/s regained per success (and per idle minute)
+RATE_LIMIT_STATE_FILE = os.getenv('RATE_LIMIT_STATE_FILE', 'rate_limits.json')
+MAX_RETRY_AFTER_SECONDS = 120  # Longest Retry-After honored before the next request to a host
+
+def request_host(url_or_host):
+    """Return the host a URL (or bare host) is rate limited under"""
+    return urlsplit(url_or_host).netloc if '://' in url_or_host else url_or_host
+
+def is_timeout(error):
+    """True for socket, asyncio and Playwright timeouts"""
+    return isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower()
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+class HostBucket:
+    """Token bucket state for one host"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # Wall-clock time, so it survives a restart
+        self.throttled = 0
+
+class RateLimiter:
+    """Thread-safe per-host token buckets with multiplicative backoff and additive recovery
+
+    With share above 1 this process gets 1/share of every host's rate, burst
+    and recovery, so share processes together stay within the host budget
+    (shard workers). Saved rates are always the whole host's rate.
+    """
+
+    def __init__(self, max_rate=RATE_LIMIT_PER_SECOND, min_rate=RATE_LIMIT_MIN_PER_SECOND, burst=RATE_LIMIT_BURST,
+                 backoff=RATE_LIMIT_BACKOFF, recovery=RATE_LIMIT_RECOVERY, state_path=RATE_LIMIT_STATE_FILE, share=1):
+        self.share = max(1, share)
+        self.max_rate = max_rate / self.share
+        self.min_rate = min_rate / self.share
+        self.burst = max(1.0, burst / self.share)
+        self.backoff = backoff
+        self.recovery = recovery / self.share
+        self.state_path = state_path
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+
+    def _bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = HostBucket(self.max_rate, self.burst)
+        return bucket
+
+    def reserve(self, url):
+        """Take a token for the URL's host and return the seconds to wait before using it
+
+        Tokens may go negative: each caller reserves the next free slot, so
+        concurrent callers are spaced out instead of all waking at once.
+        """
+        host = request_host(url)
+        with self.lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            wait = max(wait, bucket.blocked_until - time.time())
+        if wait > 0:
+            instrumentation.incr('rate_limit_waits')
+            instrumentation.incr('rate_limit_wait_ms', round(wait * 1000))
+        return wait
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, status=None, error=None, retry_after=None):
+        """Adjust the host's rate from the outcome of a request"""
+        host = request_host(url)
+        throttled = status == 429 or (status is not None and status >= 500) or (error is not None and is_timeout(error))
+        with self.lock:
+            bucket = self._bucket(host)
+            if throttled:
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.throttled += 1
+                delay = parse_retry_after(retry_after)
+                if delay:
+                    bucket.blocked_until = max(bucket.blocked_until, time.time() + min(delay, MAX_RETRY_AFTER_SECONDS))
+            elif error is None and status is not None and status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + self.recovery)
+            rate = bucket.rate
+        if throttled:
+            reason = f"HTTP {status}" if status is not None else type(error).__name__
+            print(f"🐢 {host} throttled ({reason}), slowing to {rate * self.share:.2f} req/s")
+            instrumentation.incr('rate_limit_backoffs')
+
+    def load(self):
+        """Restore saved rates, crediting the idle time since they were saved as recovery"""
+        now = time.time()
+        for host, saved in load_json_state(self.state_path).items():
+            try:
+                idle_minutes = max(0.0, (now - saved['saved_at']) / 60)
+                bucket = self._bucket(host)
+                rate = saved['rate'] / self.share + idle_minutes * self.recovery
+                bucket.rate = min(self.max_rate, max(self.min_rate, rate))
+                bucket.blocked_until = saved.get('blocked_until', 0.0)
+            except (KeyError, TypeError):
+                continue
+        return self
+
+    def save(self):
+        """Persist the hosts that are below the ceiling or still blocked
+
+        The file is merged under a lock: hosts this limiter never saw keep
+        their saved state, and when another process sharing the budget
+        already saved a host during this run, the slower of the two rates is
+        kept. The file is not rewritten when nothing changed.
+        """
+        now = time.time()
+        with self.lock:
+            slowed = any(bucket.rate < self.max_rate or bucket.blocked_until > now for bucket in self.buckets.values())
+        if not slowed and not os.path.exists(self.state_path):
+            return
+        with self._state_file_lock():
+            saved = load_json_state(self.state_path)
+            state = dict(saved)
+            with self.lock:
+                for host, bucket in self.buckets.items():
+                    entry = None
+                    if bucket.rate < self.max_rate or bucket.blocked_until > now:
+                        entry = {'rate': round(bucket.rate * self.share, 4), 'blocked_until': bucket.blocked_until,
+                                 'saved_at': now}
+                    previous = saved.get(host)
+                    if previous and previous.get('saved_at', 0) >= self.created_at:
+                        if entry is None or previous.get('rate', entry['rate']) <= entry['rate']:
+                            continue
+                    if entry is None:
+                        state.pop(host, None)
+                    else:
+                        state[host] = entry
+            if state != saved:
+                save_json_state(self.state_path, state)
+
+    @contextmanager
+    def _state_file_lock(self):
+        """Hold an exclusive lock on the state file's companion .lock file"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.state_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def describe(self):
+        """One line per slowed-down host, e.g. 'host: 0.50 req/s (2 throttled)'"""
+        with self.lock:
+            return [
+                f"{host}: {bucket.rate * self.share:.2f} req/s ({bucket.throttled} throttled)"
+                for host, bucket in self.buckets.items() if bucket.rate < self.max_rate
+            ]
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+_limiter_share = 1
+
+def shared_limiter():
+    """The process-wide limiter every fetcher goes through (None when RATE_LIMIT=0)"""
+    global _shared_limiter
+    if not RATE_LIMIT:
+        return None
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(share=_limiter_share).load()
+        return _shared_limiter
+
+def share_limiter(processes):
+    """Give this process 1/processes of every host's budget (call before the first fetch)
+
+    Each shard worker is a separate process with its own limiter; splitting
+    the budget keeps all of them together at the configured per-host rate.
+    """
+    global _limiter_share, _shared_limiter
+    with _shared_lock:
+        _limiter_share = max(1, processes)
+        _shared_limiter = None
+
+def save_shared_limiter():
+    """Persist the shared limiter's state, reporting hosts that are still slowed down"""
+    if _shared_limiter is None:
+        return
+    for line in _shared_limiter.describe():
+        print(f"🐢 Rate limit carried over: {line}")
+    try:
+        _shared_limiter.save()
+    except Exception as e:
+        print(f"Error saving rate limit state: {str(e)}")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Run Watchdog for Long-Running Monitors
+Supervises each check with a total and per-phase time budget, terminates the
+browser processes when a budget is overrun, and records RSS and child-process
+counts per check so memory growth across days of uptime shows up
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import instrumentation
+from process_memory import process_rss_mb, process_tree_rss_mb, running_descendant_pids, terminate_descendants
+
+RUN_WATCHDOG = os.getenv('RUN_WATCHDOG', '1') == '1'
+RUN_BUDGET_SECONDS = float(os.getenv('RUN_BUDGET_SECONDS', '900'))  # Whole check, browser and email included
+# Budget per span of a phase (phases repeat per source), as phase=seconds pairs
+PHASE_BUDGETS = os.getenv('PHASE_BUDGETS', 'navigation=180,wait=120,extraction=300,http_fetch=180,enrichment=300,email=120')
+WATCHDOG_POLL_SECONDS = float(os.getenv('WATCHDOG_POLL_SECONDS', '5'))
+KILL_GRACE_SECONDS = float(os.getenv('WATCHDOG_KILL_GRACE_SECONDS', '10'))  # SIGTERM to SIGKILL
+# After killing the browser the check must return within this long, else the process exits
+# for the service manager to restart it (0 = never exit)
+EXIT_GRACE_SECONDS = float(os.getenv('WATCHDOG_EXIT_GRACE_SECONDS', '120'))
+WATCHDOG_HISTORY_FILE = os.getenv('WATCHDOG_HISTORY_FILE', 'watchdog_history.jsonl')  # One record per check
+MEMORY_TREND_CHECKS = int(os.getenv('MEMORY_TREND_CHECKS', '24'))
+MEMORY_GROWTH_WARN_MB = float(os.getenv('MEMORY_GROWTH_WARN_MB', '100'))  # Over MEMORY_TREND_CHECKS checks
+HUNG_EXIT_CODE = 75
+
+class BudgetExceeded(Exception):
+    """Raised inside a check that is still running after the watchdog stopped it"""
+
+def parse_phase_budgets(value):
+    """Parse 'phase=seconds,...' into a dict, skipping malformed pairs"""
+    budgets = {}
+    for pair in value.split(','):
+        phase, _, seconds = pair.partition('=')
+        try:
+            budgets[phase.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return budgets
+
+def memory_trend(rss_values):
+    """Least-squares slope of RSS per check in MB (0 with fewer than two values)"""
+    count = len(rss_values)
+    if count < 2:
+        return 0.0
+    mean_x = (count - 1) / 2
+    mean_y = sum(rss_values) / count
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(rss_values))
+    variance = sum((x - mean_x) ** 2 for x in range(count))
+    return covariance / variance
+
+class RunWatchdog:
+    """Runs checks under time budgets while sampling process memory from a watcher thread
+
+    Span start/end events from instrumentation tell the watcher which phases
+    are open. On an overrun every child process (the Playwright driver and
+    Chromium) is terminated, which makes the blocked browser call fail and the
+    check unwind; a check that still does not return ends the process.
+    """
+
+    def __init__(self, total_budget=RUN_BUDGET_SECONDS, phase_budgets=None, poll_seconds=WATCHDOG_POLL_SECONDS,
+                 kill_grace=KILL_GRACE_SECONDS, exit_grace=EXIT_GRACE_SECONDS, history_path=WATCHDOG_HISTORY_FILE,
+                 log=print):
+        self.total_budget = total_budget
+        self.phase_budgets = parse_phase_budgets(PHASE_BUDGETS) if phase_budgets is None else phase_budgets
+        self.poll_seconds = poll_seconds
+        self.kill_grace = kill_grace
+        self.exit_grace = exit_grace
+        self.history_path = history_path
+        self.log = log
+        self.lock = threading.Lock()
+        self.open_phases = []
+        self.overrun = None
+        self.overruns = 0
+        self.started = None
+        self.rss_peak_mb = 0.0
+        self.children_peak = 0
+
+    def _on_span(self, event, phase):
+        with self.lock:
+            if event == 'start':
+                self.open_phases.append((phase, time.monotonic()))
+                return
+            for index, (open_phase, _) in enumerate(self.open_phases):
+                if open_phase == phase:
+                    del self.open_phases[index]
+                    break
+
+    def _sample(self):
+        children = len(running_descendant_pids())
+        rss_mb = process_tree_rss_mb()
+        self.rss_peak_mb = max(self.rss_peak_mb, rss_mb)
+        self.children_peak = max(self.children_peak, children)
+        return rss_mb, children
+
+    def overrun_reason(self, now=None):
+        """Return why the running check is over budget (None while it is within budget)"""
+        now = now or time.monotonic()
+        elapsed = now - self.started
+        if self.total_budget and elapsed > self.total_budget:
+            return f"check ran {elapsed:.0f}s (budget {self.total_budget:.0f}s)"
+        with self.lock:
+            open_phases = list(self.open_phases)
+        for phase, started in open_phases:
+            budget = self.phase_budgets.get(phase)
+            if budget and now - started > budget:
+                return f"phase '{phase}' ran {now - started:.0f}s (budget {budget:.0f}s)"
+        return None
+
+    def check_budget(self):
+        """Raise BudgetExceeded if the current check has already been stopped"""
+        if self.overrun:
+            raise BudgetExceeded(self.overrun)
+
+    def _watch(self, finished):
+        while not finished.wait(self.poll_seconds):
+            self._sample()
+            reason = self.overrun_reason()
+            if reason is None:
+                continue
+            self.overrun = reason
+            self.log(f"🛑 Watchdog: {reason}, terminating browser processes")
+            pids = terminate_descendants(grace=self.kill_grace)
+            self.log(f"🛑 Watchdog: stopped {len(pids)} child process(es)")
+            if self.exit_grace and not finished.wait(self.exit_grace):
+                self.log(f"🛑 Watchdog: check still hung {self.exit_grace:.0f}s after the kill, exiting for a restart")
+                self.record(False, rss_start_mb=None, leaked=0)
+                os._exit(HUNG_EXIT_CODE)
+            return
+
+    def supervise(self, check, reap_children=False):
+        """Run check() under the budgets and return its result (False after an overrun)
+
+        With reap_children, child processes still alive after the check (a
+        leaked Chromium from a cold run) are terminated.
+        """
+        self.open_phases = []
+        self.overrun = None
+        self.started = time.monotonic()
+        self.started_at = datetime.now()
+        self.rss_peak_mb = 0.0
+        self.children_peak = 0
+        rss_start_mb, _ = self._sample()
+        finished = threading.Event()
+        watcher = threading.Thread(target=self._watch, args=(finished,), name='run-watchdog', daemon=True)
+        instrumentation.add_run_listener(self._on_span)
+        watcher.start()
+        try:
+            result = check()
+        finally:
+            finished.set()
+            instrumentation.remove_run_listener(self._on_span)
+            watcher.join()
+        if self.overrun:
+            self.overruns += 1
+            self.log(f"🛑 Watchdog: {self.overruns} check(s) over budget since the monitor started")
+            result = False
+        leaked = 0
+        if reap_children and running_descendant_pids():
+            leaked = len(terminate_descendants(grace=self.kill_grace))
+            self.log(f"🧹 Watchdog: terminated {leaked} leftover child process(es)")
+        self.record(result, rss_start_mb, leaked)
+        return result
+
+    def record(self, success, rss_start_mb, leaked):
+        """Append this check's timing and memory to the history file and report the trend"""
+        rss_end_mb, children = self._sample()
+        entry = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': round(time.monotonic() - self.started, 1),
+            'success': bool(success),
+            'overrun': self.overrun,
+            'rss_start_mb': round(rss_start_mb, 1) if rss_start_mb is not None else None,
+            'rss_end_mb': round(rss_end_mb, 1),
+            'rss_peak_mb': round(self.rss_peak_mb, 1),
+            'python_rss_mb': round(process_rss_mb(), 1),
+            'children_end': children,
+            'children_peak': self.children_peak,
+            'leaked_children': leaked,
+        }
+        try:
+            with open(self.history_path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+            history = self.load_history()
+        except Exception as e:
+            print(f"Error writing watchdog history: {str(e)}")
+            history = [entry]
+
+        trend = memory_trend([item['python_rss_mb'] for item in history])
+        self.log(f"🧠 Memory: {entry['python_rss_mb']:.0f}MB monitor + "
+                 f"{max(0.0, rss_end_mb - entry['python_rss_mb']):.0f}MB in {children} child process(es) "
+                 f"(peak {self.rss_peak_mb:.0f}MB), {trend:+.1f}MB/check over the last {len(history)} check(s)")
+        if len(history) >= MEMORY_TREND_CHECKS and trend * len(history) > MEMORY_GROWTH_WARN_MB:
+            self.log(f"⚠️ Monitor memory grew about {trend * len(history):.0f}MB over {len(history)} checks")
+        return entry
+
+    def load_history(self, checks=MEMORY_TREND_CHECKS):
+        """Return the last checks history records"""
+        with open(self.history_path) as f:
+            return [json.loads(line) for line in deque(f, maxlen=checks) if line.strip()]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Microsoft Careers search API helpers
+Builds job dicts straight from the JSON search payload the careers page renders from
+"""
+
+import hashlib
+import re
+from datetime import date, datetime
+
+from instrumentation import trace
+
+# The careers page loads its results from this endpoint
+SEARCH_API_URL = "https://gcsservices.careers.microsoft.com/search/api/v1/search"
+SEARCH_API_PATTERN = re.compile(r'/search/api/v\d+/search\b')
+JOB_DETAIL_URL = "https://jobs.careers.microsoft.com/global/en/job/{job_id}"
+
+def is_search_api_url(url):
+    """Return True if the URL is a careers search API request"""
+    return bool(SEARCH_API_PATTERN.search(url))
+
+def search_api_url(page_url):
+    """Map a careers search page URL onto the equivalent search API URL"""
+    query = page_url.split('?', 1)[1] if '?' in page_url else ''
+    return f"{SEARCH_API_URL}?{query}"
+
+def parse_posting_date(value):
+    """Parse an ISO posting timestamp into a local date (None if unparseable)"""
+    if not value:
+        return None
+    try:
+        value = value.replace('Z', '+00:00')
+        # Trim fractional seconds to the 6 digits datetime.fromisoformat accepts
+        value = re.sub(r'(\.\d{6})\d+', r'\1', value)
+        posted = datetime.fromisoformat(value)
+        if posted.tzinfo is not None:
+            posted = posted.astimezone()
+        return posted.date()
+    except ValueError:
+        return None
+
+def payload_jobs(payload):
+    """Return the raw job entries and total result count from a search payload
+
+    A payload of the wrong shape yields no entries, and entries that are not
+    objects are skipped.
+    """
+    operation = payload.get('operationResult') if isinstance(payload, dict) else None
+    result = operation.get('result') if isinstance(operation, dict) else None
+    if not isinstance(result, dict):
+        return [], 0
+    jobs = result.get('jobs')
+    entries = [entry for entry in jobs if isinstance(entry, dict)] if isinstance(jobs, list) else []
+    return entries, result.get('totalJobs', 0)
+
+def job_from_api_entry(entry, today=None):
+    """Build a job dict in the extract_todays_jobs format from one API job entry"""
+    today = today or date.today()
+    properties = entry.get('properties') or {}
+    posted = parse_posting_date(entry.get('postingDate'))
+    locations = properties.get('locations') or []
+    location = properties.get('primaryLocation') or (locations[0] if locations else 'Unknown')
+    job_id = str(entry.get('jobId', ''))
+
+    job = {
+        'title': re.sub(r'\s+', ' ', entry.get('title', '')).strip(),
+        'updated_date': 'Today' if posted == today else (posted.isoformat() if posted else 'Unknown'),
+        'location': location or 'Unknown',
+        'work_arrangement': properties.get('workSiteFlexibility') or 'Unknown',
+        'element_text': "Found in search API payload",
+        'job_id': job_id,
+        'posted_date': entry.get('postingDate'),
+        'link': JOB_DETAIL_URL.format(job_id=job_id) if job_id else None,
+        'profession': properties.get('profession'),
+        'discipline': properties.get('discipline'),
+        'role_type': properties.get('roleType'),
+        'employment_type': properties.get('employmentType'),
+        'locations': locations,
+    }
+    # Only keep the optional fields the payload actually provided
+    return {key: value for key, value in job.items() if value not in (None, '', [])}
+
+def jobs_from_search_payload(payload, seen_jobs, today=None):
+    """Return (today's jobs, entries on the page, last entry is from today) for one payload"""
+    entries, _ = payload_jobs(payload)
+    todays_jobs = []
+    last_is_today = False
+    for entry in entries:
+        job = job_from_api_entry(entry, today)
+        last_is_today = job['updated_date'] == 'Today'
+        if not last_is_today or not job.get('title'):
+            continue
+        key = job.get('job_id') or job['title']
+        if key in seen_jobs:
+            trace(f"Duplicate job found (search API), skipping: {job['title']}")
+            continue
+        seen_jobs.add(key)
+        todays_jobs.append(job)
+        print(f"Found job updated today (search API): {job['title']} - {job['location']} - {job['work_arrangement']}")
+    return todays_jobs, len(entries), last_is_today
+
+def fingerprint_search_payload(payload, today=None):
+    """Return a short hash of the job IDs and posting dates in a search payload"""
+    today = today or date.today()
+    entries, total = payload_jobs(payload)
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(f"{entry.get('jobId')}|{entry.get('postingDate')}\n".encode())
+    return f"{today.isoformat()}:{total}:{digest.hexdigest()[:16]}"
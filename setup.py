@@ -43,7 +43,7 @@ def main():
     print("Setup completed successfully!")
     print("\nNext steps:")
     print("1. Run: python career_monitor.py")
-    print("2. Check the generated screenshot to verify the page loaded correctly")
+    print("2. If a source looks wrong, check debug_artifacts/ for its screenshot and DOM")
     
     return True
 
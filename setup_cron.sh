@@ -11,7 +11,7 @@ echo "📁 Script directory: $SCRIPT_DIR"
 echo "🐍 Python path: $PYTHON_PATH"
 
 # Create the cron job
-CRON_JOB="0 * * * * cd $SCRIPT_DIR && $PYTHON_PATH hourly_monitor.py >> monitor.log 2>&1"
+CRON_JOB="0 * * * * cd $SCRIPT_DIR && $PYTHON_PATH monitor_cli.py check >> monitor.log 2>&1"
 
 echo "⏰ Adding cron job: $CRON_JOB"
 
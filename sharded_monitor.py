@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Sharded Microsoft Career Monitoring
+Spreads many job sources over worker processes, each with its own browser,
+and merges their partial results into the job store from a single writer
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+import instrumentation
+from career_monitor import (
+    HTTP_FAST_PATH, apply_navigation_profile, monitor_source, monitor_query_http, plan_source_queries,
+)
+from debug_capture import anomaly_reasons, capture_page, merge_job_counts, take_job_counts
+from job_store import open_job_store
+from rate_limiter import save_shared_limiter, share_limiter
+
+SHARD_RESULTS_DIR = os.getenv('SHARD_RESULTS_DIR', 'shard_results')
+
+class PartialResultStore:
+    """Read-only view of the job store for a worker; writes are buffered for the merge"""
+
+    def __init__(self, store):
+        self.store = store
+        self.unchanged = set()
+        self.fingerprints = {}
+
+    def previous_jobs(self, source_key):
+        return self.store.previous_jobs(source_key)
+
+    def unseen_jobs(self, source_key, jobs):
+        return self.store.unseen_jobs(source_key, jobs)
+
+    def get_fingerprint(self, source_key):
+        return self.store.get_fingerprint(source_key)
+
+    def set_fingerprint(self, source_key, fingerprint):
+        self.fingerprints[source_key] = fingerprint
+
+    def keep(self, source_key):
+        self.unchanged.add(source_key)
+
+def write_partial(out, entry):
+    """Append one result line and force it to disk so a crash keeps finished sources"""
+    out.write(json.dumps(entry) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+def shard_worker(worker_id, work_queue, partial_path, workers=1):
+    """Worker process: take planned queries off the shared queue until it is empty
+
+    Each query is tried over HTTP first (when enabled) and fanned out to its
+    sources; the worker only launches its own Chromium once a source needs it.
+    Its rate limiter gets 1/workers of each host's budget.
+    """
+    share_limiter(workers)
+    metrics = instrumentation.start_run()
+    store = PartialResultStore(open_job_store())
+    client = None
+    playwright = browser = page = None
+    if HTTP_FAST_PATH:
+        from http_client import HttpClient
+        client = HttpClient()
+
+    try:
+        with open(partial_path, 'a') as out:
+            while True:
+                try:
+                    item = work_queue.get(timeout=5)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                url, members = item
+                results = {}
+                if client is not None:
+                    try:
+                        results = monitor_query_http(client, url, members, store) or {}
+                    except Exception as e:
+                        print(f"Error monitoring {', '.join(members)} over HTTP in worker {worker_id}: {str(e)}")
+                        instrumentation.incr('tier_http_misses', len(members))
+                for source_key, (config, _) in members.items():
+                    try:
+                        result = results.get(source_key)
+                        if result is None:
+                            if page is None:
+                                from playwright.sync_api import sync_playwright
+                                with instrumentation.span('browser_launch'):
+                                    playwright = sync_playwright().start()
+                                    browser = playwright.chromium.launch(headless=True)
+                                    context = browser.new_context()
+                                    apply_navigation_profile(context)
+                                    page = context.new_page()
+                            instrumentation.incr('tier_browser_sources')
+                            result = monitor_source(page, source_key, config, store)
+                        write_partial(out, {
+                            'source': source_key,
+                            'jobs': result[0],
+                            'new_jobs': result[1],
+                            'unchanged': source_key in store.unchanged,
+                            'fingerprint': store.fingerprints.get(source_key),
+                        })
+                    except Exception as e:
+                        print(f"Error monitoring {config['name']} in worker {worker_id}: {str(e)}")
+                        if page is not None:
+                            capture_page(page, source_key, anomaly_reasons(source_key, {}, [], error=e), config.get('url'))
+                        write_partial(out, {'source': source_key, 'error': str(e)})
+            write_partial(out, {
+                'worker': worker_id,
+                'counters': metrics.counters,
+                'phase_seconds': metrics.phase_seconds,
+                'job_counts': take_job_counts(),  # Saved once by the parent
+            })
+    finally:
+        if client is not None:
+            client.close()
+        for close in (lambda: browser and browser.close(), lambda: playwright and playwright.stop()):
+            try:
+                close()
+            except Exception:
+                pass
+        save_shared_limiter()
+        store.store.close()
+
+def merge_partial_results(paths, sources, store):
+    """Fold the workers' partial results into the store; returns (current jobs, new jobs)
+
+    Runs in the parent process only, so the store has a single writer. A
+    source without a usable result keeps its previous jobs instead of being
+    dropped from the state.
+    """
+    current_todays_jobs = {}
+    all_new_jobs = []
+    run = instrumentation.current_run()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A worker died mid-write
+                if 'worker' in entry:
+                    run.absorb(entry['counters'], entry['phase_seconds'])
+                    merge_job_counts(entry.get('job_counts', {}))
+                    continue
+                source_key = entry['source']
+                if 'error' in entry or source_key not in sources:
+                    continue
+                if entry['unchanged']:
+                    store.keep(source_key)
+                elif entry['fingerprint']:
+                    store.set_fingerprint(source_key, entry['fingerprint'])
+                current_todays_jobs[source_key] = entry['jobs']
+                all_new_jobs.extend(entry['new_jobs'])
+
+    missing = [source_key for source_key in sources if source_key not in current_todays_jobs]
+    if missing:
+        print(f"⚠️ No result for {len(missing)} source(s), keeping their previous jobs: {', '.join(missing)}")
+    for source_key in missing:
+        store.keep(source_key)
+        current_todays_jobs[source_key] = store.previous_jobs(source_key)
+    return current_todays_jobs, all_new_jobs
+
+def monitor_sources_sharded(sources, store, workers):
+    """Monitor sources on a pool of worker processes fed from one shared queue"""
+    # Overlapping sources share one queue item (one fetch) when the planner can collapse them
+    plan = plan_source_queries(sources) if HTTP_FAST_PATH else [
+        (config['url'], {source_key: (config, None)}) for source_key, config in sources.items()
+    ]
+    workers = max(1, min(workers, len(plan)))
+    run_id = instrumentation.current_run().run_id
+    os.makedirs(SHARD_RESULTS_DIR, exist_ok=True)
+    print(f"\n🧩 Sharding {len(sources)} sources ({len(plan)} queries) over {workers} worker process(es)")
+
+    # Spawned (not forked) workers start clean, without this process's threads or browser state
+    mp = multiprocessing.get_context('spawn')
+    work_queue = mp.Queue()
+    for item in plan:
+        work_queue.put(item)
+    for _ in range(workers):
+        work_queue.put(None)
+
+    paths = [os.path.join(SHARD_RESULTS_DIR, f"{run_id}-worker{worker_id}.jsonl") for worker_id in range(workers)]
+    started = time.monotonic()
+    processes = [
+        mp.Process(target=shard_worker, args=(worker_id, work_queue, path, workers), name=f"shard-{worker_id}")
+        for worker_id, path in enumerate(paths)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            print(f"⚠️ Worker {process.name} exited with code {process.exitcode}")
+    work_queue.cancel_join_thread()  # Items left behind by crashed workers are reported as missing
+    print(f"🧩 Workers finished in {time.monotonic() - started:.1f}s, merging results")
+
+    with instrumentation.span('merge'):
+        results = merge_partial_results(paths, sources, store)
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return results
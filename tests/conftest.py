@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """State files (rate limits, outbox, metrics) are relative paths, so keep them in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+
+class StubServer:
+    """Local HTTP server answering from a script of (status, headers, body) responses
+
+    Responses are served in order; the last one repeats. Setting route to a
+    function of the request path answers from it instead. Bodies that are
+    not bytes are sent as JSON. close_after_response makes the server drop
+    the kept-alive connection after every response.
+    """
+
+    def __init__(self):
+        self.responses = [(200, {}, {})]
+        self.route = None
+        self.requests = []
+        self.close_after_response = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                if stub.route is not None:
+                    status, headers, body = stub.route(self.path)
+                else:
+                    status, headers, body = stub.responses[min(len(stub.requests), len(stub.responses)) - 1]
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.wfile.flush()
+                if stub.close_after_response:
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def host(self):
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    def url(self, path='/'):
+        return f"http://{self.host}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def http_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+import debug_capture
+import instrumentation
+from debug_capture import anomaly_reasons, merge_job_counts, record_job_count, save_job_counts, take_job_counts
+from sharded_monitor import merge_partial_results, write_partial
+
+JOBS = [{'title': f'Data Scientist {n}', 'updated_date': 'Today'} for n in range(6)]
+
+@pytest.fixture(autouse=True)
+def capture_enabled(monkeypatch):
+    monkeypatch.setattr(debug_capture, 'DEBUG_CAPTURE', True)
+    monkeypatch.setattr(debug_capture, '_job_counts', {})
+    monkeypatch.setattr(debug_capture, '_recorded_counts', {})
+
+def saved_counts():
+    with open('job_counts.json') as f:
+        return {source: entry['count'] for source, entry in json.load(f).items()}
+
+def test_job_counts_are_saved_once_per_run():
+    record_job_count('ds', JOBS)
+    record_job_count('de', JOBS[:2])
+    assert not os.path.exists('job_counts.json')
+    save_job_counts()
+    assert saved_counts() == {'ds': 6, 'de': 2}
+
+def test_a_sudden_drop_is_reported_on_the_next_run():
+    assert anomaly_reasons('ds', {}, JOBS) == []
+    record_job_count('ds', JOBS)
+    save_job_counts()
+    assert anomaly_reasons('ds', {}, JOBS[:2]) == ["job count dropped from 6 to 2"]
+    assert anomaly_reasons('ds', {}, JOBS[:4]) == []
+
+def test_checking_for_anomalies_records_no_count():
+    record_job_count('ds', JOBS)
+    save_job_counts()
+    assert anomaly_reasons('ds', {}, [], error=TimeoutError())[0] == "exception: TimeoutError"
+    save_job_counts()
+    assert saved_counts() == {'ds': 6}
+
+def test_shard_workers_hand_their_counts_to_the_parent():
+    instrumentation.start_run()
+    # Each worker records its own sources and sends them back with its summary
+    paths = []
+    for worker_id, (source_key, jobs) in enumerate([('ds', JOBS), ('de', JOBS[:3])]):
+        record_job_count(source_key, jobs)
+        path = f'worker{worker_id}.jsonl'
+        with open(path, 'w') as out:
+            write_partial(out, {'source': source_key, 'jobs': jobs, 'new_jobs': [], 'unchanged': False,
+                                'fingerprint': None})
+            write_partial(out, {'worker': worker_id, 'counters': {}, 'phase_seconds': {},
+                                'job_counts': take_job_counts()})
+        paths.append(path)
+    assert not os.path.exists('job_counts.json')
+
+    class Store:
+        def set_fingerprint(self, source_key, fingerprint):
+            pass
+
+    merge_partial_results(paths, {'ds': {}, 'de': {}}, Store())
+    save_job_counts()
+    assert saved_counts() == {'ds': 6, 'de': 3}
+
+def test_counts_merged_from_another_process_keep_the_saved_ones():
+    record_job_count('ds', JOBS)
+    save_job_counts()
+    merge_job_counts({'de': {'date': '2025-03-04', 'count': 1}})
+    save_job_counts()
+    assert saved_counts() == {'ds': 6, 'de': 1}
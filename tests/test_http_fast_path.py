@@ -0,0 +1,130 @@
+import json
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import career_monitor
+import debug_capture
+import instrumentation
+import rate_limiter
+import search_api
+from conftest import load_fixture
+from http_client import HttpClient
+
+TODAY = date(2025, 3, 4)
+SEARCH_PAGE = "https://jobs.careers.microsoft.com/global/en/search?q={query}&pg=1&pgSz=3&o=Recent"
+
+class FrozenDate(date):
+    @classmethod
+    def today(cls):
+        return TODAY
+
+@pytest.fixture(autouse=True)
+def offline_run(monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMIT', False)
+    monkeypatch.setattr(search_api, 'date', FrozenDate)
+    monkeypatch.setattr(career_monitor, 'date', FrozenDate)
+    monkeypatch.setattr(debug_capture, 'date', FrozenDate)
+    monkeypatch.setattr(debug_capture, 'DEBUG_CAPTURE', True)
+    monkeypatch.setattr(debug_capture, '_job_counts', {})
+    monkeypatch.setattr(debug_capture, '_recorded_counts', {})
+    monkeypatch.setattr(career_monitor, 'STATE_BACKEND', 'json', raising=False)
+    monkeypatch.setattr(career_monitor, 'SHARD_WORKERS', 0)
+    monkeypatch.setattr(career_monitor, 'HTTP_FAST_PATH', True)
+
+@pytest.fixture
+def careers_api(http_server, monkeypatch):
+    """Point the search API at the local server: q=data answers, q=analyst fails, q=empty has no jobs"""
+    def route(path):
+        query = parse_qs(urlsplit(path).query)
+        term, page_number = query['q'][0], query.get('pg', ['1'])[0]
+        if term == 'data':
+            return 200, {}, load_fixture('search_page1.json' if page_number == '1' else 'search_page2.json')
+        if term == 'analyst':
+            return 503, {}, b'Service Unavailable'
+        return 200, {}, {'operationResult': {'result': {'jobs': [], 'totalJobs': 0}}}
+    http_server.route = route
+    monkeypatch.setattr(career_monitor, 'search_api_url',
+                        lambda page_url: http_server.url('/search/api/v1/search?' + page_url.split('?', 1)[1]))
+    return http_server
+
+@pytest.fixture
+def browser_tier(monkeypatch):
+    """Stand-in for the Chromium tier: records the sources escalated to it"""
+    escalated = []
+
+    def monitor_sources(sources, store):
+        escalated.extend(sources)
+        jobs = {key: [{'title': f'Browser job for {key}', 'updated_date': 'Today'}] for key in sources}
+        return jobs, []
+    monkeypatch.setattr(career_monitor, 'monitor_sources', monitor_sources)
+    return escalated
+
+def sources(*queries):
+    return {f"{query}_jobs": {'name': f"{query.title()} jobs", 'url': SEARCH_PAGE.format(query=query)}
+            for query in queries}
+
+def test_stale_keep_alive_connection_is_retried_once(http_server):
+    http_server.close_after_response = True
+    http_server.responses = [(200, {}, {'page': 1}), (200, {}, {'page': 2})]
+    with HttpClient(limiter=False) as client:
+        assert client.get_json(http_server.url('/a')) == {'page': 1}
+        # The server closed the idle connection; the client reconnects instead of failing
+        assert client.get_json(http_server.url('/b')) == {'page': 2}
+    assert http_server.requests == ['/a', '/b']
+    assert client.requests == 2
+    assert client.reused == 0
+
+def test_kept_alive_connection_is_reused(http_server):
+    with HttpClient(limiter=False) as client:
+        for _ in range(3):
+            client.get_json(http_server.url('/search'))
+    assert client.requests == 3
+    assert client.reused == 2
+
+def test_sources_answered_over_http_skip_the_browser(careers_api, browser_tier):
+    assert career_monitor.main(sources=sources('data'), dry_run=True)
+    assert browser_tier == []
+    assert career_monitor.last_run_stats['current_jobs'] == 4
+    counters = instrumentation.current_run().counters
+    assert counters['tier_http_attempts'] == 1
+    assert counters['tier_http_hits'] == 1
+    assert counters.get('tier_http_misses', 0) == 0
+    assert counters['tier_browser_sources'] == 0
+
+def test_failed_or_empty_http_answers_fall_back_to_the_browser(careers_api, browser_tier, capsys):
+    assert career_monitor.main(sources=sources('data', 'analyst', 'empty'), dry_run=True)
+    assert sorted(browser_tier) == ['analyst_jobs', 'empty_jobs']
+    assert career_monitor.last_run_stats['current_jobs'] == 4 + 2
+
+    metrics = instrumentation.current_run()
+    counters = metrics.counters
+    assert counters['tier_http_attempts'] == 3
+    assert counters['tier_http_hits'] == 1
+    assert counters['tier_http_misses'] == 2
+    assert counters['tier_browser_sources'] == 2
+    assert metrics.phase_seconds['http_fetch'] > 0
+    assert metrics.phase_seconds['browser_tier'] >= 0
+    assert "📶 Fetch tiers: http 1/3 hit (33%" in capsys.readouterr().out
+
+def test_unreachable_api_falls_back_to_the_browser(http_server, browser_tier, monkeypatch):
+    url = http_server.url('/search/api/v1/search')
+    http_server.close()
+    monkeypatch.setattr(career_monitor, 'search_api_url', lambda page_url: url + '?' + page_url.split('?', 1)[1])
+    assert career_monitor.main(sources=sources('data'), dry_run=True)
+    assert browser_tier == ['data_jobs']
+    assert instrumentation.current_run().counters['tier_http_misses'] == 1
+
+def test_sources_answered_over_http_record_their_job_count(careers_api, browser_tier):
+    assert career_monitor.main(sources=sources('data'), dry_run=True)
+    with open('job_counts.json') as f:
+        assert json.load(f) == {'data_jobs': {'date': '2025-03-04', 'count': 4}}
+
+def test_a_sudden_drop_over_http_is_rechecked_in_the_browser(careers_api, browser_tier, capsys):
+    with open('job_counts.json', 'w') as f:
+        json.dump({'data_jobs': {'date': '2025-03-04', 'count': 10}}, f)
+    assert career_monitor.main(sources=sources('data'), dry_run=True)
+    assert browser_tier == ['data_jobs']
+    assert instrumentation.current_run().counters['tier_http_anomalies'] == 1
+    assert "job count dropped from 10 to 4, re-checking in the browser" in capsys.readouterr().out
@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+
+import career_monitor
+import near_duplicates
+import posting_archive
+from conftest import load_fixture
+from job_store import JsonJobStore, SqliteJobStore, job_key
+from search_api import jobs_from_search_payload
+
+TODAY = date(2025, 3, 4)
+
+def container_record(title, link=None, index=0):
+    """A job container as EXTRACT_CONTAINERS_JS returns it"""
+    return {'index': index, 'hasToday': True, 'preview': '', 'title': title, 'altTitles': [],
+            'spans': ['Redmond, Washington, United States', 'Up to 50% work from home'], 'link': link}
+
+def api_and_dom_job(link):
+    api_job = jobs_from_search_payload(load_fixture('search_page1.json'), set(), TODAY)[0][0]
+    dom_job = career_monitor._jobs_from_container_records([container_record(api_job['title'], link)], set())[0]
+    return api_job, dom_job
+
+def test_dom_jobs_take_their_job_id_from_the_link():
+    api_job, dom_job = api_and_dom_job('https://jobs.careers.microsoft.com/global/en/job/1789012/Data-Scientist-II')
+    assert dom_job['job_id'] == api_job['job_id'] == '1789012'
+    assert job_key(dom_job) == job_key(api_job) == '1789012'
+    assert near_duplicates.job_key(dom_job) == near_duplicates.job_key(api_job) == 'id:1789012'
+
+def test_dom_jobs_without_a_link_are_keyed_by_title():
+    _, dom_job = api_and_dom_job(None)
+    assert 'job_id' not in dom_job
+    assert job_key(dom_job) == 'Data Scientist II'
+    assert near_duplicates.job_key(dom_job).startswith('title:')
+
+def test_stored_jobs_without_an_id_are_keyed_by_their_link():
+    stored = {'title': 'Data Scientist II', 'link': 'https://jobs.careers.microsoft.com/global/en/jobs/1789012'}
+    assert job_key(stored) == '1789012'
+
+def test_a_job_found_by_the_api_is_not_new_when_the_dom_finds_it(tmp_path):
+    api_job, dom_job = api_and_dom_job('https://jobs.careers.microsoft.com/global/en/job/1789012')
+    store = SqliteJobStore(path=str(tmp_path / 'jobs.db'), import_from=None)
+    store.record('ds', [api_job])
+    store.commit()
+    assert store.unseen_jobs('ds', [dom_job]) == []
+    store.close()
+
+def test_title_keyed_rows_from_before_link_ids_still_count_as_seen(tmp_path):
+    _, dom_job = api_and_dom_job('https://jobs.careers.microsoft.com/global/en/job/1789012')
+    store = SqliteJobStore(path=str(tmp_path / 'jobs.db'), import_from=None)
+    store.record('ds', [{'title': dom_job['title'], 'updated_date': 'Today'}])
+    store.commit()
+    assert store.unseen_jobs('ds', [dom_job]) == []
+    store.close()
+
+def test_archive_tracks_one_lifetime_across_extraction_paths(tmp_path):
+    api_job, dom_job = api_and_dom_job('https://jobs.careers.microsoft.com/global/en/job/1789012')
+    archive_dir = str(tmp_path / 'archive')
+    posting_archive.append_observations({'ds': [api_job]}, archive_dir=archive_dir)
+    posting_archive.append_observations({'ds': [dom_job]}, archive_dir=archive_dir)
+    columns = posting_archive.load_archive(archive_dir)
+    assert list(columns['job_key'][0]) == ['1789012']
+    assert len(posting_archive.job_lifetimes(columns)['first_row']) == 1
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'json':
+        store = JsonJobStore(path=str(tmp_path / 'known.json'), fingerprints_path=str(tmp_path / 'fingerprints.json'))
+    else:
+        store = SqliteJobStore(path=str(tmp_path / 'jobs.db'), import_from=None)
+    yield store
+    store.close()
+
+def reopen(store):
+    """The same store as the next run sees it"""
+    if isinstance(store, JsonJobStore):
+        return JsonJobStore(path=store.path, fingerprints_path=store.fingerprints_path)
+    return store
+
+def test_same_title_postings_with_different_job_ids_are_each_new(store):
+    first = {'title': 'Data Scientist II', 'updated_date': 'Today', 'location': 'Redmond', 'job_id': '1789012'}
+    second = dict(first, location='Atlanta', job_id='1789013')
+    assert store.unseen_jobs('ds', [first]) == [first]
+    store.record('ds', [first])
+    store.commit()
+    store = reopen(store)
+    assert store.unseen_jobs('ds', [first, second]) == [second]
+
+def test_snapshot_jobs_without_an_id_are_matched_by_title(store):
+    store.record('ds', [{'title': 'Data Scientist II', 'updated_date': 'Today'}])
+    store.commit()
+    store = reopen(store)
+    found = {'title': 'Data Scientist II', 'updated_date': 'Today', 'job_id': '1789012'}
+    assert store.unseen_jobs('ds', [found]) == []
@@ -0,0 +1,37 @@
+import pytest
+
+import career_monitor
+import monitor_cli
+from adaptive_schedule import RunLock
+
+@pytest.fixture
+def running_check():
+    """Holds the run lock the way hourly_monitor does during a check"""
+    lock = RunLock()
+    assert lock.acquire()
+    yield lock
+    lock.release()
+
+@pytest.fixture
+def monitor_runs(monkeypatch):
+    runs = []
+
+    def main(sources=None, dry_run=False):
+        runs.append(dry_run)
+        return True
+    monkeypatch.setattr(career_monitor, 'main', main)
+    return runs
+
+@pytest.mark.parametrize('command', [['check'], ['diff-only'], ['notify-pending']])
+def test_commands_wait_for_a_running_check(command, running_check, monitor_runs, capsys):
+    assert monitor_cli.main(command) == monitor_cli.LOCK_BUSY_EXIT
+    assert monitor_runs == []
+    assert "A job check is already running" in capsys.readouterr().out
+
+def test_lock_is_released_after_each_command(monitor_runs):
+    assert monitor_cli.main(['check']) == 0
+    assert monitor_cli.main(['diff-only']) == 0
+    assert monitor_runs == [False, True]
+    lock = RunLock()
+    assert lock.acquire()
+    lock.release()
@@ -0,0 +1,87 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import career_monitor
+import job_store
+from near_duplicates import DedupIndex, suppress_near_duplicates, title_levels
+
+def alert(title, job_id, location='Redmond, Washington, United States', source='ds'):
+    return {'action': 'new', 'job_title': title, 'updated_date': 'Today', 'location': location,
+            'work_arrangement': 'Up to 50% work from home', 'job_id': job_id, 'source': source}
+
+def job(title, job_id, location='Redmond, Washington, United States'):
+    return {'title': title, 'updated_date': 'Today', 'location': location, 'job_id': job_id}
+
+@pytest.fixture
+def index():
+    return DedupIndex(path='near_duplicates.json')
+
+@pytest.mark.parametrize('title', ['Data Scientist', 'Software Engineer'])
+def test_level_variants_with_their_own_job_ids_are_both_alerted(index, title):
+    index.add(job(f'{title} II', '1789012'), source='ds', seen_at=datetime(2025, 3, 3))
+    new = [alert(f'{title} III', '1789013'), alert(f'{title} 4', '1789014')]
+    kept, suppressed = suppress_near_duplicates(new, {'ds': []}, index=index, save=False)
+    assert kept == new
+    assert suppressed == []
+
+def test_level_variants_new_in_the_same_run_are_both_alerted(index):
+    new = [alert('Data Scientist II', '1789012'), alert('Data Scientist III', '1789013')]
+    kept, _ = suppress_near_duplicates(new, {'ds': []}, index=index, save=False)
+    assert kept == new
+
+def test_a_repost_under_a_new_job_id_is_still_suppressed(index):
+    index.add(job('Data Scientist II', '1789012'), source='ds', seen_at=datetime(2025, 3, 3))
+    kept, suppressed = suppress_near_duplicates([alert('Data Scientist 2', '1789099')], {'ds': []},
+                                                index=index, save=False)
+    assert kept == []
+    assert suppressed[0][1]['title'] == 'Data Scientist II'
+
+def test_title_levels_treat_roman_and_arabic_numerals_alike():
+    assert title_levels('Software Engineer II') == title_levels('Software Engineer 2') == {'2'}
+    assert title_levels('Senior Software Engineer') == frozenset()
+
+class QueuedDigests:
+    """Notifier stand-in that keeps the digests it was given"""
+
+    def __init__(self):
+        self.digests = []
+
+    def add(self, source_name, source_url, new_jobs):
+        if new_jobs:
+            self.digests.append((source_name, new_jobs))
+
+    def flush(self):
+        return bool(self.digests)
+
+@pytest.fixture
+def monitor_run(monkeypatch):
+    """career_monitor.main over one source whose browser visit finds a single new job"""
+    found = job('Data Scientist II', '1789012')
+    config = {'name': 'Data Science', 'url': 'https://jobs.careers.microsoft.com/global/en/search?q=data'}
+
+    def monitor_sources(sources, store):
+        return {'ds': [found]}, [dict(career_monitor.new_job_entry(found), source='ds')]
+    for name, value in (('HTTP_FAST_PATH', False), ('SHARD_WORKERS', 0), ('ENRICH_DETAILS', False),
+                        ('POSTING_ARCHIVE', False), ('STATE_BACKEND', 'json'), ('monitor_sources', monitor_sources)):
+        monkeypatch.setattr(career_monitor, name, value, raising=False)
+
+    def run():
+        notifier = QueuedDigests()
+        career_monitor.main(notifier=notifier, sources={'ds': config})
+        return notifier.digests
+    return run
+
+def test_index_is_saved_after_the_state(monitor_run):
+    assert len(monitor_run()) == 1
+    assert 'id:1789012' in DedupIndex(path='near_duplicates.json').load().entries
+
+def test_jobs_of_a_run_that_failed_to_save_its_state_are_alerted_again(monitor_run, monkeypatch):
+    def crash(self):
+        raise OSError("disk full")
+    with monkeypatch.context() as patch:
+        patch.setattr(job_store.JsonJobStore, 'commit', crash)
+        assert len(monitor_run()) == 1
+    assert not os.path.exists('near_duplicates.json')
+    assert len(monitor_run()) == 1
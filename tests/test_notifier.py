@@ -0,0 +1,216 @@
+import email
+import email.policy
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+
+import notifier as notifier_module
+from notifier import Notifier
+
+JOB = {'job_title': 'Data Scientist II', 'updated_date': 'Today', 'location': 'Redmond, Washington, United States',
+       'work_arrangement': 'Up to 50% work from home', 'link': 'https://jobs.careers.microsoft.com/global/en/job/1789012'}
+
+class SmtpStub:
+    """Local SMTP server speaking just enough ESMTP for smtplib (AUTH PLAIN, no TLS)
+
+    fail_data makes the next n DATA commands answer 451; stall_data makes the
+    server wait that many seconds before accepting a message; messages holds
+    the accepted message bodies.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.fail_data = 0
+        self.stall_data = 0
+        self.sessions = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write((line + "\r\n").encode())
+
+            def handle(self):
+                stub.sessions += 1
+                self.reply("220 stub ESMTP")
+                while True:
+                    line = self.rfile.readline().decode().rstrip("\r\n")
+                    if not line:
+                        return
+                    command = line.split(' ', 1)[0].upper()
+                    if command == 'EHLO':
+                        self.reply("250-stub")
+                        self.reply("250 AUTH PLAIN")
+                    elif command == 'HELO':
+                        self.reply("250 stub")
+                    elif command == 'AUTH':
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                        self.reply("250 OK")
+                    elif command == 'DATA':
+                        if stub.fail_data:
+                            stub.fail_data -= 1
+                            self.reply("451 4.3.0 Try again later")
+                            continue
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        body = []
+                        while True:
+                            data_line = self.rfile.readline().decode()
+                            if data_line in (".\r\n", ""):
+                                break
+                            body.append(data_line)
+                        if stub.stall_data:
+                            threading.Event().wait(stub.stall_data)  # time.sleep is patched by backoff_sleeps
+                        stub.messages.append(''.join(body))
+                        self.reply("250 OK queued")
+                    elif command == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def smtp_server():
+    server = SmtpStub()
+    yield server
+    server.close()
+
+@pytest.fixture
+def backoff_sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(notifier_module.time, 'sleep', sleeps.append)
+    return sleeps
+
+def message_text(raw):
+    """Subject and decoded body of a received digest"""
+    message = email.message_from_string(raw, policy=email.policy.default)
+    return message['Subject'] + "\n" + message.get_body(('plain',)).get_content()
+
+def make_notifier(smtp_server, **kwargs):
+    settings = dict(server='127.0.0.1', port=smtp_server.port, sender='monitor@example.com', password='secret',
+                    recipients='me@example.com', starttls=False, retries=2, backoff=0.5,
+                    pending_file='pending_notifications.json')
+    settings.update(kwargs)
+    return Notifier(**settings)
+
+def read_pending():
+    with open('pending_notifications.json') as f:
+        return json.load(f)['digests']
+
+def park(sections_list):
+    digests = [{'queued_at': '2025-03-04T09:00:00', 'sections': sections} for sections in sections_list]
+    with open('pending_notifications.json', 'w') as f:
+        json.dump({'digests': digests}, f)
+
+def section(name, jobs):
+    return {'source_name': name, 'source_url': f'https://careers.example/{name}', 'jobs': jobs}
+
+def test_sources_are_batched_into_one_digest(smtp_server):
+    notifier = make_notifier(smtp_server)
+    notifier.add('Data Science', 'https://careers.example/ds', [JOB])
+    notifier.add('Data Engineering', 'https://careers.example/de', [dict(JOB, job_title='Data Engineer')])
+    notifier.add('Data Science', 'https://careers.example/ds', [dict(JOB, job_title='Applied Scientist')])
+    assert notifier.flush()
+    notifier.close()
+    assert len(smtp_server.messages) == 1
+    message = message_text(smtp_server.messages[0])
+    assert '3 new jobs updated today' in message
+    for text in ('Data Science', 'Data Engineering', 'Data Scientist II', 'Data Engineer', 'Applied Scientist'):
+        assert text in message
+    assert notifier.sent == 1
+    assert not notifier.flush()  # Nothing collected since the last digest
+
+def test_failed_sends_are_retried_with_exponential_backoff(smtp_server, backoff_sleeps):
+    smtp_server.fail_data = 2
+    notifier = make_notifier(smtp_server)
+    assert notifier.send_now([section('ds', [JOB])])
+    notifier.close()
+    assert backoff_sleeps == [0.5, 1.0]
+    assert len(smtp_server.messages) == 1
+    assert notifier.sent == 1 and notifier.failed == 0
+
+def test_digest_is_parked_in_the_outbox_after_the_last_retry(smtp_server, backoff_sleeps):
+    smtp_server.fail_data = 3
+    notifier = make_notifier(smtp_server)
+    notifier.add('ds', 'https://careers.example/ds', [JOB])
+    notifier.flush()
+    notifier.close()
+    assert backoff_sleeps == [0.5, 1.0]
+    assert smtp_server.messages == []
+    assert notifier.failed == 1
+    pending = read_pending()
+    assert len(pending) == 1
+    assert pending[0]['sections'][0]['jobs'] == [JOB]
+
+def test_pending_digests_are_resent_on_startup(smtp_server):
+    park([[section('ds', [JOB])], [section('de', [dict(JOB, job_title='Data Engineer')])]])
+    notifier = make_notifier(smtp_server)
+    assert notifier.send_pending() == 2
+    notifier.close()
+    assert len(smtp_server.messages) == 2
+    assert read_pending() == []
+
+def test_pending_digests_stay_in_the_outbox_until_sent(smtp_server, backoff_sleeps):
+    park([[section('ds', [JOB])], [section('de', [dict(JOB, job_title='Data Engineer')])]])
+    notifier = make_notifier(smtp_server, retries=0)
+
+    # A kill before the sender thread gets to them leaves both digests in the outbox
+    notifier._start = lambda: None
+    assert notifier.send_pending() == 2
+    assert len(read_pending()) == 2
+
+    # The first resend succeeds and the second fails: only the failed one remains, once
+    first, second = notifier.queue.get(), notifier.queue.get()
+    assert notifier._deliver(*first)
+    smtp_server.fail_data = 1
+    assert not notifier._deliver(*second)
+    notifier.close()
+    pending = read_pending()
+    assert len(pending) == 1
+    assert pending[0]['sections'][0]['source_name'] == 'de'
+
+def test_pending_digests_wait_for_email_configuration(smtp_server):
+    park([[section('ds', [JOB])]])
+    notifier = make_notifier(smtp_server, password='')
+    assert notifier.send_pending() == 0
+    assert len(read_pending()) == 1
+
+def test_digest_still_sending_at_close_stays_in_the_outbox(smtp_server):
+    smtp_server.stall_data = 1.5
+    notifier = make_notifier(smtp_server)
+    notifier.add('ds', 'https://careers.example/ds', [JOB])
+    assert notifier.flush()
+    started = time.monotonic()
+    notifier.close(timeout=0.2)
+    assert time.monotonic() - started < 1
+    # A one-shot run exits here; the digest it was still sending can be resent with notify-pending
+    pending = read_pending()
+    assert len(pending) == 1
+    assert pending[0]['sections'][0]['jobs'] == [JOB]
+
+    notifier.thread.join(10)
+    assert len(smtp_server.messages) == 1
+    assert read_pending() == []
+
+def test_sent_digests_leave_the_outbox_empty(smtp_server):
+    notifier = make_notifier(smtp_server)
+    notifier.add('ds', 'https://careers.example/ds', [JOB])
+    notifier.flush()
+    notifier.close()
+    assert notifier.sent == 1
+    assert read_pending() == []
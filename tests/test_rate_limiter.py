@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+import pytest
+
+from http_client import HttpClient
+from rate_limiter import RateLimiter
+
+def make_limiter(**kwargs):
+    settings = dict(max_rate=100.0, min_rate=0.5, burst=100.0, backoff=0.5, recovery=10.0,
+                    state_path='rate_limits.json')
+    settings.update(kwargs)
+    return RateLimiter(**settings)
+
+def test_429_with_retry_after_halves_the_rate_and_blocks_the_host(http_server):
+    http_server.responses = [(429, {'Retry-After': '2'}, {})]
+    limiter = make_limiter()
+    with HttpClient(limiter=limiter) as client:
+        status, _ = client.get(http_server.url('/search'))
+    assert status == 429
+    bucket = limiter.buckets[http_server.host]
+    assert bucket.rate == pytest.approx(50.0)
+    assert bucket.throttled == 1
+    assert bucket.blocked_until - time.time() == pytest.approx(2, abs=0.5)
+    assert limiter.reserve(http_server.url('/search')) > 1
+
+def test_5xx_responses_back_off_down_to_the_minimum(http_server):
+    http_server.responses = [(503, {}, {})]
+    limiter = make_limiter(max_rate=400.0, min_rate=50.0)
+    with HttpClient(limiter=limiter) as client:
+        for expected in (200.0, 100.0, 50.0, 50.0):
+            client.get(http_server.url('/search'))
+            assert limiter.buckets[http_server.host].rate == pytest.approx(expected)
+
+def test_successes_bring_the_rate_back_to_the_ceiling(http_server):
+    http_server.responses = [(429, {}, {}), (503, {}, {}), (200, {}, {'ok': True})]
+    limiter = make_limiter()
+    with HttpClient(limiter=limiter) as client:
+        client.get(http_server.url('/search'))
+        client.get(http_server.url('/search'))
+        assert limiter.buckets[http_server.host].rate == pytest.approx(25.0)
+        for expected in (35.0, 45.0, 55.0):
+            client.get(http_server.url('/search'))
+            assert limiter.buckets[http_server.host].rate == pytest.approx(expected)
+        for _ in range(10):
+            client.get(http_server.url('/search'))
+    assert limiter.buckets[http_server.host].rate == pytest.approx(100.0)
+    assert limiter.describe() == []
+
+def test_saved_state_reloads(http_server):
+    http_server.responses = [(429, {'Retry-After': '30'}, {})]
+    limiter = make_limiter(recovery=0.0)
+    with HttpClient(limiter=limiter) as client:
+        client.get(http_server.url('/search'))
+    limiter.save()
+
+    with open('rate_limits.json') as f:
+        saved = json.load(f)
+    assert saved[http_server.host]['rate'] == pytest.approx(50.0)
+
+    restored = make_limiter(recovery=0.0).load()
+    bucket = restored.buckets[http_server.host]
+    assert bucket.rate == pytest.approx(50.0)
+    assert bucket.blocked_until == pytest.approx(limiter.buckets[http_server.host].blocked_until)
+    assert restored.reserve(http_server.url('/search')) > 25
+
+def test_no_state_file_is_written_when_no_host_was_slowed(http_server):
+    limiter = make_limiter()
+    with HttpClient(limiter=limiter) as client:
+        client.get(http_server.url('/search'))
+    limiter.save()
+    assert not os.path.exists('rate_limits.json')
+
+def test_shared_budget_is_split_between_processes_and_saved_as_the_host_rate():
+    worker = make_limiter(max_rate=4.0, burst=4.0, recovery=0.0, share=2)
+    assert worker.max_rate == pytest.approx(2.0)
+    worker.record('http://careers.example/search', status=429)
+    worker.save()
+    with open('rate_limits.json') as f:
+        assert json.load(f)['careers.example']['rate'] == pytest.approx(2.0)
+
+    # A second worker of the same run at its ceiling keeps the slower worker's saved rate
+    other = make_limiter(max_rate=4.0, burst=4.0, recovery=0.0, share=2)
+    other.created_at = worker.created_at
+    other.record('http://careers.example/search', status=200)
+    other.save()
+    assert make_limiter(max_rate=4.0, recovery=0.0).load().buckets['careers.example'].rate == pytest.approx(2.0)
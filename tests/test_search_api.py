@@ -0,0 +1,132 @@
+from datetime import date
+
+import pytest
+
+import career_monitor
+import search_api
+from conftest import load_fixture
+from search_api import fingerprint_search_payload, jobs_from_search_payload, payload_jobs
+
+TODAY = date(2025, 3, 4)
+SEARCH_URL = "https://gcsservices.careers.microsoft.com/search/api/v1/search?q=data&pg=1&pgSz=3&o=Recent"
+
+class FrozenDate(date):
+    @classmethod
+    def today(cls):
+        return TODAY
+
+class RecordedResponse:
+    def __init__(self, url, payload, status=200):
+        self.url = url
+        self.payload = payload
+        self.status = status
+        self.ok = 200 <= status < 300
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+class RouteHandler:
+    """Stands in for page.request: answers search API URLs from recorded payloads by result page"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        page_number = int(dict(part.split('=') for part in url.split('?', 1)[1].split('&'))['pg'])
+        if page_number not in self.pages:
+            return RecordedResponse(url, None, status=404)
+        return RecordedResponse(url, self.pages[page_number])
+
+class RecordedPage:
+    def __init__(self, pages):
+        self.request = RouteHandler(pages)
+
+class RecordedCapture:
+    def __init__(self, responses):
+        self.responses = responses
+
+@pytest.fixture
+def frozen_today(monkeypatch):
+    monkeypatch.setattr(search_api, 'date', FrozenDate)
+
+def test_jobs_from_search_payload_builds_todays_jobs():
+    jobs, entry_count, last_is_today = jobs_from_search_payload(load_fixture('search_page1.json'), set(), TODAY)
+    assert entry_count == 3
+    assert last_is_today
+    assert [job['job_id'] for job in jobs] == ['1789012', '1789013', '1789014']
+    engineer = jobs[1]
+    assert engineer['title'] == 'Senior Data Engineer'
+    assert engineer['updated_date'] == 'Today'
+    assert engineer['location'] == 'Atlanta, Georgia, United States'
+    assert engineer['work_arrangement'] == 'Microsoft on-site only'
+    assert engineer['discipline'] == 'Data Engineering'
+    assert engineer['link'] == 'https://jobs.careers.microsoft.com/global/en/job/1789013'
+
+def test_payload_without_job_ids_is_keyed_by_title():
+    jobs, entry_count, _ = jobs_from_search_payload(load_fixture('search_no_job_ids.json'), set(), TODAY)
+    assert entry_count == 3
+    # "Data Scientist  II\n" normalizes to the same title as the next entry and is kept once
+    assert [job['title'] for job in jobs] == ['Data Scientist II', 'Business Analyst']
+    assert all('job_id' not in job and 'link' not in job for job in jobs)
+    assert jobs[1]['work_arrangement'] == 'Up to 100% work from home'
+
+def test_malformed_payload_keeps_the_usable_entries():
+    payload = load_fixture('search_malformed.json')
+    entries, total = payload_jobs(payload)
+    assert len(entries) == 3
+    assert total == '4'
+    jobs, entry_count, last_is_today = jobs_from_search_payload(payload, set(), TODAY)
+    # Unparseable date and missing title are skipped; 7-digit fractional seconds still parse
+    assert [job['title'] for job in jobs] == ['Research Scientist']
+    assert jobs[0]['location'] == 'Unknown'
+    assert entry_count == 3
+    assert last_is_today
+
+@pytest.mark.parametrize('payload', [None, [], 'error', {'operationResult': None},
+                                     {'operationResult': {'result': None}},
+                                     {'operationResult': {'result': {'jobs': 'none'}}}])
+def test_payload_of_the_wrong_shape_has_no_jobs(payload):
+    assert payload_jobs(payload) == ([], 0)
+    assert jobs_from_search_payload(payload, set(), TODAY) == ([], 0, False)
+    assert fingerprint_search_payload(payload, TODAY).startswith('2025-03-04:0:')
+
+def test_fingerprint_changes_only_with_job_ids_and_posting_dates():
+    payload = load_fixture('search_page1.json')
+    fingerprint = fingerprint_search_payload(payload, TODAY)
+    assert fingerprint.startswith('2025-03-04:7:')
+
+    retitled = load_fixture('search_page1.json')
+    retitled['operationResult']['result']['jobs'][0]['title'] = 'Data Scientist 2'
+    assert fingerprint_search_payload(retitled, TODAY) == fingerprint
+
+    reposted = load_fixture('search_page1.json')
+    reposted['operationResult']['result']['jobs'][0]['postingDate'] = '2025-03-04T18:00:00+00:00'
+    assert fingerprint_search_payload(reposted, TODAY) != fingerprint
+    assert fingerprint_search_payload(payload, date(2025, 3, 5)) != fingerprint
+
+def test_network_extraction_crawls_recorded_pages_until_the_day_ends(frozen_today):
+    page = RecordedPage({2: load_fixture('search_page2.json'), 3: load_fixture('search_page1.json')})
+    capture = RecordedCapture([RecordedResponse(SEARCH_URL, load_fixture('search_page1.json'))])
+    stats = {}
+    jobs = career_monitor.extract_todays_jobs_from_api(page, capture, stats)
+    # Page 2 ends with yesterday's job, so page 3 is never requested; the repeated ID is dropped
+    assert [job['job_id'] for job in jobs] == ['1789012', '1789013', '1789014', '1789015']
+    assert len(page.request.requested) == 1
+    assert 'pg=2' in page.request.requested[0]
+    assert stats == {'mode': 'network', 'pages_crawled': 2, 'containers': 6, 'roundtrips': 2}
+
+def test_network_extraction_stops_on_an_error_page(frozen_today):
+    page = RecordedPage({})
+    capture = RecordedCapture([RecordedResponse(SEARCH_URL, load_fixture('search_page1.json'))])
+    jobs = career_monitor.extract_todays_jobs_from_api(page, capture, {})
+    assert len(jobs) == 3
+
+def test_network_extraction_without_a_usable_payload_falls_back_to_the_dom(frozen_today):
+    page = RecordedPage({})
+    assert career_monitor.extract_todays_jobs_from_api(page, RecordedCapture([]), {}) is None
+    unreadable = RecordedCapture([RecordedResponse(SEARCH_URL, ValueError('Unexpected token <'))])
+    assert career_monitor.extract_todays_jobs_from_api(page, unreadable, {}) is None
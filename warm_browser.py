@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Warm Browser for Long-Running Monitors
+Keeps one Chromium and its browser context alive across hourly checks
+"""
+
+import os
+import time
+
+from playwright.sync_api import sync_playwright
+
+from career_monitor import apply_navigation_profile
+from process_memory import process_tree_rss_mb
+
+# Recycle the browser after this many runs or once its processes pass this RSS
+RECYCLE_AFTER_RUNS = int(os.getenv('BROWSER_RECYCLE_RUNS', '24'))
+RECYCLE_RSS_MB = int(os.getenv('BROWSER_RECYCLE_RSS_MB', '1024'))
+
+class WarmBrowser:
+    """Long-lived Chromium whose context (HTTP cache, connections) survives between runs"""
+
+    def __init__(self, max_runs=RECYCLE_AFTER_RUNS, max_rss_mb=RECYCLE_RSS_MB):
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.runs = 0
+        self.restarts = 0
+
+    def start(self):
+        """Launch Chromium and open the shared browser context"""
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(headless=True)
+        self.context = self.browser.new_context()
+        apply_navigation_profile(self.context)
+        self.runs = 0
+
+    def stop(self):
+        """Close the browser and the Playwright driver, ignoring a dead browser"""
+        for close in (
+            lambda: self.context and self.context.close(),
+            lambda: self.browser and self.browser.close(),
+            lambda: self.playwright and self.playwright.stop(),
+        ):
+            try:
+                close()
+            except Exception as e:
+                print(f"Error closing warm browser: {str(e)}")
+        self.playwright = self.browser = self.context = None
+
+    def is_alive(self):
+        """Return True if the browser is running and still connected"""
+        return self.browser is not None and self.browser.is_connected()
+
+    def recycle_reason(self):
+        """Return why the browser should be restarted before the next run (or None)"""
+        if self.browser is None:
+            return "cold start"
+        if not self.browser.is_connected():
+            return "browser crashed"
+        if self.runs >= self.max_runs:
+            return f"recycled after {self.runs} runs"
+        rss_mb = process_tree_rss_mb(include_self=False)
+        if rss_mb > self.max_rss_mb:
+            return f"recycled at {rss_mb:.0f}MB RSS"
+        return None
+
+    def acquire(self):
+        """Return (context, startup_seconds, state) with a ready browser context
+
+        state is 'warm' when the running browser was reused, otherwise the
+        reason it had to be (re)started.
+        """
+        started = time.monotonic()
+        reason = self.recycle_reason()
+        if reason:
+            if self.browser is not None:
+                self.restarts += 1
+                self.stop()
+            self.start()
+        return self.context, time.monotonic() - started, reason or 'warm'
+
+    def run(self, monitor):
+        """Run monitor(context) on a warm context, restarting once if the browser crashes
+
+        Returns (result, startup_seconds, state) for the run.
+        """
+        context, startup, state = self.acquire()
+        try:
+            result = monitor(context)
+        except Exception:
+            if self.is_alive():
+                raise
+            result = None
+        if not self.is_alive():
+            print("⚠️ Warm browser crashed during the run, restarting it")
+            context, restart_time, _ = self.acquire()
+            startup += restart_time
+            state = 'browser crashed'
+            result = monitor(context)
+        self.runs += 1
+        return result, startup, state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()